@@ -0,0 +1,77 @@
+"""Background cleanup of stored photos whose rows were deleted.
+
+Routes call schedule_cleanup(urls) after their DB write commits and return
+straight away; a single worker thread per process asks the storage backend
+that issued each URL to delete it, retrying failures a few times with
+backoff. A crash loses whatever is still queued, which only leaves orphaned
+images behind for imagegc to find.
+"""
+import logging
+import queue
+import threading
+import time
+
+from storage import storage_for_url
+
+log = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 4
+
+
+def _delete(url):
+    storage = storage_for_url(url)
+    if storage:
+        storage.delete(url)
+
+
+class AssetCleaner:
+    """Queue of URLs drained by one daemon thread"""
+
+    def __init__(self, destroy=None, backoff=2.0):
+        self._destroy = destroy
+        self._backoff = backoff
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def schedule(self, urls):
+        urls = [u for u in urls if u and storage_for_url(u)]
+        if not urls:
+            return 0
+        self._ensure_started()
+        for url in urls:
+            self._queue.put((url, 1))
+        return len(urls)
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='asset-cleanup', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            url, attempt = self._queue.get()
+            try:
+                (self._destroy or _delete)(url)
+            except Exception as e:
+                if attempt >= MAX_ATTEMPTS:
+                    log.warning('Giving up on deleting %s: %s', url, e)
+                else:
+                    time.sleep(self._backoff * attempt)
+                    self._queue.put((url, attempt + 1))
+            finally:
+                self._queue.task_done()
+
+    def join(self):
+        """Block until everything queued so far is done (for scripts and benchmarks)"""
+        self._queue.join()
+
+
+_cleaner = AssetCleaner()
+
+
+def schedule_cleanup(urls):
+    """Queue deletion of the stored photos behind urls; URLs no backend owns are ignored"""
+    return _cleaner.schedule(urls)
@@ -0,0 +1,129 @@
+"""Bearer-token auth: verifying tokens, the role decorators and /login."""
+import os
+import time
+import threading
+from datetime import datetime, timedelta
+from functools import wraps
+from collections import OrderedDict
+
+from flask import Blueprint, jsonify, request, g
+
+bp = Blueprint('auth', __name__)
+
+def viewer_role():
+    """'admin' or 'friend' for a valid token, else 'public'"""
+    claims = get_claims()
+    role = claims.get('role') if claims else None
+    return role if role in ('admin', 'friend') else 'public'
+
+# Auth helpers
+def jwt_secrets():
+    """Secrets tokens may be signed with, newest first.
+
+    JWT_SECRETS is a comma-separated list for key rotation: new tokens are
+    signed with the first entry and any entry still verifies. Falls back to
+    the single JWT_SECRET. Read once per process.
+    """
+    global _jwt_secrets
+    if _jwt_secrets is None:
+        secrets = [s.strip() for s in os.getenv('JWT_SECRETS', '').split(',') if s.strip()]
+        _jwt_secrets = secrets or [os.getenv('JWT_SECRET', 'dev-secret')]
+    return _jwt_secrets
+
+_jwt_secrets = None
+
+TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', 1024))
+_token_cache = OrderedDict()  # token -> verified claims, least recently used first
+_token_cache_lock = threading.Lock()
+
+def verify_token(token):
+    """Return the claims of a valid token, or None.
+
+    Verified tokens are kept in a small LRU so repeat requests skip the
+    HMAC check; cached entries are dropped once their exp has passed.
+    """
+    with _token_cache_lock:
+        claims = _token_cache.get(token)
+        if claims is not None:
+            exp = claims.get('exp')
+            if exp is None or exp > time.time():
+                _token_cache.move_to_end(token)
+                return claims
+            del _token_cache[token]
+
+    import jwt  # Only paid for once a request actually carries a token
+    claims = None
+    for secret in jwt_secrets():
+        try:
+            claims = jwt.decode(token, secret, algorithms=['HS256'])
+            break
+        except jwt.InvalidSignatureError:
+            continue  # Maybe signed with an older secret
+        except jwt.InvalidTokenError:
+            return None
+    if claims is None:
+        return None
+
+    if TOKEN_CACHE_SIZE > 0:
+        with _token_cache_lock:
+            _token_cache[token] = claims
+            if len(_token_cache) > TOKEN_CACHE_SIZE:
+                _token_cache.popitem(last=False)
+    return claims
+
+def get_claims():
+    """Claims for the current request's bearer token (None if missing or invalid), verified once per request"""
+    if 'claims' not in g:
+        header = request.headers.get('Authorization')
+        g.claims = verify_token(header.replace('Bearer ', '')) if header else None
+    return g.claims
+
+def auth_required(role=None):
+    """Decorator factory: require a valid token, and optionally a role"""
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            if not request.headers.get('Authorization'):
+                return jsonify({"error": "Token missing"}), 401
+            claims = get_claims()
+            if claims is None:
+                return jsonify({"error": "Invalid token"}), 401
+            if role and claims.get('role') != role:
+                return jsonify({"error": "Admin access required"}), 403
+            return f(*args, **kwargs)
+        return decorated
+    return decorator
+
+token_required = auth_required()
+admin_required = auth_required('admin')
+
+def current_user():
+    claims = get_claims()
+    return claims.get('user') if claims else None
+
+@bp.route('/login', methods=['POST'])
+def login():
+    import jwt
+    data = request.json
+    username = data.get('username')
+    password = data.get('password')
+
+    # Check admin credentials
+    if username == os.getenv('ADMIN_USERNAME') and password == os.getenv('ADMIN_PASSWORD'):
+        token = jwt.encode({
+            'user': username,
+            'role': 'admin',
+            'exp': datetime.utcnow() + timedelta(hours=24)
+        }, jwt_secrets()[0], algorithm='HS256')
+        return jsonify({"token": token, "role": "admin"})
+
+    # Check friend credentials
+    if username == os.getenv('FRIEND_USERNAME') and password == os.getenv('FRIEND_PASSWORD'):
+        token = jwt.encode({
+            'user': username,
+            'role': 'friend',
+            'exp': datetime.utcnow() + timedelta(hours=24)
+        }, jwt_secrets()[0], algorithm='HS256')
+        return jsonify({"token": token, "role": "friend"})
+
+    return jsonify({"error": "Invalid credentials"}), 401
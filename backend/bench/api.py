@@ -0,0 +1,190 @@
+"""Benchmark the Flask API against seeded local SQLite/libsql files.
+
+Run from backend/:
+
+    python -m bench.api --sizes 1000,10000,100000 --output bench.json
+
+Each catalog size gets its own database file. Cloudinary and Anthropic are
+stubbed (see bench/stubs.py) so only our own code and the database are
+measured. Results are printed (or written) as JSON so runs can be diffed.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from bench import loadgen, seed, stubs
+
+ROUTES = ['list', 'photos', 'create', 'reorder', 'categories', 'clusters']
+
+
+def _make_token(role='admin'):
+    import jwt
+    return jwt.encode({
+        'user': 'bench',
+        'role': role,
+        'exp': datetime.utcnow() + timedelta(hours=1)
+    }, os.getenv('JWT_SECRET', 'dev-secret'), algorithm='HS256')
+
+
+def _photo_sets(path, limit=500):
+    """Photo ids (in position order) for items that have at least two photos"""
+    db = sqlite3.connect(path)
+    try:
+        rows = db.execute('''
+            SELECT item_id, GROUP_CONCAT(id) FROM (
+                SELECT item_id, id FROM item_photos ORDER BY item_id, position
+            ) GROUP BY item_id HAVING COUNT(*) >= 2 LIMIT ?
+        ''', [limit]).fetchall()
+    finally:
+        db.close()
+    return [(item_id, ids.split(',')) for item_id, ids in rows]
+
+
+def build_workers(app, item_ids, photo_sets, token, rng):
+    """Return {route name: make_worker} for the loadgen"""
+    auth = {'Authorization': f'Bearer {token}'}
+
+    def worker(fn):
+        def make():
+            client = app.test_client()
+            return lambda: fn(client)
+        return make
+
+    def list_items(client):
+        return client.get('/').status_code == 200
+
+    def photos(client):
+        return client.get(f'/item/{rng.choice(item_ids)}/photos').status_code == 200
+
+    def create(client):
+        data = {
+            'id': os.urandom(16).hex(),
+            'itemName': 'Bench item',
+            'description': 'Created by the benchmark suite.',
+            'category': 'clothing',
+            'subcategory': 'shirt',
+            'origin': 'Thrift store',
+            'materials': json.dumps([{"material": "Cotton", "percentage": 100}]),
+            'mainPhotoIndex': '0',
+            'photos': [(io.BytesIO(b'\xff\xd8' + os.urandom(2048)), f'p{i}.jpg') for i in range(2)],
+        }
+        resp = client.post('/', data=data, headers=auth, content_type='multipart/form-data')
+        return resp.status_code == 201
+
+    def reorder(client):
+        if not photo_sets:
+            return True
+        item_id, ids = rng.choice(photo_sets)
+        ids = ids[:]
+        rng.shuffle(ids)
+        resp = client.put(f'/item/{item_id}/photos/reorder', json={'photoIds': ids}, headers=auth)
+        return resp.status_code == 200
+
+    def categories(client):
+        return client.get('/categories').status_code == 200
+
+    def clusters(client):
+        return client.get('/clusters').status_code == 200
+
+    return {
+        'list': worker(list_items),
+        'photos': worker(photos),
+        'create': worker(create),
+        'reorder': worker(reorder),
+        'categories': worker(categories),
+        'clusters': worker(clusters),
+    }
+
+
+def run_size(size, args, db_dir):
+    path = os.path.join(db_dir, f'bench_{size}.db')
+    started = time.perf_counter()
+    seeded = seed.seed_catalog(path, size, seed=args.seed)
+    seed_time = time.perf_counter() - started
+    os.environ['TURSO_DATABASE_URL'] = f'file:{path}'
+    # libsql opens a connection per statement with timeout=0; holding one open
+    # keeps the WAL index alive so concurrent readers don't race to rebuild it
+    keeper = sqlite3.connect(path)
+
+    # get_db() reads TURSO_DATABASE_URL on each call, so later sizes reuse this import
+    from app import app
+
+    rng = random.Random(args.seed)
+    workers = build_workers(app, seeded['item_ids'], _photo_sets(path), _make_token(), rng)
+    results = {}
+    for route in args.routes:
+        # The write routes share one SQLite file, so keep them single-writer
+        concurrency = 1 if route in ('create', 'reorder') else args.concurrency
+        results[route] = loadgen.run(workers[route], args.requests, concurrency, args.duration)
+        print(f'  {size:>7} {route:<10} {results[route]["throughput_rps"]} rps '
+              f'p50={results[route]["latency_ms"]["p50"]}ms p99={results[route]["latency_ms"]["p99"]}ms',
+              file=sys.stderr)
+
+    keeper.close()
+    return {
+        "seed": {k: v for k, v in seeded.items() if k != 'item_ids'} | {"seconds": round(seed_time, 3)},
+        "routes": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='1000,10000,100000',
+                        help='comma-separated catalog sizes (default: 1000,10000,100000)')
+    parser.add_argument('--routes', default=','.join(ROUTES),
+                        help=f'comma-separated subset of {",".join(ROUTES)}')
+    parser.add_argument('--requests', type=int, default=200, help='requests per route (default: 200)')
+    parser.add_argument('--duration', type=float, default=20.0,
+                        help='max seconds per route, 0 for no limit (default: 20)')
+    parser.add_argument('--concurrency', type=int, default=4, help='threads for read routes (default: 4)')
+    parser.add_argument('--seed', type=int, default=0, help='RNG seed for the synthetic catalog')
+    parser.add_argument('--db-dir', default=None, help='where to put the database files (default: temp dir)')
+    parser.add_argument('--output', default=None, help='write JSON here instead of stdout')
+    args = parser.parse_args(argv)
+    args.routes = [r for r in args.routes.split(',') if r]
+    unknown = set(args.routes) - set(ROUTES)
+    if unknown:
+        parser.error(f'unknown routes: {", ".join(sorted(unknown))}')
+    sizes = [int(s) for s in args.sizes.split(',') if s]
+
+    os.environ.setdefault('JWT_SECRET', 'bench-secret-' + 'x' * 32)
+    # Measure the routes themselves, not the per-user write limits
+    os.environ.setdefault('RATE_LIMIT_DISABLED', '1')
+    stubs.install()
+
+    db_dir = args.db_dir or tempfile.mkdtemp(prefix='inventory-bench-')
+    os.makedirs(db_dir, exist_ok=True)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "requests": args.requests,
+            "duration": args.duration,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+        },
+        "results": {},
+    }
+    for size in sizes:
+        report["results"][str(size)] = run_size(size, args, db_dir)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
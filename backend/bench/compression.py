@@ -0,0 +1,125 @@
+"""Benchmark response compression: bytes saved against CPU spent.
+
+Run from backend/:
+
+    python -m bench.compression --items 10000
+
+Two parts:
+
+  * levels: the item list (as a signed-in admin sees it) and the
+    community list, compressed at a range of gzip levels and brotli
+    qualities (brotli only if the package is installed). Reports size,
+    ratio, and compress/decompress milliseconds (median of --repeat)
+  * routes: latency and bytes on the wire through the app, per
+    Accept-Encoding, for GET / signed in (compressed per request by
+    compress.py), GET / anonymous (cache.py's precompressed copies) and
+    GET /community (per request)
+"""
+import argparse
+import gzip
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from bench import loadgen, seed, stubs
+from bench.api import _make_token
+
+GZIP_LEVELS = (1, 6, 9)
+BROTLI_QUALITIES = (1, 4, 6, 9, 11)
+
+
+def _median_ms(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - started)
+    return round(statistics.median(times) * 1000, 2), result
+
+
+def levels(body, repeat):
+    rows = {"identity": {"bytes": len(body)}}
+    for level in GZIP_LEVELS:
+        ms, out = _median_ms(lambda: gzip.compress(body, level, mtime=0), repeat)
+        unzip_ms, _ = _median_ms(lambda: gzip.decompress(out), repeat)
+        rows[f'gzip-{level}'] = {"bytes": len(out), "ratio": round(len(body) / len(out), 2),
+                                 "compress_ms": ms, "decompress_ms": unzip_ms}
+    try:
+        import brotli
+    except ImportError:
+        return rows
+    for quality in BROTLI_QUALITIES:
+        # 11 is slow enough that one run says plenty
+        ms, out = _median_ms(lambda: brotli.compress(body, quality=quality), 1 if quality == 11 else repeat)
+        unzip_ms, _ = _median_ms(lambda: brotli.decompress(out), repeat)
+        rows[f'br-{quality}'] = {"bytes": len(out), "ratio": round(len(body) / len(out), 2),
+                                 "compress_ms": ms, "decompress_ms": unzip_ms}
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=10000)
+    parser.add_argument('--requests', type=int, default=50, help='requests per route and encoding (default: 50)')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per compression level (default: 5)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('JWT_SECRET', 'bench-secret-' + 'x' * 32)
+    os.environ.setdefault('RATE_LIMIT_DISABLED', '1')
+    stubs.install()
+
+    path = os.path.join(tempfile.mkdtemp(prefix='inventory-bench-'), 'compression.db')
+    seed.seed_catalog(path, args.items, seed=args.seed)
+    os.environ['TURSO_DATABASE_URL'] = f'file:{path}'
+
+    from app import app
+    from compress import encodings
+
+    admin = {'Authorization': f'Bearer {_make_token()}'}
+    client = app.test_client()
+    bodies = {
+        "items": client.get('/', headers=admin).get_data(),
+        "community": client.get('/community').get_data(),
+    }
+    report = {
+        "items": args.items,
+        "encodings": list(encodings()),
+        "levels": {name: levels(body, args.repeat) for name, body in bodies.items()},
+        "routes": {},
+    }
+
+    routes = {
+        "list_signed_in": ('/', admin),
+        "list_anonymous_cached": ('/', {}),
+        "community": ('/community', {}),
+    }
+    for route, (url, headers) in routes.items():
+        report["routes"][route] = {}
+        for encoding in ('identity',) + tuple(encodings()):
+            sent = dict(headers, **{'Accept-Encoding': encoding})
+            sizes = []
+
+            def make(url=url, sent=sent, sizes=sizes):
+                c = app.test_client()
+
+                def one():
+                    response = c.get(url, headers=sent)
+                    sizes.append(len(response.get_data()))
+                    return response.status_code == 200
+                return one
+            result = loadgen.run(make, args.requests, 1)
+            result["bytes"] = sizes[-1] if sizes else None
+            report["routes"][route][encoding] = result
+            print(f'  {route:<22} {encoding:<9} p50={result["latency_ms"]["p50"]}ms bytes={result["bytes"]}',
+                  file=sys.stderr)
+
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Tiny closed-loop load generator and latency summary helpers."""
+import threading
+import time
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def summarize(latencies, errors, elapsed):
+    """Turn raw latencies (seconds) into the JSON shape the reports use (milliseconds)"""
+    values = sorted(latencies)
+    ms = lambda v: round(v * 1000, 3) if v is not None else None
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(values) / elapsed, 2) if elapsed > 0 else None,
+        "latency_ms": {
+            "mean": ms(sum(values) / len(values)) if values else None,
+            "p50": ms(percentile(values, 50)),
+            "p90": ms(percentile(values, 90)),
+            "p95": ms(percentile(values, 95)),
+            "p99": ms(percentile(values, 99)),
+            "max": ms(values[-1]) if values else None,
+        },
+    }
+
+
+def run(make_worker, requests, concurrency=1, duration=None):
+    """Run up to `requests` calls spread over `concurrency` threads.
+
+    make_worker() is called once per thread and must return a callable that
+    performs one request and returns True on success. If duration (seconds)
+    is given the run stops early once it has elapsed.
+    """
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    remaining = [requests]
+    deadline = time.perf_counter() + duration if duration else None
+
+    def loop():
+        call = make_worker()
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            if deadline and time.perf_counter() > deadline:
+                return
+            start = time.perf_counter()
+            try:
+                ok = call()
+            except Exception:
+                ok = False
+            took = time.perf_counter() - start
+            with lock:
+                latencies.append(took)
+                if not ok:
+                    errors[0] += 1
+
+    threads = [threading.Thread(target=loop) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return summarize(latencies, errors[0], time.perf_counter() - started)
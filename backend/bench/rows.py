@@ -0,0 +1,134 @@
+"""Microbenchmark: per-row cost of turning item rows into dicts.
+
+Run from backend/:
+
+    python -m bench.rows --rows 100000
+
+Compares the original positional row_to_dict (kept here as the baseline)
+with the column-driven mapper in records.py, on libsql_client Row objects.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+
+from libsql_client.result import Row
+
+from bench import seed
+
+
+def legacy_row_to_dict(row):
+    """row_to_dict as it was before the compiled mapper"""
+    import json
+    materials_raw = row[12] if len(row) > 12 else None
+    materials = None
+    if materials_raw:
+        try:
+            materials = json.loads(materials_raw)
+        except:
+            materials = None
+    return {
+        "id": row[0],
+        "itemName": row[1],
+        "description": row[2],
+        "category": row[3],
+        "origin": row[4],
+        "mainPhoto": row[5],
+        "createdAt": row[6],
+        "subcategory": row[7],
+        "secondhand": row[8],
+        "lastEdited": row[9] if len(row) > 9 else None,
+        "gifted": row[10] if len(row) > 10 else None,
+        "private": row[11] if len(row) > 11 else None,
+        "materials": materials,
+        "privatePhotos": row[13] if len(row) > 13 else None,
+        "privateDescription": row[14] if len(row) > 14 else None,
+        "privateOrigin": row[15] if len(row) > 15 else None,
+        "pinnedX": row[16] if len(row) > 16 else None,
+        "pinnedY": row[17] if len(row) > 17 else None,
+        "localCol": row[18] if len(row) > 18 else None,
+        "localRow": row[19] if len(row) > 19 else None
+    }
+
+
+class _Result:
+    def __init__(self, columns, rows):
+        self.columns = columns
+        self.rows = rows
+
+
+def make_rows(n, columns, rng):
+    column_idxs = {c: i for i, c in enumerate(columns)}
+    rows = []
+    for i in range(n):
+        category = rng.choice(seed.CATEGORIES)
+        values = {
+            'id': f'{i:032x}',
+            'item_name': seed._sentence(rng, 3),
+            'description': seed._sentence(rng, rng.randint(10, 80)),
+            'category': category,
+            'origin': rng.choice(seed.ORIGINS),
+            'main_photo': f'https://res.cloudinary.com/bench/image/upload/{i}.jpg',
+            'created_at': '2024-01-01T00:00:00',
+            'subcategory': rng.choice(seed.SUBCATEGORIES),
+            'secondhand': 'secondhand',
+            'gifted': 'no',
+            'materials': seed._materials(rng, category),
+            'local_col': rng.choice([None, 1]),
+        }
+        rows.append(Row(column_idxs, tuple(values.get(c) for c in columns)))
+    return rows
+
+
+def best_of(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        took = time.perf_counter() - started
+        best = took if best is None else min(best, took)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    from records import ITEM_COLUMN_NAMES, map_rows, decode_materials
+
+    rows = make_rows(args.rows, ITEM_COLUMN_NAMES, random.Random(args.seed))
+    result = _Result(ITEM_COLUMN_NAMES, rows)
+
+    # The legacy mapper predates the version column
+    mapped = [{k: v for k, v in item.items() if k != 'version'} for item in map_rows(_Result(ITEM_COLUMN_NAMES, rows[:1000]))]
+    assert [legacy_row_to_dict(r) for r in rows[:1000]] == mapped
+
+    def cold():
+        decode_materials.cache_clear()
+        map_rows(result)
+
+    legacy = best_of(lambda: [legacy_row_to_dict(r) for r in rows], args.repeat)
+    compiled_cold = best_of(cold, args.repeat)
+    compiled = best_of(lambda: map_rows(result), args.repeat)
+
+    per_row = lambda seconds: round(seconds / args.rows * 1e9, 1)
+    report = {
+        "rows": args.rows,
+        "repeat": args.repeat,
+        "ns_per_row": {
+            "legacy_row_to_dict": per_row(legacy),
+            "compiled_mapper_cold_materials_cache": per_row(compiled_cold),
+            "compiled_mapper": per_row(compiled),
+        },
+        "speedup": round(legacy / compiled, 2),
+    }
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+"""Seed a local SQLite/libsql file with a synthetic inventory catalog.
+
+The schema mirrors what the production database ends up with after
+init_db() and all of the /migrate-* endpoints have run.
+"""
+import json
+import os
+import random
+import sqlite3
+import uuid
+from datetime import datetime, timedelta
+
+SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS item (
+        id TEXT PRIMARY KEY,
+        item_name TEXT,
+        description TEXT,
+        category TEXT,
+        origin TEXT,
+        main_photo TEXT,
+        created_at TEXT,
+        subcategory TEXT,
+        secondhand TEXT,
+        pinned_x REAL,
+        pinned_y REAL,
+        local_col INTEGER,
+        local_row INTEGER,
+        last_edited TEXT,
+        gifted TEXT,
+        private TEXT,
+        private_photos TEXT,
+        private_description TEXT,
+        private_origin TEXT,
+        materials TEXT
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS item_photos (
+        id TEXT PRIMARY KEY,
+        item_id TEXT NOT NULL,
+        url TEXT NOT NULL,
+        position INTEGER DEFAULT 0,
+        created_at TEXT,
+        FOREIGN KEY (item_id) REFERENCES item(id) ON DELETE CASCADE
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS community_item (
+        seq INTEGER PRIMARY KEY,
+        id TEXT NOT NULL UNIQUE,
+        item_name TEXT,
+        description TEXT,
+        category TEXT,
+        origin TEXT,
+        main_photo TEXT,
+        created_at TEXT,
+        subcategory TEXT,
+        submitted_by TEXT,
+        approved INTEGER DEFAULT 0
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS materials (
+        id TEXT PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS categories (
+        id TEXT PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE,
+        display_name TEXT NOT NULL,
+        grid_col INTEGER,
+        grid_row INTEGER,
+        box_width INTEGER,
+        box_height INTEGER
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS subcategories (
+        id TEXT PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE,
+        display_name TEXT NOT NULL,
+        category TEXT NOT NULL
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS subcategory_clusters (
+        id TEXT PRIMARY KEY,
+        category TEXT NOT NULL,
+        subcategory TEXT NOT NULL,
+        local_col INTEGER NOT NULL DEFAULT 0,
+        local_row INTEGER NOT NULL DEFAULT 1,
+        width INTEGER NOT NULL DEFAULT 2,
+        height INTEGER NOT NULL DEFAULT 2,
+        UNIQUE(category, subcategory)
+    )
+    ''',
+]
+
+CATEGORIES = ['clothing', 'jewelry', 'sentimental', 'bedding', 'other']
+SUBCATEGORIES = ['undershirt', 'shirt', 'sweater', 'jacket', 'dress', 'pants',
+                 'shorts', 'skirt', 'shoes', 'socks', 'underwear', 'accessories', 'other']
+MATERIALS = ['Cotton', 'Polyester', 'Rayon', 'Wool', 'Linen', 'Silk', 'Nylon', 'Spandex']
+ORIGINS = ['Thrift store', 'Goodwill', 'Gift from mom', 'Uniqlo', 'Etsy',
+           'Army surplus store', 'Handmade', 'Target', 'Depop', 'Unknown']
+WORDS = ('soft worn blue striped vintage cozy old favorite little bright faded '
+         'linen wool button pocket sleeve summer winter trip gift remember '
+         'wear evening thermal pajamas coast drive store brother comfortable').split()
+
+
+def create_schema(path):
+    """Create every table the app expects in the SQLite file at path"""
+    db = sqlite3.connect(path)
+    try:
+        db.execute('PRAGMA journal_mode=WAL')
+        for statement in SCHEMA:
+            db.execute(statement)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _sentence(rng, n):
+    return ' '.join(rng.choice(WORDS) for _ in range(n)).capitalize() + '.'
+
+
+def _materials(rng, category):
+    if category not in ('clothing', 'bedding'):
+        return None
+    picks = rng.sample(MATERIALS, rng.randint(1, 3))
+    remaining = 100
+    result = []
+    for i, name in enumerate(picks):
+        pct = remaining if i == len(picks) - 1 else rng.randint(1, remaining - (len(picks) - i - 1))
+        remaining -= pct
+        result.append({"material": name, "percentage": pct})
+    return json.dumps(result)
+
+
+def seed_catalog(path, n_items, seed=0, community_ratio=0.1, max_photos=5):
+    """Fill a fresh database at path with n_items items plus photos,
+    materials, taxonomy, cluster layout and community submissions.
+
+    Returns a dict with the ids needed to drive the benchmark routes.
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    for suffix in ('-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    create_schema(path)
+
+    rng = random.Random(seed)
+    base_time = datetime(2020, 1, 1)
+    db = sqlite3.connect(path)
+    try:
+        db.executemany('INSERT INTO materials (id, name) VALUES (?, ?)',
+                       [(str(uuid.UUID(int=rng.getrandbits(128))), name) for name in MATERIALS])
+        db.executemany(
+            'INSERT INTO categories (id, name, display_name, grid_col, grid_row, box_width, box_height) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            [(str(uuid.UUID(int=rng.getrandbits(128))), name, name.capitalize(), (i % 3) * 8, (i // 3) * 8, 8, 8)
+             for i, name in enumerate(CATEGORIES)]
+        )
+        db.executemany(
+            'INSERT INTO subcategories (id, name, display_name, category) VALUES (?, ?, ?, ?)',
+            [(str(uuid.UUID(int=rng.getrandbits(128))), name, name.capitalize(), 'clothing') for name in SUBCATEGORIES]
+        )
+        db.executemany(
+            'INSERT INTO subcategory_clusters (id, category, subcategory, local_col, local_row, width, height) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            [(str(uuid.UUID(int=rng.getrandbits(128))), 'clothing', name, (i % 4) * 2, 1 + (i // 4) * 2, 2, 2)
+             for i, name in enumerate(SUBCATEGORIES)]
+        )
+
+        item_ids = []
+        items = []
+        photos = []
+        for i in range(n_items):
+            item_id = str(uuid.UUID(int=rng.getrandbits(128)))
+            item_ids.append(item_id)
+            category = rng.choice(CATEGORIES)
+            subcategory = rng.choice(SUBCATEGORIES) if category == 'clothing' else None
+            created_at = (base_time + timedelta(minutes=i)).isoformat()
+            photo_count = rng.randint(0, max_photos)
+            urls = [f'https://res.cloudinary.com/bench/image/upload/{item_id}_{p}.jpg' for p in range(photo_count)]
+            for position, url in enumerate(urls):
+                photos.append((str(uuid.UUID(int=rng.getrandbits(128))), item_id, url, position, created_at))
+            items.append((
+                item_id,
+                _sentence(rng, 3),
+                _sentence(rng, rng.randint(10, 80)),
+                category,
+                rng.choice(ORIGINS),
+                urls[0] if urls else None,
+                created_at,
+                subcategory,
+                rng.choice(['new', 'secondhand', 'handmade', 'unknown']),
+                rng.choice([None, created_at]),
+                rng.choice(['yes', 'no']),
+                rng.choice([None, 'yes', 'no']),
+                _materials(rng, category),
+                rng.choice([None, 'yes']),
+                rng.choice([None, 'yes']),
+                rng.choice([None, 'yes']),
+                rng.choice([None, rng.randint(0, 7)]),
+                rng.choice([None, rng.randint(0, 7)]),
+            ))
+        db.executemany(
+            'INSERT INTO item (id, item_name, description, category, origin, main_photo, created_at, subcategory, secondhand, last_edited, gifted, private, materials, private_photos, private_description, private_origin, local_col, local_row) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            items
+        )
+        db.executemany('INSERT INTO item_photos (id, item_id, url, position, created_at) VALUES (?, ?, ?, ?, ?)', photos)
+
+        community = []
+        for i in range(int(n_items * community_ratio)):
+            community_id = str(uuid.UUID(int=rng.getrandbits(128)))
+            community.append((
+                community_id,
+                _sentence(rng, 3),
+                _sentence(rng, rng.randint(10, 60)),
+                rng.choice(CATEGORIES),
+                rng.choice(ORIGINS),
+                f'https://res.cloudinary.com/bench/image/upload/community_{community_id}.jpg',
+                (base_time + timedelta(minutes=i)).isoformat(),
+                rng.choice(SUBCATEGORIES),
+                rng.choice(['anon', 'sam', 'alex', '']),
+                1 if rng.random() < 0.8 else 0,
+            ))
+        db.executemany(
+            'INSERT INTO community_item (id, item_name, description, category, origin, main_photo, created_at, subcategory, submitted_by, approved) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            community
+        )
+        db.commit()
+    finally:
+        db.close()
+
+    return {
+        "items": n_items,
+        "photos": len(photos),
+        "community": len(community),
+        "item_ids": item_ids,
+    }
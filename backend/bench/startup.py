@@ -0,0 +1,126 @@
+"""Benchmark cold start: import cost and time to the first response.
+
+Run from backend/:
+
+    python -m bench.startup --items 1000 --rtt-ms 40
+
+Every measurement runs in a fresh interpreter, since that's what a
+scale-to-zero host pays for. Reports:
+
+  * python -X importtime for `import app`: the total and the slowest modules
+  * time to first response for GET /, split into interpreter + import and
+    the first request. It's measured twice against the same database:
+    "fresh" has no schema marker yet, so init_db() runs, and "warm" is
+    every later start. The number of database statements each one issues
+    is counted too.
+
+--rtt-ms adds that much sleep to each database statement, to stand in for
+the round trip to Turso that a local file doesn't have.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench import seed
+
+CHILD = '''
+import json, os, sys, time
+started = time.perf_counter()
+import app as app_module
+imported = time.perf_counter()
+
+rtt = float(os.environ.get('BENCH_RTT_MS', 0)) / 1000
+counts = {'statements': 0}
+
+from libsql_client.sync import ClientSync
+
+def counting(method):
+    def wrapper(*args, **kwargs):
+        counts['statements'] += 1
+        time.sleep(rtt)
+        return method(*args, **kwargs)
+    return wrapper
+
+ClientSync.execute = counting(ClientSync.execute)
+ClientSync.batch = counting(ClientSync.batch)
+
+response = app_module.app.test_client().get('/')
+done = time.perf_counter()
+json.dump({
+    'status': response.status_code,
+    'import_s': imported - started,
+    'first_request_s': done - imported,
+    'statements': counts['statements'],
+}, sys.stdout)
+'''
+
+
+def _env(path, rtt_ms):
+    env = dict(os.environ, TURSO_DATABASE_URL=f'file:{path}', BENCH_RTT_MS=str(rtt_ms))
+    env.pop('TURSO_AUTH_TOKEN', None)
+    return env
+
+
+def importtime(path, top=10):
+    """Parse `python -X importtime -c 'import app'` into totals in milliseconds"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'],
+                            env=_env(path, 0), capture_output=True, text=True, check=True)
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    total = next(cumulative for name, _, cumulative in modules if name == 'app')
+    slowest = sorted((m for m in modules if m[0] != 'app'), key=lambda m: -m[2])[:top]
+    return {
+        "app_cumulative_ms": round(total / 1000, 1),
+        "slowest": [{"module": name, "cumulative_ms": round(c / 1000, 1)} for name, _, c in slowest],
+        "loaded": {name: name in {m[0] for m in modules}
+                   for name in ('libsql_client', 'aiohttp', 'cloudinary', 'anthropic', 'jwt', 'PIL')},
+    }
+
+
+def first_response(path, rtt_ms):
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', CHILD], env=_env(path, rtt_ms),
+                            capture_output=True, text=True, check=True)
+    wall = time.perf_counter() - started
+    child = json.loads(result.stdout)
+    return {
+        "status": child["status"],
+        "wall_ms": round(wall * 1000, 1),
+        "import_ms": round(child["import_s"] * 1000, 1),
+        "first_request_ms": round(child["first_request_s"] * 1000, 1),
+        "statements": child["statements"],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=1000)
+    parser.add_argument('--rtt-ms', type=float, default=0, help='simulated database round trip (default: 0)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    path = os.path.join(tempfile.mkdtemp(prefix='inventory-bench-'), 'startup.db')
+    seed.seed_catalog(path, args.items, seed=args.seed)
+
+    report = {
+        "items": args.items,
+        "rtt_ms": args.rtt_ms,
+        "importtime": importtime(path),
+        # importtime doesn't send a request, so the schema marker is still unset here
+        "fresh": first_response(path, args.rtt_ms),
+        "warm": first_response(path, args.rtt_ms),
+    }
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""Offline stand-ins for Cloudinary and Anthropic so benchmarks never hit the network,
+and a busy timeout so a local SQLite file behaves more like Turso."""
+import json
+import sys
+import types
+import uuid
+
+
+def fake_upload(file, **options):
+    """Drain the upload like the real client would and return a Cloudinary-shaped result"""
+    data = file.read() if hasattr(file, 'read') else b''
+    public_id = options.get('public_id') or uuid.uuid4().hex
+    if options.get('folder'):
+        public_id = f"{options['folder']}/{public_id}"
+    return {
+        "public_id": public_id,
+        "secure_url": f"https://res.cloudinary.com/bench/image/upload/{public_id}.jpg",
+        "bytes": len(data),
+    }
+
+
+def fake_destroy(public_id, **options):
+    return {"result": "ok"}
+
+
+class _FakeMessages:
+    def create(self, **kwargs):
+        text = json.dumps({
+            "itemName": "Blue cotton t-shirt",
+            "description": "Got this at a thrift store.",
+            "category": "clothing",
+            "subcategory": "shirt",
+            "origin": "Thrift store",
+            "materials": [{"material": "Cotton", "percentage": 100}],
+            "secondhand": "secondhand",
+            "gifted": "no",
+        })
+        return types.SimpleNamespace(content=[types.SimpleNamespace(text=text)])
+
+
+class _FakeAnthropic:
+    def __init__(self, api_key=None, **kwargs):
+        self.messages = _FakeMessages()
+
+
+BUSY_TIMEOUT_MS = 5000
+
+
+def wait_on_locks(timeout_ms=BUSY_TIMEOUT_MS):
+    """Give libsql_client's file: connections a busy timeout.
+
+    It opens one per statement with timeout=0, so concurrent bench workers
+    sharing a SQLite file fail with SQLITE_BUSY where Turso would queue
+    them. busy_timeout is per connection, so it can't be set on the file.
+    """
+    from libsql_client import sqlite3_utils
+    connect = sqlite3_utils.Sqlite3Client._connect
+    if getattr(connect, 'busy_timeout', None) == timeout_ms:
+        return
+
+    def _connect(self):
+        db = connect(self)
+        db.execute(f'PRAGMA busy_timeout = {int(timeout_ms)}')
+        return db
+    _connect.busy_timeout = timeout_ms
+    sqlite3_utils.Sqlite3Client._connect = _connect
+
+
+def install():
+    """Patch cloudinary.uploader, register a fake anthropic module and
+    make local database connections wait on locks"""
+    import cloudinary.uploader
+    cloudinary.uploader.upload = fake_upload
+    cloudinary.uploader.destroy = fake_destroy
+
+    anthropic = types.ModuleType('anthropic')
+    anthropic.Anthropic = _FakeAnthropic
+    sys.modules['anthropic'] = anthropic
+
+    wait_on_locks()
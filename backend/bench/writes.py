@@ -0,0 +1,120 @@
+"""Benchmark item saves: full PUT /item/<id> against PATCH with one field.
+
+Run from backend/:
+
+    python -m bench.writes --items 1000 --requests 500
+
+Both routes get the same edit (flipping `private`). PUT sends every
+editable field and rewrites all of them. PATCH sends and writes just the
+one field. Each route is also timed for a save where nothing changed,
+which leaves last_edited and version alone. Request bodies are reported
+in bytes next to the latencies.
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+
+from bench import loadgen, seed, stubs
+from bench.api import _make_token
+
+
+def _items(path, ids):
+    db = sqlite3.connect(path)
+    db.row_factory = sqlite3.Row
+    try:
+        rows = db.execute(f'SELECT * FROM item WHERE id IN ({", ".join("?" * len(ids))})', ids).fetchall()
+    finally:
+        db.close()
+    return {row['id']: dict(row) for row in rows}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=1000)
+    parser.add_argument('--requests', type=int, default=500, help='requests per case (default: 500)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('JWT_SECRET', 'bench-secret-' + 'x' * 32)
+    os.environ.setdefault('RATE_LIMIT_DISABLED', '1')
+    stubs.install()
+
+    path = os.path.join(tempfile.mkdtemp(prefix='inventory-bench-'), 'writes.db')
+    seeded = seed.seed_catalog(path, args.items, seed=args.seed)
+    os.environ['TURSO_DATABASE_URL'] = f'file:{path}'
+    keeper = sqlite3.connect(path)
+
+    from app import app
+    from blueprints.items import EDITABLE_ITEM_FIELDS
+
+    rng = random.Random(args.seed)
+    ids = rng.sample(seeded['item_ids'], min(200, len(seeded['item_ids'])))
+    rows = _items(path, ids)
+    auth = {'Authorization': f'Bearer {_make_token()}'}
+
+    def full_body(item_id, private):
+        row = rows[item_id]
+        body = {key: row.get(column) for key, column in EDITABLE_ITEM_FIELDS}
+        body['materials'] = json.loads(row['materials']) if row.get('materials') else None
+        body['private'] = private
+        return body
+
+    # Every request flips one item, so each one is a real change
+    state = {item_id: 'false' for item_id in ids}
+
+    def flip():
+        item_id = rng.choice(ids)
+        state[item_id] = 'true' if state[item_id] == 'false' else 'false'
+        return item_id, state[item_id]
+
+    def put(client):
+        item_id, private = flip()
+        return client.put(f'/item/{item_id}', json=full_body(item_id, private), headers=auth).status_code == 200
+
+    def patch(client):
+        item_id, private = flip()
+        return client.patch(f'/item/{item_id}', json={'private': private}, headers=auth).status_code == 200
+
+    def put_unchanged(client):
+        item_id = rng.choice(ids)
+        return client.put(f'/item/{item_id}', json=full_body(item_id, state[item_id]), headers=auth).status_code == 200
+
+    def patch_unchanged(client):
+        item_id = rng.choice(ids)
+        return client.patch(f'/item/{item_id}', json={'private': state[item_id]}, headers=auth).status_code == 200
+
+    cases = {'put': put, 'patch': patch, 'put_unchanged': put_unchanged, 'patch_unchanged': patch_unchanged}
+    # Settle every item on a known value first so the unchanged cases really are
+    client = app.test_client()
+    for item_id in ids:
+        client.patch(f'/item/{item_id}', json={'private': 'false'}, headers=auth)
+
+    sample = ids[0]
+    report = {
+        "items": args.items,
+        "request_bytes": {
+            "put": len(json.dumps(full_body(sample, 'true'))),
+            "patch": len(json.dumps({'private': 'true'})),
+        },
+        "routes": {},
+    }
+    for name, fn in cases.items():
+        def make(fn=fn):
+            client = app.test_client()
+            return lambda: fn(client)
+        # One SQLite file, so keep it single-writer like bench.api does
+        report["routes"][name] = loadgen.run(make, args.requests, 1)
+        print(f'  {name:<16} p50={report["routes"][name]["latency_ms"]["p50"]}ms '
+              f'p99={report["routes"][name]["latency_ms"]["p99"]}ms', file=sys.stderr)
+
+    keeper.close()
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == '__main__':
+    main()
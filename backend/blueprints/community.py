@@ -0,0 +1,184 @@
+"""Community items: the approved catalog, search and the moderation queue.
+
+Submitting and moderating them are in blueprints/submissions.py."""
+import json
+import base64
+
+from flask import Blueprint, jsonify, request
+
+from auth import token_required
+from db import get_db, read_only
+from ratelimit import rate_limit
+from records import (
+    COMMUNITY_COLUMNS, COMMUNITY_COLUMN_NAMES, COMMUNITY_FIELDS,
+    compile_row_mapper, map_rows, random_count, sample_rows,
+)
+from search import COMMUNITY_SEARCH, match_query
+
+bp = Blueprint('community', __name__)
+
+@bp.route('/community', methods=['GET'])
+@read_only
+def get_community_items():
+    conn = get_db()
+    result = conn.execute(f'SELECT {COMMUNITY_COLUMNS} FROM community_item WHERE approved = 1')
+    items = map_rows(result, COMMUNITY_FIELDS)
+    return jsonify(items)
+
+PENDING_PAGE_SIZE = 50
+MAX_PENDING_PAGE_SIZE = 200
+
+def encode_cursor(*position):
+    raw = json.dumps(list(position)).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor, size=2):
+    """The size values of a nextCursor, e.g. (sort key, id), or None if it's malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        position = json.loads(raw)
+    except Exception:
+        return None
+    return tuple(position) if isinstance(position, list) and len(position) == size else None
+
+SEARCH_PAGE_SIZE = 24
+MAX_SEARCH_PAGE_SIZE = 100
+
+@bp.route('/community/search', methods=['GET'])
+@read_only
+@rate_limit('community-search', per_minute=120, burst=30)
+def search_community_items():
+    """A page of approved community items.
+
+    ?q= ranks full-text matches by relevance, the item name counting most;
+    without it the newest come first. ?category= (repeatable) and
+    ?subcategory= filter. ?limit= (default 24, max 100) and ?cursor= (the
+    previous page's nextCursor) page through; nextCursor is null on the
+    last page. Only the first page has a total: counting every match is a
+    second query, so later pages skip it.
+
+    The newest-first listing pages by keyset on (created_at, id), so
+    approvals between pages don't skip or repeat anything. Search results
+    page by offset instead: bm25 scores shift as documents come and go, so
+    they can't anchor a keyset. An item approved between pages can push
+    one result across the boundary, which then shows up on both pages
+    (the client drops it by id), or push one off unseen.
+    """
+    try:
+        limit = min(max(int(request.args.get('limit', SEARCH_PAGE_SIZE)), 1), MAX_SEARCH_PAGE_SIZE)
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+
+    filters = ['c.approved = 1']
+    args = []
+    query = match_query(request.args.get('q'))
+    if query:
+        index = COMMUNITY_SEARCH.name
+        # CROSS JOIN keeps the index driving; otherwise SQLite may walk
+        # community_item and run the MATCH once per row
+        source = f'{index} CROSS JOIN community_item c ON c.rowid = {index}.rowid'
+        filters.insert(0, f'{index} MATCH ?')
+        args.append(query)
+        # bm25 is lower-is-better
+        sort_key, order, after = COMMUNITY_SEARCH.rank_sql(), 'sort_key, id', None
+    else:
+        source = 'community_item c'
+        sort_key, order, after = 'c.created_at', 'sort_key DESC, id DESC', '<'
+    categories = [category for category in request.args.getlist('category') if category]
+    if categories:
+        filters.append(f'c.category IN ({", ".join("?" * len(categories))})')
+        args += categories
+    if request.args.get('subcategory'):
+        filters.append('c.subcategory = ?')
+        args.append(request.args['subcategory'])
+    where = ' AND '.join(filters)
+
+    page = ''
+    page_args = []
+    offset = 0
+    cursor = request.args.get('cursor')
+    if cursor and after is None:
+        position = decode_cursor(cursor, size=1)
+        if position is None or not isinstance(position[0], int) or position[0] < 0:
+            return jsonify({"error": "Invalid cursor"}), 400
+        offset = position[0]
+    elif cursor:
+        position = decode_cursor(cursor)
+        if position is None:
+            return jsonify({"error": "Invalid cursor"}), 400
+        # Keyset on (created_at, id), like the moderation queue
+        page = f'WHERE sort_key {after} ? OR (sort_key = ? AND id {after} ?)'
+        page_args = [position[0], position[0], position[1]]
+
+    conn = get_db()
+    columns = ', '.join(f'c.{column}' for column in COMMUNITY_COLUMN_NAMES)
+    result = conn.execute(
+        f'SELECT * FROM (SELECT {columns}, {sort_key} AS sort_key FROM {source} WHERE {where}) {page} ORDER BY {order} LIMIT ? OFFSET ?',
+        args + page_args + [limit + 1, offset]
+    )
+    items = map_rows(result, COMMUNITY_FIELDS)
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        if after is None:
+            next_cursor = encode_cursor(offset + limit)
+        else:
+            last = result.rows[limit - 1]
+            next_cursor = encode_cursor(last[len(COMMUNITY_COLUMN_NAMES)], items[-1]['id'])
+    body = {"items": items, "nextCursor": next_cursor}
+    if not cursor:
+        body["total"] = conn.execute(f'SELECT COUNT(*) FROM {source} WHERE {where}', args).rows[0][0]
+    return jsonify(body)
+
+@bp.route('/community/pending', methods=['GET'])
+@token_required
+def get_pending_community_items():
+    """Oldest-first page of the moderation queue.
+
+    ?limit= (default 50, max 200) and ?cursor= (the previous page's
+    nextCursor). nextCursor is null on the last page. Only the first page
+    has a total.
+    """
+    try:
+        limit = min(max(int(request.args.get('limit', PENDING_PAGE_SIZE)), 1), MAX_PENDING_PAGE_SIZE)
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+
+    where = 'approved = 0'
+    args = []
+    cursor = request.args.get('cursor')
+    if cursor:
+        position = decode_cursor(cursor)
+        if position is None:
+            return jsonify({"error": "Invalid cursor"}), 400
+        # Keyset on (created_at, id) so pages stay stable while items are approved/rejected
+        where += ' AND (created_at > ? OR (created_at = ? AND id > ?))'
+        args = [position[0], position[0], position[1]]
+
+    conn = get_db()
+    result = conn.execute(
+        f'SELECT {COMMUNITY_COLUMNS} FROM community_item WHERE {where} ORDER BY created_at, id LIMIT ?',
+        args + [limit + 1]
+    )
+    items = map_rows(result, COMMUNITY_FIELDS)
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(items[-1]['createdAt'], items[-1]['id'])
+    body = {"items": items, "nextCursor": next_cursor}
+    if not cursor:
+        body["total"] = conn.execute('SELECT COUNT(*) FROM community_item WHERE approved = 0').rows[0][0]
+    return jsonify(body)
+
+@bp.route('/community/random', methods=['GET'])
+@read_only
+@rate_limit('random-community', per_minute=120, burst=30)
+def get_random_community_item():
+    """One random approved community item, or ?n= distinct ones as a list"""
+    conn = get_db()
+    n = random_count()
+    rows = sample_rows(conn, 'community_item', COMMUNITY_COLUMNS, n or 1, where='approved = 1')
+    map_row = compile_row_mapper(('rowid',) + COMMUNITY_COLUMN_NAMES, COMMUNITY_FIELDS)
+    if n is not None:
+        return jsonify([map_row(row) for row in rows])
+    return jsonify(map_row(rows[0]) if rows else None)
@@ -0,0 +1,113 @@
+"""Filling in item fields from a free-text description (and optional photo)
+with Claude."""
+import os
+from functools import lru_cache
+
+from flask import Blueprint, jsonify, request
+
+from auth import current_user, token_required
+from db import get_db
+from ratelimit import rate_limit
+
+bp = Blueprint('extraction', __name__)
+
+@lru_cache(maxsize=1)
+def anthropic_client(api_key):
+    """One Anthropic client per process, built on first use: the SDK is a
+    slow import and each client sets up its own HTTP connection pool"""
+    import anthropic
+    return anthropic.Anthropic(api_key=api_key)
+
+@bp.route('/extract-item', methods=['POST'])
+@token_required
+@rate_limit('extract-item', per_minute=10, burst=5, key='user', user=current_user, max_concurrent=2)
+def extract_item():
+    """Use Anthropic Claude to extract item fields from natural language description"""
+    import json as json_lib
+
+    # Check if API key is configured
+    anthropic_key = os.getenv('ANTHROPIC_API_KEY')
+    if not anthropic_key:
+        return jsonify({"error": "ANTHROPIC_API_KEY not configured"}), 503
+
+    data = request.json
+    description = data.get('description', '')
+    image_base64 = data.get('image')  # Optional base64 image
+    image_media_type = data.get('imageMediaType', 'image/jpeg')  # e.g., image/jpeg, image/png
+
+    if not description and not image_base64:
+        return jsonify({"error": "Description or image required"}), 400
+
+    try:
+        client = anthropic_client(anthropic_key)
+
+        # Get available materials for context
+        conn = get_db()
+        materials_result = conn.execute('SELECT name FROM materials ORDER BY name ASC')
+        available_materials = [row[0] for row in materials_result.rows]
+
+        # Build the extraction prompt
+        system_prompt = """You are a helpful assistant that extracts structured data from item descriptions for a personal inventory catalog.
+
+Extract the following fields from the user's description:
+- itemName: A concise name for the item with only the first letter capitalized (e.g., "Blue cotton t-shirt", "Grandmother's quilt")
+- description: Preserve the user's words almost verbatim. Keep the personal stories, memories, tangents, opinions, and context almost exactly as spoken. Only remove information that's redundant because it's captured in other fields (like store name or material percentages if stated plainly). Do NOT smooth, formalize, or rewrite. Stream of consciousness is fine. The goal is to sound like the person, not like a product description.
+- category: One of: clothing, jewelry, sentimental, bedding, other
+- subcategory: For clothing only - one of: undershirt, shirt, sweater, jacket, dress, pants, shorts, skirt, shoes, socks, underwear, accessories, other
+- origin: Where the item was purchased/obtained (store name, website, "gift from mom", etc.)
+- materials: Array of {material: string, percentage: number} for clothing/bedding items. Use these known materials when applicable: """ + ', '.join(available_materials) + """
+- secondhand: "new", "secondhand", "handmade", or "unknown"
+- gifted: "yes" if it was a gift, "no" otherwise
+
+Return ONLY a valid JSON object with these fields. Use null for fields you cannot determine.
+
+Example input descriptions and the tone to preserve:
+- "My younger brother got me this pair last month because I had been unemployed for nearly a year post PhD and needed some kind of equipment for exercising, but had/still have barely any money. Hope this bartender job pays enough to buy some things. I find them to be very comfortable."
+- "My mom got these for me once when we weren't talking, back during Covid era. I remember being so mad at her for not respecting my pronouns or whatever, but she attempted to respect me by buying me a set of women's pajamas. I remember getting rid of the matching top but keeping these. They had little stars printed on them once upon a time. I wear these in the evening sometimes or under pants as thermals."
+- "got this with an ex at the army surplus store on a drive down the coast in California. pretty sure we were on our way back from the Monterey Bay aquarium. Probably my worst ex, bless his heart. We ended up being so toxic. I could go on and on. The store was fun, there was lots of gimmicky stuff in there, and I bought a camo cami there too. It was big and off the highway on the coast. Fun experience."
+
+These examples show the personal, stream-of-consciousness style that should be preserved in the description field."""
+
+        # Build messages with optional image
+        content = []
+        if image_base64:
+            content.append({
+                "type": "image",
+                "source": {
+                    "type": "base64",
+                    "media_type": image_media_type,
+                    "data": image_base64
+                }
+            })
+        if description:
+            content.append({
+                "type": "text",
+                "text": f"Extract inventory item data from this description:\n\n{description}"
+            })
+
+        message = client.messages.create(
+            model="claude-sonnet-4-20250514",
+            max_tokens=1024,
+            system=system_prompt,
+            messages=[
+                {"role": "user", "content": content}
+            ]
+        )
+
+        # Parse the response
+        response_text = message.content[0].text
+
+        # Try to extract JSON from the response (handle markdown code blocks)
+        if "```json" in response_text:
+            response_text = response_text.split("```json")[1].split("```")[0]
+        elif "```" in response_text:
+            response_text = response_text.split("```")[1].split("```")[0]
+
+        extracted_data = json_lib.loads(response_text.strip())
+
+        return jsonify(extracted_data)
+
+    except json_lib.JSONDecodeError as e:
+        return jsonify({"error": f"Failed to parse extraction result: {str(e)}"}), 500
+    except Exception as e:
+        return jsonify({"error": f"Extraction failed: {str(e)}"}), 500
@@ -0,0 +1,542 @@
+"""Item routes: the catalog list, item detail, similar items, create,
+edit and delete."""
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from functools import lru_cache
+
+from flask import Blueprint, jsonify, request
+from werkzeug.http import generate_etag
+
+from auth import admin_required, current_user, token_required, viewer_role
+from blueprints.layout import invalidate_cloud_layout
+from blueprints.photos import release_photos, upload_image
+from cache import cached_json, data_version, public_request
+from db import get_db, read_only
+from ratelimit import rate_limit
+from records import (
+    ITEM_COLUMNS, ITEM_PRIVATE, chunked, compile_row_mapper, get_item_photos,
+    item_projection, map_rows, random_count, row_to_dict, sample_rows, visible_photos_sql,
+)
+from uploads import UploadPipeline, stream_multipart
+
+bp = Blueprint('items', __name__)
+
+@bp.route('/', methods=['POST'])
+@token_required
+@rate_limit('add-item', per_minute=60, key='user', user=current_user, max_concurrent=4)
+def add_item():
+    import json as json_lib
+    conn = get_db()
+
+    # Photos are stored as they finish arriving, while the rest of the body
+    # is still being read (see uploads.py). The form sends its text fields
+    # first, so the item id is known by the time the first photo lands.
+    photo_uploads = {'photos': [], 'photo': []}
+    seen_hashes = []
+    role = viewer_role()  # The pipeline thread has no request context
+
+    def on_file(name, file, fields):
+        uploads = photo_uploads.get(name)
+        if uploads is None:
+            return
+        future = None
+        # 'photo' is the single-photo fallback for older clients
+        wanted = name == 'photos' or not photo_uploads['photos']
+        if wanted and file.filename and sum(f is not None for _, f in uploads) < 5:
+            future = pipeline.submit(upload_image, conn, file, 'item', fields.get('id'), seen_hashes, role)
+        uploads.append((file.filename, future))
+
+    with UploadPipeline() as pipeline:
+        form = stream_multipart(request, on_file)
+
+    # Get form fields
+    item_id = form.get('id')
+    item_name = form.get('itemName')
+    description = form.get('description')
+    category = form.get('category')
+    origin = form.get('origin')
+    created_at = form.get('createdAt')
+    if not created_at:
+        created_at = datetime.utcnow().isoformat()
+    subcategory = form.get('subcategory')
+    secondhand = form.get('secondhand')
+    gifted = form.get('gifted')
+    private = form.get('private')
+    materials = form.get('materials')  # JSON string
+    private_photos = form.get('privatePhotos')
+    private_description = form.get('privateDescription')
+    private_origin = form.get('privateOrigin')
+    main_photo_index = int(form.get('mainPhotoIndex', 0))
+
+    photos = photo_uploads['photos']
+    # Fallback to single photo for backwards compatibility
+    if not any(future for _, future in photos):
+        photos = photo_uploads['photo'][:1]
+
+    uploaded_photos = []
+    skipped_duplicates = []
+    main_photo_url = None
+
+    for idx, (filename, future) in enumerate(photos):
+        if future is not None:
+            photo_url, duplicate_of = future.result()
+            if photo_url is None:
+                skipped_duplicates.append({"filename": filename, "duplicateOf": duplicate_of})
+                continue
+
+            # Determine position - main photo goes to position 0
+            if idx == main_photo_index:
+                position = 0
+                main_photo_url = photo_url
+            elif idx < main_photo_index:
+                position = idx + 1
+            else:
+                position = idx
+
+            uploaded_photos.append({
+                "url": photo_url,
+                "position": position
+            })
+
+    uploaded_photos.sort(key=lambda x: x['position'])
+    for i, photo in enumerate(uploaded_photos):
+        photo['position'] = i
+
+    # If no main photo was set, use the first one
+    if not main_photo_url and uploaded_photos:
+        main_photo_url = uploaded_photos[0]['url']
+
+    # Fallback to existing URL if provided
+    if main_photo_url is None:
+        existing_url = form.get('mainPhoto')
+        if existing_url:
+            main_photo_url = existing_url
+
+    # Save item to database
+    conn.execute(
+        'INSERT INTO item (id, item_name, description, category, origin, main_photo, created_at, subcategory, secondhand, gifted, private, materials, private_photos, private_description, private_origin) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        [item_id, item_name, description, category, origin, main_photo_url, created_at, subcategory, secondhand, gifted, private, materials, private_photos, private_description, private_origin]
+    )
+
+    # Save photos to item_photos table
+    for photo in uploaded_photos:
+        photo_id = str(uuid.uuid4())
+        conn.execute('''
+            INSERT INTO item_photos (id, item_id, url, position, created_at)
+            VALUES (?, ?, ?, ?, ?)
+        ''', [photo_id, item_id, photo['url'], photo['position'], created_at])
+
+    invalidate_cloud_layout()
+
+    # Return the created item with photos
+    result = conn.execute(f'SELECT {ITEM_COLUMNS} FROM item WHERE id=?', [item_id])
+    row = result.rows[0]
+    item = row_to_dict(row)
+    item['photos'] = get_item_photos(conn, item_id)
+    if skipped_duplicates:
+        item['skippedDuplicates'] = skipped_duplicates
+    return jsonify(item), 201
+
+
+
+# JSON key -> column for the fields PUT and PATCH /item/<id> write
+EDITABLE_ITEM_FIELDS = (
+    ('itemName', 'item_name'),
+    ('description', 'description'),
+    ('category', 'category'),
+    ('origin', 'origin'),
+    ('subcategory', 'subcategory'),
+    ('secondhand', 'secondhand'),
+    ('gifted', 'gifted'),
+    ('private', 'private'),
+    ('materials', 'materials'),
+    ('privatePhotos', 'private_photos'),
+    ('privateDescription', 'private_description'),
+    ('privateOrigin', 'private_origin'),
+)
+
+def expected_version(data=None):
+    """The item version an edit is based on, as (version, error response).
+
+    Taken from If-Match - either "<version>" or the "<version>-<hash>" ETag
+    of GET /item/<id> - or else a "version" field in the body. (None, None)
+    means the client didn't ask for a conditional write.
+    """
+    raw = None
+    if request.if_match and not request.if_match.star_tag:
+        tags = request.if_match.as_set(include_weak=True)
+        raw = next(iter(tags)).split('-', 1)[0] if tags else None
+    elif data and data.get('version') is not None:
+        raw = data.get('version')
+    if raw is None:
+        return None, None
+    try:
+        return int(raw), None
+    except (TypeError, ValueError):
+        return None, (jsonify({"error": "If-Match must be an item version"}), 400)
+
+def write_item_fields(conn, item_id, values, expected=None):
+    """Write {column: value} to an item in one UPDATE ... RETURNING round trip.
+
+    last_edited and version only move if a value actually changes. With
+    expected set, the row is only written while it's still at that
+    version. Returns (item, None) or (None, error response): 404 if the
+    item is gone, 409 with currentVersion if someone else saved first.
+    """
+    columns = list(values)
+    args = list(values.values())
+    changed = ' OR '.join(f'{c} IS NOT ?' for c in columns)
+    guard = ' AND version = ?' if expected is not None else ''
+    result = conn.execute(f'''
+        UPDATE item SET
+            last_edited = CASE WHEN {changed} THEN ? ELSE last_edited END,
+            version = version + CASE WHEN {changed} THEN 1 ELSE 0 END,
+            {', '.join(f'{c} = ?' for c in columns)}
+        WHERE id = ?{guard}
+        RETURNING {ITEM_COLUMNS}
+    ''', args + [datetime.utcnow().isoformat()] + args + args + [item_id] + ([expected] if guard else []))
+    if result.rows:
+        return map_rows(result)[0], None
+
+    current = conn.execute('SELECT version FROM item WHERE id = ?', [item_id])
+    if not current.rows:
+        return None, (jsonify({"error": "Item not found"}), 404)
+    return None, (jsonify({"error": "Item was changed by someone else", "currentVersion": current.rows[0][0]}), 409)
+
+@bp.route('/item/<item_id>', methods=['PUT'])
+@admin_required
+def update_item(item_id):
+    """Replace an item's editable fields.
+
+    Send If-Match: "<version>" to only save if nobody else has since;
+    otherwise 409. The response's ETag is the new version.
+    """
+    import json as json_lib
+    data = request.json
+    conn = get_db()
+
+    expected, error = expected_version(data)
+    if error:
+        return error
+
+    # Convert materials to JSON string for comparison and storage
+    new_materials = data.get('materials')
+    values = {column: data.get(key) for key, column in EDITABLE_ITEM_FIELDS}
+    values['materials'] = json_lib.dumps(new_materials) if new_materials else None
+
+    item, error = write_item_fields(conn, item_id, values, expected)
+    if error:
+        return error
+    invalidate_cloud_layout()
+
+    response = jsonify(item)
+    response.set_etag(str(item['version']))
+    return response
+
+ITEM_TEXT_LIMITS = {
+    'itemName': 200,
+    'description': 10000,
+    'category': 100,
+    'subcategory': 100,
+    'origin': 500,
+}
+ITEM_FLAGS = ('gifted', 'private', 'privatePhotos', 'privateDescription', 'privateOrigin')
+SECONDHAND_VALUES = ('', 'new', 'secondhand', 'handmade', 'unknown')
+LAYOUT_COLUMNS = ('category', 'subcategory')  # What CloudView clusters items by
+
+def validate_item_patch(data):
+    """Check a PATCH body and turn it into {column: stored value}.
+
+    Returns (values, error message). Flags may be booleans or 'true'/'false'
+    and are stored as the strings, like the rest of the app writes them.
+    """
+    import json as json_lib
+    if not isinstance(data, dict):
+        return None, 'Expected a JSON object'
+    columns = dict(EDITABLE_ITEM_FIELDS)
+    unknown = sorted(set(data) - set(columns) - {'version'})
+    if unknown:
+        return None, f'Unknown or read-only fields: {", ".join(unknown)}'
+
+    values = {}
+    for key, value in data.items():
+        if key == 'version':
+            continue
+        if key in ITEM_TEXT_LIMITS:
+            if value is not None and not isinstance(value, str):
+                return None, f'{key} must be a string'
+            if value and len(value) > ITEM_TEXT_LIMITS[key]:
+                return None, f'{key} must be at most {ITEM_TEXT_LIMITS[key]} characters'
+            if key == 'itemName' and not (value or '').strip():
+                return None, 'itemName cannot be empty'
+        elif key in ITEM_FLAGS:
+            if isinstance(value, bool):
+                value = 'true' if value else 'false'
+            elif value not in ('true', 'false', None):
+                return None, f'{key} must be true or false'
+        elif key == 'secondhand':
+            if value not in SECONDHAND_VALUES and value is not None:
+                return None, f'secondhand must be one of {", ".join(v for v in SECONDHAND_VALUES if v)}'
+        elif key == 'materials':
+            if value is not None and not (
+                    isinstance(value, list) and
+                    all(isinstance(m, dict) and isinstance(m.get('material'), str) for m in value)):
+                return None, 'materials must be a list of {material, percentage}'
+            value = json_lib.dumps(value) if value else None
+        values[columns[key]] = value
+    if not values:
+        return None, 'No editable fields given'
+    return values, None
+
+@bp.route('/item/<item_id>', methods=['PATCH'])
+@admin_required
+def patch_item(item_id):
+    """Update only the fields sent, in one UPDATE with no read first.
+
+    If-Match works the same as for PUT. A PATCH that changes nothing
+    leaves last_edited and version alone.
+    """
+    values, message = validate_item_patch(request.get_json(silent=True))
+    if message:
+        return jsonify({"error": message}), 400
+    expected, error = expected_version(request.json)
+    if error:
+        return error
+
+    item, error = write_item_fields(get_db(), item_id, values, expected)
+    if error:
+        return error
+    if any(c in values for c in LAYOUT_COLUMNS):
+        invalidate_cloud_layout()
+
+    response = jsonify(item)
+    response.set_etag(str(item['version']))
+    return response
+
+@bp.route('/item/<item_id>', methods=['DELETE'])
+@admin_required
+def delete_item(item_id):
+    conn = get_db()
+    photos, item = conn.batch([
+        ('DELETE FROM item_photos WHERE item_id = ? RETURNING url', [item_id]),
+        ('DELETE FROM item WHERE id = ? RETURNING main_photo', [item_id]),
+    ])
+    release_photos(conn, [row[0] for row in photos.rows] + [row[0] for row in item.rows])
+    invalidate_cloud_layout()
+    return jsonify({"message": "Item deleted"})
+
+@bp.route('/item/<item_id>/pin', methods=['PUT'])
+@admin_required
+def pin_item(item_id):
+    """Set pinned position for an item in cloud view"""
+    data = request.json
+    pinned_x = data.get('pinnedX')
+    pinned_y = data.get('pinnedY')
+
+    if pinned_x is None or pinned_y is None:
+        return jsonify({"error": "pinnedX and pinnedY are required"}), 400
+
+    conn = get_db()
+    conn.execute('UPDATE item SET pinned_x=?, pinned_y=? WHERE id=?', [pinned_x, pinned_y, item_id])
+    return jsonify({"message": "Item pinned", "pinnedX": pinned_x, "pinnedY": pinned_y})
+
+@bp.route('/item/<item_id>/pin', methods=['DELETE'])
+@admin_required
+def unpin_item(item_id):
+    """Clear pinned position for an item"""
+    conn = get_db()
+    conn.execute('UPDATE item SET pinned_x=NULL, pinned_y=NULL WHERE id=?', [item_id])
+    return jsonify({"message": "Item unpinned"})
+
+# One round trip for the detail page: the item row plus its photos and
+# materials as JSON arrays, and its category/subcategory rows joined in
+@lru_cache(maxsize=None)
+def item_detail_sql(role):
+    materials = 'item.materials' if role == 'admin' else f"CASE WHEN item.{ITEM_PRIVATE} THEN NULL ELSE item.materials END"
+    return f'''
+        SELECT {item_projection(role, 'item.')[1]},
+            (SELECT json_group_array(json_object('id', p.id, 'url', p.url, 'position', p.position, 'createdAt', p.created_at))
+               FROM (SELECT * FROM ({visible_photos_sql(role)}) WHERE item_id = item.id ORDER BY position) p) AS photos_json,
+            (SELECT json_group_array(json_object('id', mat.id, 'material', json_extract(m.value, '$.material'),
+                                                 'percentage', json_extract(m.value, '$.percentage')))
+               FROM json_each(CASE WHEN json_valid({materials}) THEN {materials} ELSE '[]' END) m
+               LEFT JOIN materials mat ON mat.name = json_extract(m.value, '$.material')) AS materials_json,
+            c.id AS category_id, c.display_name AS category_display_name,
+            c.grid_col, c.grid_row, c.box_width, c.box_height,
+            s.id AS subcategory_id, s.display_name AS subcategory_display_name
+        FROM item
+        LEFT JOIN categories c ON c.name = item.category
+        LEFT JOIN subcategories s ON s.name = item.subcategory AND s.category = item.category
+        WHERE item.id = ?
+    '''
+
+@bp.route('/item/<item_id>', methods=['GET'])
+@read_only
+def get_item(item_id):
+    """Everything the detail page shows for one item, from one query.
+
+    Served with an ETag of the body, so a revisit with If-None-Match gets
+    a 304 instead of the JSON. Private fields are projected away per
+    viewer_role().
+    """
+    conn = get_db()
+    role = viewer_role()
+    fields, columns = item_projection(role)
+    try:
+        result = conn.execute(item_detail_sql(role), [item_id])
+    except Exception:
+        # Lookup tables not migrated yet: same shape, without the metadata
+        result = None
+    if result is None:
+        found = conn.execute(f'SELECT {columns} FROM item WHERE id = ?', [item_id])
+        if not found.rows:
+            return jsonify({"error": "Item not found"}), 404
+        item = map_rows(found, fields)[0]
+        item.update(photos=get_item_photos(conn, item_id, role), categoryInfo=None, subcategoryInfo=None)
+    else:
+        if not result.rows:
+            return jsonify({"error": "Item not found"}), 404
+        row = result.rows[0]
+        detail = dict(zip(result.columns, row))
+        item = map_rows(result, fields)[0]
+        item['photos'] = json.loads(detail['photos_json'])
+        item['materials'] = json.loads(detail['materials_json']) or item['materials']
+        item['categoryInfo'] = {
+            "id": detail['category_id'],
+            "name": item['category'],
+            "displayName": detail['category_display_name'],
+            "gridCol": detail['grid_col'],
+            "gridRow": detail['grid_row'],
+            "boxWidth": detail['box_width'],
+            "boxHeight": detail['box_height'],
+        } if detail['category_id'] else None
+        item['subcategoryInfo'] = {
+            "id": detail['subcategory_id'],
+            "name": item['subcategory'],
+            "displayName": detail['subcategory_display_name'],
+            "category": item['category'],
+        } if detail['subcategory_id'] else None
+
+    response = jsonify(item)
+    # "<version>-<body hash>": revalidates like a body hash, and works as If-Match for PUT
+    response.set_etag(f"{item.get('version')}-{generate_etag(response.get_data())[:16]}")
+    response.cache_control.no_cache = True  # Always revalidate; the 304 is the saving
+    response.vary.add('Authorization')
+    return response.make_conditional(request)
+
+def shuffle_key(seed, item_id):
+    """32-bit FNV-1a of "seed:id". Sorting by it gives a shuffle that is the
+    same for the same seed, and adding an item doesn't reorder the rest.
+    useItemFilters in the frontend computes the same hash."""
+    h = 0x811c9dc5
+    for byte in f'{seed}:{item_id}'.encode('utf-8'):
+        h = ((h ^ byte) * 0x01000193) & 0xffffffff
+    return h
+
+def load_items(role):
+    fields, columns = item_projection(role)
+    return map_rows(get_db().execute(f'SELECT {columns} FROM item'), fields)
+
+@bp.route('/', methods=['GET'])
+@read_only
+def list_return():
+    # ?order=random&seed=N returns a reproducible shuffle
+    shuffle = request.args.get('order') == 'random'
+    if not shuffle and public_request():
+        response = cached_json('items', lambda: load_items('public'))
+    else:
+        items = load_items(viewer_role())
+        if shuffle:
+            seed = request.args.get('seed', '0')
+            items.sort(key=lambda item: shuffle_key(seed, item['id']))
+        response = jsonify(items)
+    response.vary.add('Authorization')  # Projection depends on the viewer's role
+    return response
+
+@bp.route('/random', methods=['GET'])
+@read_only
+@rate_limit('random-item', per_minute=120, burst=30)
+def get_random_item():
+    """One random item, or ?n= distinct random items as a list"""
+    conn = get_db()
+    n = random_count()
+    fields, columns = item_projection(viewer_role())
+    rows = sample_rows(conn, 'item', columns, n or 1)
+    map_row = compile_row_mapper(('rowid',) + tuple(c for c, _ in fields), fields)
+    if n is not None:
+        return jsonify([map_row(row) for row in rows])
+    return jsonify(map_row(rows[0]) if rows else None)
+
+# Items like this (see similar.py), one index per worker. It's built from
+# what the public sees of each item, so private text never shapes anyone's
+# results. Every SIMILAR_RECHECK seconds data_meta's items version is
+# checked; when it has moved, only items whose version changed are
+# re-vectorized, until enough has changed for a full rebuild.
+SIMILAR_RECHECK = float(os.getenv('SIMILAR_RECHECK', 2))
+SIMILAR_COUNT = 8
+MAX_SIMILAR_COUNT = 50
+_similar = {"index": None, "version": None, "checked": 0.0}
+_similar_lock = threading.Lock()
+
+def load_similar_items(conn, ids=None):
+    """Items as the public sees them: all, or just ids"""
+    fields, columns = item_projection('public')
+    if ids is None:
+        return map_rows(conn.execute(f'SELECT {columns} FROM item'), fields)
+    items = []
+    for chunk in chunked(ids):
+        result = conn.execute(f'SELECT {columns} FROM item WHERE id IN ({", ".join("?" * len(chunk))})', chunk)
+        items += map_rows(result, fields)
+    return items
+
+def get_similar_index(conn):
+    # NumPy is only imported once someone asks for similar items
+    from similar import SimilarityIndex
+    with _similar_lock:
+        index = _similar["index"]
+        if index is not None and time.monotonic() - _similar["checked"] <= SIMILAR_RECHECK:
+            return index
+        version = data_version('items')
+        if index is not None and (version is None or version != _similar["version"]):
+            current = {row[0]: row[1] for row in conn.execute('SELECT id, version FROM item').rows}
+            index.remove([item_id for item_id in index.versions if item_id not in current])
+            changed = [item_id for item_id, v in current.items() if index.versions.get(item_id) != v]
+            if changed:
+                index.upsert(load_similar_items(conn, changed))
+        if index is None or index.stale():
+            index = SimilarityIndex(load_similar_items(conn))
+        _similar.update(index=index, version=version, checked=time.monotonic())
+        return index
+
+@bp.route('/item/<item_id>/similar', methods=['GET'])
+@read_only
+def get_similar_items(item_id):
+    """Up to ?k= (default 8, max 50) items most like this one, best first,
+    each with its cosine "similarity" """
+    try:
+        k = min(max(int(request.args.get('k', SIMILAR_COUNT)), 1), MAX_SIMILAR_COUNT)
+    except ValueError:
+        return jsonify({"error": "k must be an integer"}), 400
+
+    conn = get_db()
+    neighbours = get_similar_index(conn).neighbours(item_id, k)
+    if neighbours is None:
+        # Not indexed: unknown, or added since the last check
+        if not conn.execute('SELECT 1 FROM item WHERE id = ?', [item_id]).rows:
+            return jsonify({"error": "Item not found"}), 404
+        neighbours = []
+    if not neighbours:
+        return jsonify([])
+
+    fields, columns = item_projection(viewer_role())
+    result = conn.execute(f'SELECT {columns} FROM item WHERE id IN ({", ".join("?" * len(neighbours))})',
+                          [neighbour_id for neighbour_id, _ in neighbours])
+    by_id = {item['id']: item for item in map_rows(result, fields)}
+    response = jsonify([dict(by_id[neighbour_id], similarity=round(score, 4))
+                        for neighbour_id, score in neighbours if neighbour_id in by_id])
+    response.vary.add('Authorization')  # Projection depends on the viewer's role
+    return response
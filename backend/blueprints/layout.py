@@ -0,0 +1,394 @@
+"""CloudView layout: the cached grid layout, category boxes, subcategory
+clusters and item positions."""
+import os
+import time
+import threading
+import uuid
+
+from flask import Blueprint, jsonify, request
+
+from auth import admin_required
+from db import get_db, read_only
+from layout import CloudLayout
+
+bp = Blueprint('layout', __name__)
+
+@bp.route('/categories/<category_id>/box', methods=['PUT'])
+@admin_required
+def update_category_box(category_id):
+    """Update category box position and size for CloudView grid layout"""
+    data = request.json
+    conn = get_db()
+
+    # Check category exists
+    existing = conn.execute('SELECT id, name FROM categories WHERE id = ?', [category_id])
+    if not existing.rows:
+        return jsonify({"error": "Category not found"}), 404
+
+    grid_col = data.get('gridCol')
+    grid_row = data.get('gridRow')
+    box_width = data.get('boxWidth')
+    box_height = data.get('boxHeight')
+
+    conn.execute('''
+        UPDATE categories SET grid_col=?, grid_row=?, box_width=?, box_height=?
+        WHERE id=?
+    ''', [grid_col, grid_row, box_width, box_height, category_id])
+    bump_layout_version(conn, lambda layout: layout.set_box(existing.rows[0][1], grid_col, grid_row, box_width, box_height))
+
+    return jsonify({
+        "message": "Category box updated",
+        "gridCol": grid_col,
+        "gridRow": grid_row,
+        "boxWidth": box_width,
+        "boxHeight": box_height
+    })
+
+
+@bp.route('/categories/name/<category_name>/box', methods=['PUT'])
+@admin_required
+def update_category_box_by_name(category_name):
+    """Update category box position and size by category name"""
+    data = request.json
+    conn = get_db()
+
+    # Check category exists
+    existing = conn.execute('SELECT id FROM categories WHERE name = ?', [category_name])
+    if not existing.rows:
+        return jsonify({"error": "Category not found"}), 404
+
+    grid_col = data.get('gridCol')
+    grid_row = data.get('gridRow')
+    box_width = data.get('boxWidth')
+    box_height = data.get('boxHeight')
+
+    conn.execute('''
+        UPDATE categories SET grid_col=?, grid_row=?, box_width=?, box_height=?
+        WHERE name=?
+    ''', [grid_col, grid_row, box_width, box_height, category_name])
+    bump_layout_version(conn, lambda layout: layout.set_box(category_name, grid_col, grid_row, box_width, box_height))
+
+    return jsonify({
+        "message": "Category box updated",
+        "gridCol": grid_col,
+        "gridRow": grid_row,
+        "boxWidth": box_width,
+        "boxHeight": box_height
+    })
+
+
+@bp.route('/item/<item_id>/position', methods=['PUT'])
+@admin_required
+def update_item_position(item_id):
+    """Update item position within its category box (localCol, localRow)"""
+    data = request.json
+    local_col = data.get('localCol')
+    local_row = data.get('localRow')
+
+    conn = get_db()
+
+    # Check item exists
+    existing = conn.execute('SELECT id FROM item WHERE id = ?', [item_id])
+    if not existing.rows:
+        return jsonify({"error": "Item not found"}), 404
+
+    conn.execute('UPDATE item SET local_col=?, local_row=? WHERE id=?', [local_col, local_row, item_id])
+    bump_layout_version(conn, lambda layout: layout.move_item(item_id, local_col, local_row))
+
+    return jsonify({
+        "message": "Item position updated",
+        "localCol": local_col,
+        "localRow": local_row
+    })
+
+
+@bp.route('/item/<item_id>/position', methods=['DELETE'])
+@admin_required
+def clear_item_position(item_id):
+    """Clear item position to return to auto-placement"""
+    conn = get_db()
+
+    # Check item exists
+    existing = conn.execute('SELECT id FROM item WHERE id = ?', [item_id])
+    if not existing.rows:
+        return jsonify({"error": "Item not found"}), 404
+
+    conn.execute('UPDATE item SET local_col=NULL, local_row=NULL WHERE id=?', [item_id])
+    bump_layout_version(conn, lambda layout: layout.move_item(item_id, None, None))
+
+    return jsonify({"message": "Item position cleared"})
+
+@bp.route('/categories/<category_name>/clusters', methods=['GET'])
+@read_only
+def get_category_clusters(category_name):
+    """Get all cluster positions for a category"""
+    conn = get_db()
+    try:
+        result = conn.execute(
+            'SELECT id, subcategory, local_col, local_row, width, height FROM subcategory_clusters WHERE category = ?',
+            [category_name]
+        )
+        clusters = {}
+        for row in result.rows:
+            clusters[row[1]] = {
+                "id": row[0],
+                "subcategory": row[1],
+                "localCol": row[2],
+                "localRow": row[3],
+                "width": row[4],
+                "height": row[5]
+            }
+        return jsonify(clusters)
+    except Exception:
+        # Table doesn't exist yet
+        return jsonify({})
+
+
+@bp.route('/clusters', methods=['GET'])
+@read_only
+def get_all_clusters():
+    """Get all cluster positions grouped by category"""
+    conn = get_db()
+    try:
+        result = conn.execute(
+            'SELECT id, category, subcategory, local_col, local_row, width, height FROM subcategory_clusters'
+        )
+        clusters = {}
+        for row in result.rows:
+            category = row[1]
+            subcategory = row[2]
+            if category not in clusters:
+                clusters[category] = {}
+            clusters[category][subcategory] = {
+                "id": row[0],
+                "subcategory": subcategory,
+                "localCol": row[3],
+                "localRow": row[4],
+                "width": row[5],
+                "height": row[6]
+            }
+        return jsonify(clusters)
+    except Exception:
+        # Table doesn't exist yet
+        return jsonify({})
+
+
+@bp.route('/categories/<category_name>/subcategories/<subcategory_name>/cluster', methods=['PUT'])
+@admin_required
+def update_cluster_position(category_name, subcategory_name):
+    """Update or create cluster position for a subcategory within a category"""
+    data = request.json
+    local_col = data.get('localCol', 0)
+    local_row = data.get('localRow', 1)
+    width = data.get('width', 2)
+    height = data.get('height', 2)
+
+    conn = get_db()
+
+    # Check if cluster exists
+    existing = conn.execute(
+        'SELECT id FROM subcategory_clusters WHERE category = ? AND subcategory = ?',
+        [category_name, subcategory_name]
+    )
+
+    if existing.rows:
+        # Update existing
+        conn.execute(
+            'UPDATE subcategory_clusters SET local_col = ?, local_row = ?, width = ?, height = ? WHERE category = ? AND subcategory = ?',
+            [local_col, local_row, width, height, category_name, subcategory_name]
+        )
+        bump_layout_version(conn, lambda layout: layout.set_cluster(category_name, subcategory_name, local_col, local_row, width, height))
+        return jsonify({"message": "Cluster position updated"})
+    else:
+        # Create new
+        cluster_id = str(uuid.uuid4())
+        conn.execute(
+            'INSERT INTO subcategory_clusters (id, category, subcategory, local_col, local_row, width, height) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            [cluster_id, category_name, subcategory_name, local_col, local_row, width, height]
+        )
+        bump_layout_version(conn, lambda layout: layout.set_cluster(category_name, subcategory_name, local_col, local_row, width, height))
+        return jsonify({"message": "Cluster position created", "id": cluster_id}), 201
+
+
+@bp.route('/categories/<category_name>/subcategories/<subcategory_name>/cluster', methods=['DELETE'])
+@admin_required
+def delete_cluster_position(category_name, subcategory_name):
+    """Delete cluster position (resets to auto-calculated position)"""
+    conn = get_db()
+    conn.execute(
+        'DELETE FROM subcategory_clusters WHERE category = ? AND subcategory = ?',
+        [category_name, subcategory_name]
+    )
+    bump_layout_version(conn, lambda layout: layout.remove_cluster(category_name, subcategory_name))
+    return jsonify({"message": "Cluster position deleted"})
+
+
+# Server-side CloudView layout, cached per worker
+CLOUD_LAYOUT_TTL = float(os.getenv('CLOUD_LAYOUT_TTL', 60))
+_cloud_layout = {"layout": None, "built_at": 0.0}
+_cloud_layout_lock = threading.Lock()
+
+def load_cloud_layout(conn):
+    """Build a CloudLayout from the item, categories and subcategory_clusters tables"""
+    result = conn.execute('SELECT id, category, subcategory, local_col, local_row FROM item')
+    items = [{"id": row[0], "category": row[1], "subcategory": row[2], "localCol": row[3], "localRow": row[4]}
+             for row in result.rows]
+    try:
+        result = conn.execute('SELECT name, display_name, grid_col, grid_row, box_width, box_height FROM categories ORDER BY display_name ASC')
+        categories = [{"name": row[0], "displayName": row[1], "gridCol": row[2], "gridRow": row[3],
+                       "boxWidth": row[4], "boxHeight": row[5]} for row in result.rows]
+    except Exception:
+        categories = []  # Table doesn't exist yet
+    clusters = {}
+    try:
+        result = conn.execute('SELECT category, subcategory, local_col, local_row, width, height FROM subcategory_clusters')
+        for row in result.rows:
+            clusters.setdefault(row[0], {})[row[1]] = {"localCol": row[2], "localRow": row[3], "width": row[4], "height": row[5]}
+    except Exception:
+        pass  # Table doesn't exist yet
+    return CloudLayout(items, categories, clusters)
+
+def get_layout_version(conn):
+    result = conn.execute('SELECT version FROM layout_meta WHERE id = 1')
+    return result.rows[0][0] if result.rows else 0
+
+def get_cloud_layout(conn):
+    """Cached layout, rebuilt when another worker bumped the layout version or the TTL ran out.
+
+    conn may read from a replica (see replica.py), which is only trusted to
+    say nothing changed: a replica that's behind would report an old
+    version and hand us old rows. Rebuilds check and read the primary.
+    """
+    version = get_layout_version(conn)
+    with _cloud_layout_lock:
+        layout = _cloud_layout["layout"]
+        expired = layout is None or time.monotonic() - _cloud_layout["built_at"] > CLOUD_LAYOUT_TTL
+        if expired or layout.version != version:
+            primary = getattr(conn, 'primary', conn)
+            version = get_layout_version(primary)
+            if expired or layout.version != version:
+                layout = load_cloud_layout(primary)
+                layout.version = version
+                _cloud_layout["layout"] = layout
+                _cloud_layout["built_at"] = time.monotonic()
+        return layout
+
+def update_cloud_layout(change, version):
+    """Apply an incremental change to the cached layout, if one is built.
+
+    The cache is only patched when it is exactly one version behind;
+    otherwise, or when change(layout) returns False, it is dropped and
+    rebuilt on the next read.
+    """
+    with _cloud_layout_lock:
+        layout = _cloud_layout["layout"]
+        if layout is None:
+            return
+        if version is not None and layout.version == version - 1 and change(layout) is not False:
+            layout.version = version
+        else:
+            _cloud_layout["layout"] = None
+
+def bump_layout_version(conn, change=None):
+    """Record a layout write and patch the cached layout with change"""
+    result = conn.execute('UPDATE layout_meta SET version = version + 1 WHERE id = 1 RETURNING version')
+    version = result.rows[0][0] if result.rows else None
+    update_cloud_layout(change or (lambda layout: False), version)
+    return version
+
+def invalidate_cloud_layout():
+    with _cloud_layout_lock:
+        _cloud_layout["layout"] = None
+
+
+@bp.route('/cloud-layout', methods=['GET'])
+@read_only
+def get_cloud_layout_route():
+    """Full CloudView layout: box, cluster and item grid positions"""
+    conn = get_db()
+    layout = get_cloud_layout(conn)
+    return jsonify(dict(layout.to_json(), version=layout.version))
+
+
+LAYOUT_VERSION_GUARD = '(SELECT version FROM layout_meta WHERE id = 1) = ?'
+
+@bp.route('/cloud-layout', methods=['PATCH'])
+@admin_required
+def batch_update_layout():
+    """Apply many item/box/cluster position changes in one transaction.
+
+    Expects {"version": n, "items": [{id, localCol, localRow}],
+    "boxes": [{name, gridCol, gridRow, boxWidth, boxHeight}],
+    "clusters": [{category, subcategory, localCol, localRow, width, height}]}.
+    Every statement is guarded on the layout version, so if someone else
+    changed the layout since version n nothing is written and we return 409.
+    """
+    data = request.json or {}
+    version = data.get('version')
+    items = data.get('items') or []
+    boxes = data.get('boxes') or []
+    clusters = data.get('clusters') or []
+
+    if not isinstance(version, int):
+        return jsonify({"error": "version is required"}), 400
+    if any(not item.get('id') for item in items):
+        return jsonify({"error": "Every item needs an id"}), 400
+    if any(not box.get('name') for box in boxes):
+        return jsonify({"error": "Every box needs a name"}), 400
+    if any(not c.get('category') or not c.get('subcategory') for c in clusters):
+        return jsonify({"error": "Every cluster needs a category and subcategory"}), 400
+
+    statements = []
+    for item in items:
+        statements.append((
+            f'UPDATE item SET local_col=?, local_row=? WHERE id=? AND {LAYOUT_VERSION_GUARD}',
+            [item.get('localCol'), item.get('localRow'), item['id'], version]
+        ))
+    for box in boxes:
+        statements.append((
+            f'UPDATE categories SET grid_col=?, grid_row=?, box_width=?, box_height=? WHERE name=? AND {LAYOUT_VERSION_GUARD}',
+            [box.get('gridCol'), box.get('gridRow'), box.get('boxWidth'), box.get('boxHeight'), box['name'], version]
+        ))
+    for cluster in clusters:
+        statements.append((
+            f'''INSERT INTO subcategory_clusters (id, category, subcategory, local_col, local_row, width, height)
+            SELECT ?, ?, ?, ?, ?, ?, ? WHERE {LAYOUT_VERSION_GUARD}
+            ON CONFLICT(category, subcategory) DO UPDATE SET
+                local_col=excluded.local_col, local_row=excluded.local_row,
+                width=excluded.width, height=excluded.height''',
+            [str(uuid.uuid4()), cluster['category'], cluster['subcategory'],
+             cluster.get('localCol', 0), cluster.get('localRow', 1), cluster.get('width', 2), cluster.get('height', 2), version]
+        ))
+    statements.append((
+        'UPDATE layout_meta SET version = version + 1 WHERE id = 1 AND version = ? RETURNING version',
+        [version]
+    ))
+
+    conn = get_db()
+    results = conn.batch(statements)
+
+    bumped = results[-1].rows
+    if not bumped:
+        return jsonify({"error": "Layout changed since it was loaded", "version": get_layout_version(conn)}), 409
+    new_version = bumped[0][0]
+
+    missing_items = [item['id'] for item, result in zip(items, results) if result.rows_affected == 0]
+    missing_boxes = [box['name'] for box, result in zip(boxes, results[len(items):]) if result.rows_affected == 0]
+
+    def apply(layout):
+        for item in items:
+            if layout.move_item(item['id'], item.get('localCol'), item.get('localRow')) is False:
+                return False
+        for box in boxes:
+            if box['name'] not in missing_boxes:
+                layout.set_box(box['name'], box.get('gridCol'), box.get('gridRow'), box.get('boxWidth'), box.get('boxHeight'))
+        for c in clusters:
+            layout.set_cluster(c['category'], c['subcategory'], c.get('localCol', 0), c.get('localRow', 1), c.get('width', 2), c.get('height', 2))
+    update_cloud_layout(apply, new_version)
+
+    return jsonify({
+        "message": "Layout updated",
+        "version": new_version,
+        "missingItems": missing_items,
+        "missingBoxes": missing_boxes
+    })
@@ -0,0 +1,465 @@
+"""One-off schema migrations and admin/debug endpoints."""
+import os
+import uuid
+from datetime import datetime
+
+from flask import Blueprint, jsonify
+
+from auth import admin_required, token_required
+from db import (COMMUNITY_ITEM_TABLE, COMMUNITY_PENDING_INDEX, create_data_version_triggers, get_db,
+                migrate_community_keys)
+from replica import get_replica
+from search import COMMUNITY_SEARCH
+
+bp = Blueprint('maintenance', __name__)
+
+@bp.route('/replica-status', methods=['GET'])
+@token_required
+def replica_status():
+    """Report whether reads are being served from the local replica"""
+    replica = get_replica()
+    if replica is None:
+        return jsonify({"enabled": False})
+    return jsonify(replica.status())
+
+@bp.route('/debug-env', methods=['GET'])
+@token_required
+def debug_env():
+    return jsonify({
+        "cloud_name": os.getenv('CLOUDINARY_CLOUD_NAME'),
+        "api_key": os.getenv('CLOUDINARY_API_KEY'),
+        "secret_length": len(os.getenv('CLOUDINARY_API_SECRET', '')),
+        "secret_first_3": os.getenv('CLOUDINARY_API_SECRET', '')[:3]
+    })
+
+@bp.route('/migrate-add-timestamp', methods=['POST'])
+@token_required
+def migrate_add_timestamp():
+    conn = get_db()
+    try:
+        conn.execute('ALTER TABLE item ADD COLUMN created_at TEXT')
+        return jsonify({"message": "Column added successfully"})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    
+@bp.route('/migrate-add-subcategory', methods=['POST'])
+@token_required
+def migrate_add_subcategory():
+    conn = get_db()
+    try:
+        conn.execute('ALTER TABLE item ADD COLUMN subcategory TEXT')
+        return jsonify({"message": "Subcategory column added successfully"})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@bp.route('/migrate-remove-new-purchase', methods=['POST'])
+@token_required
+def migrate_remove_new_purchase():
+    conn = get_db()
+    try:
+        # SQLite way: create new table, copy data, drop old, rename
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS item_new (
+                id TEXT PRIMARY KEY,
+                item_name TEXT,
+                description TEXT,
+                category TEXT,
+                origin TEXT,
+                main_photo TEXT,
+                created_at TEXT,
+                subcategory TEXT,
+                secondhand TEXT
+            )
+        ''')
+        conn.execute('''
+            INSERT INTO item_new (id, item_name, description, category, origin, main_photo, created_at, subcategory, secondhand)
+            SELECT id, item_name, description, category, origin, main_photo, created_at, subcategory, secondhand
+            FROM item
+        ''')
+        conn.execute('DROP TABLE item')
+        conn.execute('ALTER TABLE item_new RENAME TO item')
+        create_data_version_triggers(conn)  # Dropped with the old table
+        return jsonify({"message": "is_new_purchase column removed successfully"})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/migrate-add-community-items', methods=['POST'])
+@token_required
+def migrate_add_community_items():
+    conn = get_db()
+    try:
+        conn.execute(COMMUNITY_ITEM_TABLE)
+        migrate_community_keys(conn)
+        conn.execute(COMMUNITY_PENDING_INDEX)
+        COMMUNITY_SEARCH.create(conn)
+        return jsonify({"message": "community_item table created successfully"})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/migrate-community-fix', methods=['GET'])
+def migrate_community_fix():
+    conn = get_db()
+    try:
+        # Try to add missing columns if they don't exist
+        conn.execute('ALTER TABLE community_item ADD COLUMN subcategory TEXT')
+        conn.execute('ALTER TABLE community_item ADD COLUMN submitted_by TEXT')
+        return "Migration successful"
+    except Exception as e:
+        return f"Migration info: {str(e)}"
+    
+@bp.route('/migrate-community-final', methods=['GET'])
+def migrate_community_final():
+    conn = get_db()
+    try:
+        # Check and add subcategory
+        try:
+            conn.execute('ALTER TABLE community_item ADD COLUMN subcategory TEXT')
+        except Exception:
+            pass # Already exists
+        
+        # Check and add submitted_by
+        try:
+            conn.execute('ALTER TABLE community_item ADD COLUMN submitted_by TEXT')
+        except Exception:
+            pass # Already exists
+            
+        return jsonify({"message": "Community table migration successful"}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/fix-community-db', methods=['GET'])
+@admin_required
+def fix_community_db():
+    conn = get_db()
+    try:
+        # 1. Ensure the table exists
+        conn.execute(COMMUNITY_ITEM_TABLE)
+        
+        # 2. Safety check: Try to add columns if they were missed previously
+        try:
+            conn.execute('ALTER TABLE community_item ADD COLUMN subcategory TEXT')
+        except: pass
+        
+        try:
+            conn.execute('ALTER TABLE community_item ADD COLUMN submitted_by TEXT')
+        except: pass
+
+        migrate_community_keys(conn)
+        conn.execute(COMMUNITY_PENDING_INDEX)
+        # A GET must stay cheap: POST /migrate-community-search rebuilds the index
+        COMMUNITY_SEARCH.create(conn, rebuild=False)
+        return "Community table is ready! You can now close this tab and try submitting."
+    except Exception as e:
+        return f"Error: {str(e)}"
+    
+@bp.route('/migrate-community-search', methods=['POST'])
+@token_required
+def migrate_community_search():
+    """Create the community search index if needed and rebuild it from community_item"""
+    conn = get_db()
+    try:
+        COMMUNITY_SEARCH.create(conn)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    # One docsize row per indexed item; the FTS table itself would count community_item
+    count = conn.execute(f'SELECT COUNT(*) FROM {COMMUNITY_SEARCH.name}_docsize').rows[0][0]
+    return jsonify({"message": "Community search index rebuilt", "indexed": count})
+
+@bp.route('/migrate-add-secondhand', methods=['POST'])
+@token_required
+def migrate_add_secondhand():
+    conn = get_db()
+    try:
+        conn.execute('ALTER TABLE item ADD COLUMN secondhand TEXT')
+        return jsonify({"message": "secondhand column added successfully"})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/migrate-add-photos-table', methods=['POST'])
+@token_required
+def migrate_add_photos_table():
+    conn = get_db()
+    try:
+        # Create item_photos table
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS item_photos (
+                id TEXT PRIMARY KEY,
+                item_id TEXT NOT NULL,
+                url TEXT NOT NULL,
+                position INTEGER DEFAULT 0,
+                created_at TEXT,
+                FOREIGN KEY (item_id) REFERENCES item(id) ON DELETE CASCADE
+            )
+        ''')
+        return jsonify({"message": "item_photos table created successfully"})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/migrate-existing-photos', methods=['POST'])
+@token_required
+def migrate_existing_photos():
+    conn = get_db()
+    try:
+        # Get all items with mainPhoto
+        result = conn.execute('SELECT id, main_photo FROM item WHERE main_photo IS NOT NULL AND main_photo != ""')
+        migrated = 0
+        for row in result.rows:
+            item_id = row[0]
+            photo_url = row[1]
+            # Check if already migrated
+            existing = conn.execute('SELECT id FROM item_photos WHERE item_id = ? AND position = 0', [item_id])
+            if not existing.rows:
+                photo_id = str(uuid.uuid4())
+                conn.execute('''
+                    INSERT INTO item_photos (id, item_id, url, position, created_at)
+                    VALUES (?, ?, ?, 0, ?)
+                ''', [photo_id, item_id, photo_url, datetime.utcnow().isoformat()])
+                migrated += 1
+        return jsonify({"message": f"Migrated {migrated} photos successfully"})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/migrate-add-last-edited-and-gifted', methods=['POST'])
+@token_required
+def migrate_add_last_edited_and_gifted():
+    conn = get_db()
+    errors = []
+    try:
+        conn.execute('ALTER TABLE item ADD COLUMN last_edited TEXT')
+    except Exception as e:
+        errors.append(f"last_edited: {str(e)}")
+    try:
+        conn.execute('ALTER TABLE item ADD COLUMN gifted TEXT')
+    except Exception as e:
+        errors.append(f"gifted: {str(e)}")
+
+    if errors:
+        return jsonify({"message": "Migration completed with notes", "notes": errors})
+    return jsonify({"message": "last_edited and gifted columns added successfully"})
+
+@bp.route('/migrate-fix-photo-timestamps', methods=['POST'])
+@token_required
+def migrate_fix_photo_timestamps():
+    """Fix photo timestamps to match their parent item's created_at"""
+    conn = get_db()
+    try:
+        # Update each photo's created_at to match its parent item's created_at
+        conn.execute('''
+            UPDATE item_photos
+            SET created_at = (
+                SELECT item.created_at
+                FROM item
+                WHERE item.id = item_photos.item_id
+            )
+        ''')
+        return jsonify({"message": "Photo timestamps updated to match item creation dates"})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/migrate-add-private', methods=['POST'])
+@token_required
+def migrate_add_private():
+    """Add private column to item table"""
+    conn = get_db()
+    try:
+        conn.execute('ALTER TABLE item ADD COLUMN private TEXT')
+        return jsonify({"message": "private column added successfully"})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/migrate-add-granular-privacy', methods=['POST'])
+@token_required
+def migrate_add_granular_privacy():
+    """Add granular privacy columns for photos, description, origin"""
+    conn = get_db()
+    errors = []
+
+    try:
+        conn.execute('ALTER TABLE item ADD COLUMN private_photos TEXT')
+    except Exception as e:
+        errors.append(f"private_photos: {str(e)}")
+
+    try:
+        conn.execute('ALTER TABLE item ADD COLUMN private_description TEXT')
+    except Exception as e:
+        errors.append(f"private_description: {str(e)}")
+
+    try:
+        conn.execute('ALTER TABLE item ADD COLUMN private_origin TEXT')
+    except Exception as e:
+        errors.append(f"private_origin: {str(e)}")
+
+    if errors:
+        return jsonify({"message": "Migration completed with notes", "notes": errors})
+    return jsonify({"message": "Granular privacy columns added successfully"})
+
+@bp.route('/migrate-add-materials', methods=['POST'])
+@token_required
+def migrate_add_materials():
+    """Create materials table and add materials column to item table"""
+    conn = get_db()
+    errors = []
+
+    # Create materials table
+    try:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS materials (
+                id TEXT PRIMARY KEY,
+                name TEXT NOT NULL UNIQUE
+            )
+        ''')
+        # Insert default materials
+        default_materials = ['Cotton', 'Polyester', 'Rayon']
+        for mat in default_materials:
+            try:
+                conn.execute('INSERT INTO materials (id, name) VALUES (?, ?)',
+                           [str(uuid.uuid4()), mat])
+            except:
+                pass  # Already exists
+    except Exception as e:
+        errors.append(f"materials table: {str(e)}")
+    create_data_version_triggers(conn)
+
+    # Add materials column to item table
+    try:
+        conn.execute('ALTER TABLE item ADD COLUMN materials TEXT')
+    except Exception as e:
+        errors.append(f"materials column: {str(e)}")
+
+    if errors:
+        return jsonify({"message": "Migration completed with notes", "notes": errors})
+    return jsonify({"message": "Materials table and column added successfully"})
+
+@bp.route('/migrate-add-categories', methods=['POST'])
+@token_required
+def migrate_add_categories():
+    """Create categories table with default categories"""
+    conn = get_db()
+    errors = []
+
+    try:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS categories (
+                id TEXT PRIMARY KEY,
+                name TEXT NOT NULL UNIQUE,
+                display_name TEXT NOT NULL,
+                grid_col INTEGER,
+                grid_row INTEGER,
+                box_width INTEGER,
+                box_height INTEGER
+            )
+        ''')
+        # Insert default categories
+        default_categories = [
+            ('clothing', 'Clothing'),
+            ('jewelry', 'Jewelry'),
+            ('sentimental', 'Sentimental'),
+            ('bedding', 'Bedding'),
+            ('other', 'Other')
+        ]
+        for name, display_name in default_categories:
+            try:
+                conn.execute('INSERT INTO categories (id, name, display_name) VALUES (?, ?, ?)',
+                           [str(uuid.uuid4()), name, display_name])
+            except:
+                pass  # Already exists
+    except Exception as e:
+        errors.append(f"categories table: {str(e)}")
+    create_data_version_triggers(conn)
+
+    if errors:
+        return jsonify({"message": "Migration completed with notes", "notes": errors})
+    return jsonify({"message": "Categories table created successfully"})
+
+
+@bp.route('/migrate-add-category-box-columns', methods=['POST'])
+@token_required
+def migrate_add_category_box_columns():
+    """Add grid box columns to existing categories table"""
+    conn = get_db()
+    errors = []
+
+    columns = ['grid_col', 'grid_row', 'box_width', 'box_height']
+    for col in columns:
+        try:
+            conn.execute(f'ALTER TABLE categories ADD COLUMN {col} INTEGER')
+        except Exception as e:
+            errors.append(f"{col}: {str(e)}")
+
+    if errors:
+        return jsonify({"message": "Migration completed with notes", "notes": errors})
+    return jsonify({"message": "Category box columns added successfully"})
+
+@bp.route('/migrate-add-subcategories', methods=['POST'])
+@token_required
+def migrate_add_subcategories():
+    """Create subcategories table with default subcategories"""
+    conn = get_db()
+    errors = []
+
+    try:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS subcategories (
+                id TEXT PRIMARY KEY,
+                name TEXT NOT NULL UNIQUE,
+                display_name TEXT NOT NULL,
+                category TEXT NOT NULL
+            )
+        ''')
+        # Insert default subcategories for clothing
+        default_subcategories = [
+            ('undershirt', 'Undershirt', 'clothing'),
+            ('shirt', 'Shirt', 'clothing'),
+            ('sweater', 'Sweater', 'clothing'),
+            ('jacket', 'Jacket', 'clothing'),
+            ('dress', 'Dress', 'clothing'),
+            ('pants', 'Pants', 'clothing'),
+            ('shorts', 'Shorts', 'clothing'),
+            ('skirt', 'Skirt', 'clothing'),
+            ('shoes', 'Shoes', 'clothing'),
+            ('socks', 'Socks', 'clothing'),
+            ('underwear', 'Underwear', 'clothing'),
+            ('accessories', 'Accessories', 'clothing'),
+            ('other', 'Other', 'clothing')
+        ]
+        for name, display_name, category in default_subcategories:
+            try:
+                conn.execute('INSERT INTO subcategories (id, name, display_name, category) VALUES (?, ?, ?, ?)',
+                           [str(uuid.uuid4()), name, display_name, category])
+            except:
+                pass  # Already exists
+    except Exception as e:
+        errors.append(f"subcategories table: {str(e)}")
+    create_data_version_triggers(conn)
+
+    if errors:
+        return jsonify({"message": "Migration completed with notes", "notes": errors})
+    return jsonify({"message": "Subcategories table created successfully"})
+
+@bp.route('/migrate-add-subcategory-clusters', methods=['POST'])
+@token_required
+def migrate_add_subcategory_clusters():
+    """Create subcategory_clusters table for CloudView cluster positions"""
+    conn = get_db()
+    errors = []
+
+    try:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS subcategory_clusters (
+                id TEXT PRIMARY KEY,
+                category TEXT NOT NULL,
+                subcategory TEXT NOT NULL,
+                local_col INTEGER NOT NULL DEFAULT 0,
+                local_row INTEGER NOT NULL DEFAULT 1,
+                width INTEGER NOT NULL DEFAULT 2,
+                height INTEGER NOT NULL DEFAULT 2,
+                UNIQUE(category, subcategory)
+            )
+        ''')
+    except Exception as e:
+        errors.append(f"subcategory_clusters table: {str(e)}")
+
+    if errors:
+        return jsonify({"message": "Migration completed with notes", "notes": errors})
+    return jsonify({"message": "Subcategory clusters table created successfully"})
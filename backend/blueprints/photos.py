@@ -0,0 +1,423 @@
+"""Photo routes and helpers: uploads with duplicate detection, per-item
+photo lists, serving LocalStorage files, and the hash backfill and image
+GC background jobs."""
+import os
+import threading
+import uuid
+import mimetypes
+from datetime import datetime
+
+from flask import Blueprint, current_app, jsonify, request, send_file
+
+from assets import schedule_cleanup
+from auth import admin_required, current_user, token_required, viewer_role
+from db import get_db, read_only
+import imagegc
+import phash
+from ratelimit import rate_limit
+from records import chunked, get_item_photos, visible_photos_sql
+from storage import get_storage, LocalStorage
+from uploads import UploadPipeline, stream_multipart
+
+bp = Blueprint('photos', __name__)
+
+# Near-duplicate photo detection (hashing and band lookup live in phash.py).
+# A photo within phash.MAX_DISTANCE bits of one already on the same item (or
+# earlier in the same request) is always skipped. Otherwise
+# DUPLICATE_PHOTO_POLICY decides what happens when it matches a photo the
+# uploader could already see: item photos visible to their role for item
+# uploads, approved submissions' photos for community ones.
+#
+#   'link'    reuse the stored upload's URL, but only when the hashes are
+#             within DUPLICATE_PHOTO_LINK_DISTANCE bits (default 0: the same
+#             picture), so a merely similar photo never replaces the upload
+#   'reject'  refuse near-duplicates with a 409
+#   'off'     no check
+DUPLICATE_PHOTO_POLICY = os.getenv('DUPLICATE_PHOTO_POLICY', 'link')
+DUPLICATE_PHOTO_LINK_DISTANCE = int(os.getenv('DUPLICATE_PHOTO_LINK_DISTANCE', 0))
+PHOTO_HASH_BAND_COLUMNS = ', '.join(f'b{i}' for i in range(phash.BANDS))
+
+def find_similar_photo(conn, h, within='1', args=(), max_distance=phash.MAX_DISTANCE):
+    """(url, distance) of the closest stored photo within max_distance bits,
+    or None. within is SQL over photo_hash (with args) limiting the candidates."""
+    where = ' OR '.join(f'b{i} = ?' for i in range(phash.BANDS))
+    result = conn.execute(f'SELECT url, hash FROM photo_hash WHERE ({where}) AND ({within})',
+                          phash.bands(h) + list(args))
+    best = None
+    for url, stored in result.rows:
+        distance = phash.hamming(h, phash.from_sql(stored))
+        if distance <= max_distance and (best is None or distance < best[1]):
+            best = (url, distance)
+    return best
+
+def visible_photo_hashes_sql(source, role):
+    """photo_hash rows an uploader may be matched against: never across
+    sources, and only photos they can already see"""
+    if source == 'item':
+        return f"source = 'item' AND url IN (SELECT url FROM ({visible_photos_sql(role)}))"
+    return "source = 'community' AND url IN (SELECT main_photo FROM community_item WHERE approved = 1)"
+
+def record_photo_hash(conn, url, h, source, owner_id):
+    """Remember url's hash; h=None marks it as checked but undecodable"""
+    bands = phash.bands(h) if h is not None else [None] * phash.BANDS
+    conn.execute(
+        f'INSERT OR IGNORE INTO photo_hash (url, hash, {PHOTO_HASH_BAND_COLUMNS}, source, owner_id, created_at) '
+        f'VALUES (?, ?, {", ".join("?" * phash.BANDS)}, ?, ?, ?)',
+        [url, phash.to_sql(h) if h is not None else None] + bands + [source, owner_id, datetime.utcnow().isoformat()]
+    )
+
+def upload_image(conn, file, source, owner_id, seen=None, role='public'):
+    """Store file with the photo storage backend unless it's a duplicate of a photo we have.
+
+    Returns (url, duplicate_of). url is None when the photo was skipped;
+    duplicate_of is the URL of the matching photo, if any. seen is a list
+    of hashes already handled in this request and is appended to. role is
+    the uploader's (see viewer_role()), which limits what they match.
+    """
+    h = None
+    if DUPLICATE_PHOTO_POLICY != 'off':
+        h = phash.dhash(file.stream)
+        file.stream.seek(0)
+    if h is not None:
+        if seen is not None:
+            if any(phash.hamming(h, other) <= phash.MAX_DISTANCE for other in seen):
+                return None, None
+            seen.append(h)
+        if source == 'item':
+            own = find_similar_photo(conn, h, "source = 'item' AND url IN "
+                                     '(SELECT url FROM item_photos WHERE item_id = ?)', [owner_id])
+            if own:
+                return None, own[0]
+        max_distance = DUPLICATE_PHOTO_LINK_DISTANCE if DUPLICATE_PHOTO_POLICY == 'link' else phash.MAX_DISTANCE
+        match = find_similar_photo(conn, h, visible_photo_hashes_sql(source, role), max_distance=max_distance)
+        if match:
+            url = match[0]
+            if DUPLICATE_PHOTO_POLICY == 'reject':
+                return None, url
+            return url, url
+    url = get_storage().save(file, file.filename)
+    if h is not None:
+        record_photo_hash(conn, url, h, source, owner_id)
+    return url, None
+
+def release_photos(conn, urls):
+    """Queue Cloudinary cleanup for urls that no row references any more.
+
+    Linked duplicates share one upload, so a photo is only destroyed once
+    nothing else points at it.
+    """
+    urls = list(dict.fromkeys(u for u in urls if u))
+    if not urls:
+        return 0
+    referenced = set()
+    for chunk in chunked(urls):
+        marks = ', '.join('?' * len(chunk))
+        result = conn.execute(f'''
+            SELECT url FROM item_photos WHERE url IN ({marks})
+            UNION SELECT main_photo FROM item WHERE main_photo IN ({marks})
+            UNION SELECT main_photo FROM community_item WHERE main_photo IN ({marks})
+        ''', chunk * 3)
+        referenced.update(row[0] for row in result.rows)
+    orphaned = [u for u in urls if u not in referenced]
+    # Content-addressed local files can sit behind several URLs (different
+    # extension or host); keep the file while any of them is still in use
+    local = get_storage() if isinstance(get_storage(), LocalStorage) else None
+    if local:
+        orphaned = [u for u in orphaned if not local.asset_id(u) or not conn.execute('''
+            SELECT 1 FROM item_photos WHERE instr(url, ?1)
+            UNION ALL SELECT 1 FROM item WHERE instr(main_photo, ?1)
+            UNION ALL SELECT 1 FROM community_item WHERE instr(main_photo, ?1)
+            LIMIT 1
+        ''', [local.asset_id(u)]).rows]
+    for chunk in chunked(orphaned):
+        conn.execute(f'DELETE FROM photo_hash WHERE url IN ({", ".join("?" * len(chunk))})', chunk)
+    return schedule_cleanup(orphaned)
+
+# One budget (and concurrency cap) per user across both upload routes
+upload_limit = rate_limit('upload-photos', per_minute=60, key='user', user=current_user, max_concurrent=4)
+
+@bp.route('/item/<item_id>/photo', methods=['POST'])
+@token_required
+@upload_limit
+def upload_photo(item_id):
+    conn = get_db()
+
+    if 'photo' not in request.files:
+        return jsonify({"error": "No photo provided"}), 400
+
+    file = request.files['photo']
+    url, duplicate_of = upload_image(conn, file, 'item', item_id, role=viewer_role())
+    url = url or duplicate_of  # Already on this item: just make it the main photo
+    if url is None:
+        return jsonify({"error": "Duplicate photo", "duplicateOf": duplicate_of}), 409
+
+    conn.execute('UPDATE item SET main_photo=? WHERE id=?', [url, item_id])
+
+    return jsonify({"url": url})
+
+@bp.route('/item/<item_id>/photos', methods=['POST'])
+@token_required
+@upload_limit
+def upload_photos(item_id):
+    """Upload one or more photos for an item"""
+    conn = get_db()
+
+    # Get current max position
+    result = conn.execute('SELECT MAX(position) FROM item_photos WHERE item_id = ?', [item_id])
+    max_pos = result.rows[0][0] if result.rows else None
+    next_position = (max_pos + 1) if max_pos is not None else 0
+
+    # Check current photo count
+    count_result = conn.execute('SELECT COUNT(*) FROM item_photos WHERE item_id = ?', [item_id])
+    current_count = count_result.rows[0][0] if count_result.rows else 0
+
+    uploaded_photos = []
+    skipped_duplicates = []
+    seen_hashes = []
+    received = []
+    role = viewer_role()
+
+    def store_photo(file):
+        """Runs on the pipeline thread, one photo at a time in arrival order"""
+        nonlocal next_position, current_count
+        # Check max 5 photos limit
+        if current_count >= 5:
+            return
+
+        url, duplicate_of = upload_image(conn, file, 'item', item_id, seen_hashes, role)
+        if url is None:
+            skipped_duplicates.append({"filename": file.filename, "duplicateOf": duplicate_of})
+            return
+        photo_id = str(uuid.uuid4())
+        created_at = datetime.utcnow().isoformat()
+
+        conn.execute('''
+            INSERT INTO item_photos (id, item_id, url, position, created_at)
+            VALUES (?, ?, ?, ?, ?)
+        ''', [photo_id, item_id, url, next_position, created_at])
+
+        # Update main_photo if this is the first photo (position 0)
+        if next_position == 0:
+            conn.execute('UPDATE item SET main_photo=? WHERE id=?', [url, item_id])
+
+        uploaded_photos.append({
+            "id": photo_id,
+            "url": url,
+            "position": next_position,
+            "createdAt": created_at
+        })
+        next_position += 1
+        current_count += 1
+
+    def on_file(name, file, fields):
+        if name in ('photos', 'photo'):
+            received.append(pipeline.submit(store_photo, file) if file.filename else None)
+
+    # Each photo is stored as soon as it has arrived (see uploads.py)
+    with UploadPipeline() as pipeline:
+        stream_multipart(request, on_file)
+
+    if not received:
+        return jsonify({"error": "No photos provided"}), 400
+    for future in received:
+        if future is not None:
+            future.result()  # Re-raise anything the pipeline thread hit
+
+    # Update last_edited if photos were uploaded
+    if uploaded_photos:
+        conn.execute('UPDATE item SET last_edited=? WHERE id=?', [datetime.utcnow().isoformat(), item_id])
+
+    return jsonify({"photos": uploaded_photos, "skippedDuplicates": skipped_duplicates})
+
+@bp.route('/item/<item_id>/photos/<photo_id>', methods=['DELETE'])
+@admin_required
+def delete_photo(item_id, photo_id):
+    """Delete a single photo"""
+    conn = get_db()
+
+    # Get the photo being deleted
+    result = conn.execute('SELECT position, url FROM item_photos WHERE id = ? AND item_id = ?', [photo_id, item_id])
+    photo = result.rows[0] if result.rows else None
+
+    if not photo:
+        return jsonify({"error": "Photo not found"}), 404
+
+    deleted_position = photo[0]
+
+    # Delete the photo
+    conn.execute('DELETE FROM item_photos WHERE id = ?', [photo_id])
+
+    # Reorder remaining photos to fill the gap
+    conn.execute('''
+        UPDATE item_photos
+        SET position = position - 1
+        WHERE item_id = ? AND position > ?
+    ''', [item_id, deleted_position])
+
+    # If we deleted position 0 (main photo), update the item's main_photo
+    if deleted_position == 0:
+        new_main_result = conn.execute(
+            'SELECT url FROM item_photos WHERE item_id = ? AND position = 0', [item_id]
+        )
+        new_main_url = new_main_result.rows[0][0] if new_main_result.rows else None
+        conn.execute('UPDATE item SET main_photo=? WHERE id=?', [new_main_url, item_id])
+
+    release_photos(conn, [photo[1]])
+    return jsonify({"message": "Photo deleted"})
+
+@bp.route('/item/<item_id>/photos/reorder', methods=['PUT'])
+@admin_required
+def reorder_photos(item_id):
+    """Reorder photos - expects {"photoIds": ["id1", "id2", ...]} in order"""
+    conn = get_db()
+    data = request.json
+    photo_ids = data.get('photoIds', [])
+
+    # Update positions based on array order
+    for position, photo_id in enumerate(photo_ids):
+        conn.execute(
+            'UPDATE item_photos SET position = ? WHERE id = ? AND item_id = ?',
+            [position, photo_id, item_id]
+        )
+
+    # Update main_photo to be the first photo
+    if photo_ids:
+        first_photo_result = conn.execute(
+            'SELECT url FROM item_photos WHERE id = ?', [photo_ids[0]]
+        )
+        if first_photo_result.rows:
+            conn.execute('UPDATE item SET main_photo=? WHERE id=?', [first_photo_result.rows[0][0], item_id])
+
+    return jsonify({"photos": get_item_photos(conn, item_id)})
+
+@bp.route('/item/<item_id>/photos', methods=['GET'])
+@read_only
+def get_photos(item_id):
+    """Get all photos for an item"""
+    conn = get_db()
+    photos = get_item_photos(conn, item_id, viewer_role())
+    return jsonify({"photos": photos})
+
+PHOTO_CACHE_SECONDS = 365 * 24 * 3600
+
+@bp.route('/photos/<path:name>', methods=['GET'])
+def serve_photo(name):
+    """Serve a photo from LocalStorage.
+
+    Names are content hashes, so a URL's bytes never change: cache forever.
+    send_file hands the open file to the server's wsgi.file_wrapper
+    (sendfile(2) under gunicorn), or to the front proxy when
+    PHOTO_X_SENDFILE=1.
+    """
+    storage = get_storage()
+    found = storage.resolve(name) if isinstance(storage, LocalStorage) else None
+    if found is None:
+        return jsonify({"error": "Photo not found"}), 404
+    path, ext = found
+    response = send_file(
+        path,
+        mimetype=mimetypes.types_map.get(f'.{ext or "jpg"}', 'application/octet-stream'),
+        etag=os.path.basename(path),
+        conditional=True,
+        max_age=PHOTO_CACHE_SECONDS,
+    )
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+# Photos uploaded before photo_hash existed, as (url, source, owner_id)
+UNHASHED_PHOTOS_SQL = {
+    'item': '''
+        SELECT url, item_id FROM item_photos
+        WHERE url NOT IN (SELECT url FROM photo_hash) LIMIT ?
+    ''',
+    'community': '''
+        SELECT main_photo, id FROM community_item
+        WHERE main_photo IS NOT NULL AND main_photo NOT IN (SELECT url FROM photo_hash) LIMIT ?
+    ''',
+}
+_photo_hash_backfill = {"running": False, "hashed": 0, "failed": 0, "error": None}
+
+def backfill_photo_hashes(app, batch_size=25, fetch_timeout=15):
+    """Download and hash every photo without a photo_hash row.
+
+    Undecodable or unreachable photos are recorded with a NULL hash so the
+    next pass doesn't retry them forever.
+    """
+    import urllib.request
+    status = _photo_hash_backfill
+    try:
+        with app.app_context():
+            conn = get_db()
+            for source, sql in UNHASHED_PHOTOS_SQL.items():
+                while True:
+                    try:
+                        rows = conn.execute(sql, [batch_size]).rows
+                    except Exception:
+                        break  # community_item not created yet
+                    if not rows:
+                        break
+                    for url, owner_id in rows:
+                        h = None
+                        try:
+                            with urllib.request.urlopen(url, timeout=fetch_timeout) as response:
+                                h = phash.dhash(response.read())
+                        except Exception:
+                            pass
+                        record_photo_hash(conn, url, h, source, owner_id)
+                        status["hashed" if h is not None else "failed"] += 1
+    except Exception as e:
+        status["error"] = str(e)
+    finally:
+        status["running"] = False
+
+@bp.route('/photo-hashes/backfill', methods=['POST'])
+@admin_required
+def start_photo_hash_backfill():
+    """Start hashing existing photos in a background thread"""
+    status = _photo_hash_backfill
+    if not status["running"]:
+        status.update(running=True, hashed=0, failed=0, error=None)
+        threading.Thread(
+            target=backfill_photo_hashes, args=(current_app._get_current_object(),),
+            name='photo-hash-backfill', daemon=True,
+        ).start()
+    return jsonify(status), 202
+
+@bp.route('/photo-hashes/backfill', methods=['GET'])
+@admin_required
+def photo_hash_backfill_status():
+    return jsonify(_photo_hash_backfill)
+
+_image_gc = {"running": False, "report": None, "error": None}
+
+def run_image_gc(app, store, **options):
+    try:
+        with app.app_context():
+            _image_gc["report"] = imagegc.collect(get_db(), store, **options)
+    except Exception as e:
+        _image_gc["error"] = str(e)
+    finally:
+        _image_gc["running"] = False
+
+@bp.route('/gc/images', methods=['POST'])
+@admin_required
+def start_image_gc():
+    """Sweep orphaned photo rows and stored photos in the background.
+
+    Body: {"dryRun": true, "limit": N}. Dry run is the default. Sweeps
+    the configured photo storage (see storage.py).
+    """
+    data = request.get_json(silent=True) or {}
+    if not _image_gc["running"]:
+        _image_gc.update(running=True, report=None, error=None)
+        threading.Thread(
+            target=run_image_gc, args=(current_app._get_current_object(), get_storage()), name='image-gc', daemon=True,
+            kwargs={"dry_run": data.get('dryRun', True) is not False, "limit": data.get('limit')},
+        ).start()
+    return jsonify(_image_gc), 202
+
+@bp.route('/gc/images', methods=['GET'])
+@admin_required
+def image_gc_status():
+    return jsonify(_image_gc)
@@ -0,0 +1,119 @@
+"""Community submissions: the public submit form and the moderation actions.
+
+Both write, and the form uploads a photo, so these run in the writes pool
+(see deploy/); browsing and the queue itself are in blueprints/community.py.
+"""
+from datetime import datetime
+
+from flask import Blueprint, current_app, jsonify, request
+from werkzeug.exceptions import HTTPException
+
+from auth import token_required
+from blueprints.photos import release_photos, upload_image
+from db import get_db
+from ratelimit import rate_limit
+from records import chunked
+
+bp = Blueprint('submissions', __name__)
+
+MAX_MODERATION_BATCH = 500
+
+@bp.route('/community', methods=['POST'])
+@rate_limit('community-submit', per_minute=5, burst=10, max_concurrent=4)
+def add_community_item():
+    try:
+        # Get form fields
+        item_id = request.form.get('id')
+        item_name = request.form.get('itemName')
+        description = request.form.get('description')
+        category = request.form.get('category')
+        origin = request.form.get('origin')
+        created_at = datetime.utcnow().isoformat()
+        subcategory = request.form.get('subcategory', '')
+        submitted_by = request.form.get('submittedBy', '')
+        
+        photo_url = None
+        conn = get_db()
+
+        # Handle photo
+        if 'photo' in request.files:
+            file = request.files['photo']
+            if file.filename != '':
+                photo_url, duplicate_of = upload_image(conn, file, 'community', item_id)
+                if photo_url is None:
+                    return jsonify({"error": "This photo has already been submitted"}), 409
+        
+        # Ensure the columns match your table exactly
+        conn.execute(
+            'INSERT INTO community_item (id, item_name, description, category, origin, main_photo, created_at, subcategory, submitted_by, approved) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0)',
+            [item_id, item_name, description, category, origin, photo_url, created_at, subcategory, submitted_by]
+        )
+        
+        return jsonify({"message": "Item submitted for review"}), 201
+    except HTTPException:
+        raise  # e.g. 413 from the upload size limits
+    except Exception as e:
+        current_app.logger.exception('Community submission failed')  # With the traceback, in Render's logs
+        return jsonify({"error": str(e)}), 500
+    
+    return jsonify({"message": "Item submitted for review"}), 201
+
+def moderation_ids():
+    """Distinct ids from a {"ids": [...]} body, or an error response"""
+    data = request.get_json(silent=True) or {}
+    ids = data.get('ids')
+    if not isinstance(ids, list) or not ids or not all(isinstance(i, str) for i in ids):
+        return None, (jsonify({"error": "ids must be a non-empty list of item ids"}), 400)
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > MAX_MODERATION_BATCH:
+        return None, (jsonify({"error": f"At most {MAX_MODERATION_BATCH} ids per request"}), 400)
+    return ids, None
+
+@bp.route('/community/<item_id>/approve', methods=['PUT'])
+@token_required
+def approve_community_item(item_id):
+    conn = get_db()
+    conn.execute('UPDATE community_item SET approved = 1 WHERE id = ?', [item_id])
+    return jsonify({"message": "Item approved"})
+
+@bp.route('/community/approve', methods=['POST'])
+@token_required
+def approve_community_items():
+    """Approve every pending item in {"ids": [...]} in one transaction"""
+    ids, error = moderation_ids()
+    if error:
+        return error
+    conn = get_db()
+    results = conn.batch([
+        (f'UPDATE community_item SET approved = 1 WHERE approved = 0 AND id IN ({", ".join("?" * len(chunk))})', chunk)
+        for chunk in chunked(ids)
+    ])
+    approved = sum(r.rows_affected for r in results)
+    return jsonify({"message": f"{approved} items approved", "approved": approved})
+
+@bp.route('/community/<item_id>', methods=['DELETE'])
+@token_required
+def delete_community_item(item_id):
+    conn = get_db()
+    result = conn.execute('DELETE FROM community_item WHERE id = ? RETURNING main_photo', [item_id])
+    release_photos(conn, [row[0] for row in result.rows])
+    return jsonify({"message": "Item deleted"})
+
+@bp.route('/community/reject', methods=['POST'])
+@token_required
+def reject_community_items():
+    """Delete every pending item in {"ids": [...]} in one transaction.
+
+    Their Cloudinary photos are deleted in the background after the commit.
+    """
+    ids, error = moderation_ids()
+    if error:
+        return error
+    conn = get_db()
+    results = conn.batch([
+        (f'DELETE FROM community_item WHERE approved = 0 AND id IN ({", ".join("?" * len(chunk))}) RETURNING main_photo', chunk)
+        for chunk in chunked(ids)
+    ])
+    photos = [row[0] for r in results for row in r.rows]
+    release_photos(conn, photos)
+    return jsonify({"message": f"{len(photos)} items rejected", "rejected": len(photos)})
@@ -0,0 +1,259 @@
+"""Materials, categories and subcategories."""
+import uuid
+
+from flask import Blueprint, jsonify, request
+
+from auth import admin_required, token_required
+from blueprints.layout import invalidate_cloud_layout
+from cache import cached_json, public_request
+from db import get_db, read_only
+
+bp = Blueprint('taxonomy', __name__)
+
+def load_materials():
+    result = get_db().execute('SELECT id, name FROM materials ORDER BY name ASC')
+    return [{"id": row[0], "name": row[1]} for row in result.rows]
+
+@bp.route('/materials', methods=['GET'])
+@read_only
+def get_materials():
+    """Get all available materials"""
+    if public_request():
+        return cached_json('materials', load_materials, version='taxonomy')
+    return jsonify(load_materials())
+
+@bp.route('/materials', methods=['POST'])
+@token_required
+def add_material():
+    """Add a new material"""
+    data = request.json
+    name = data.get('name', '').strip()
+
+    if not name:
+        return jsonify({"error": "Material name is required"}), 400
+
+    # Capitalize first letter, lowercase rest
+    formatted_name = name[0].upper() + name[1:].lower() if len(name) > 1 else name.upper()
+
+    conn = get_db()
+
+    # Check if already exists
+    existing = conn.execute('SELECT id, name FROM materials WHERE LOWER(name) = LOWER(?)', [formatted_name])
+    if existing.rows:
+        return jsonify({"id": existing.rows[0][0], "name": existing.rows[0][1], "existed": True})
+
+    material_id = str(uuid.uuid4())
+    conn.execute('INSERT INTO materials (id, name) VALUES (?, ?)', [material_id, formatted_name])
+
+    return jsonify({"id": material_id, "name": formatted_name}), 201
+
+@bp.route('/materials/<material_id>', methods=['DELETE'])
+@admin_required
+def delete_material(material_id):
+    """Delete a material if it's not in use by any items"""
+    conn = get_db()
+
+    # Get the material name first
+    material = conn.execute('SELECT name FROM materials WHERE id = ?', [material_id])
+    if not material.rows:
+        return jsonify({"error": "Material not found"}), 404
+
+    material_name = material.rows[0][0]
+
+    # Check if any items use this material
+    # We need to search the JSON materials column for this material name
+    items = conn.execute('SELECT id, materials FROM item WHERE materials IS NOT NULL')
+    for row in items.rows:
+        try:
+            import json
+            item_materials = json.loads(row[1]) if row[1] else []
+            for mat in item_materials:
+                if mat.get('material') == material_name:
+                    return jsonify({"error": f"Cannot delete - material is in use by items"}), 400
+        except:
+            pass
+
+    # Safe to delete
+    conn.execute('DELETE FROM materials WHERE id = ?', [material_id])
+    return jsonify({"message": "Material deleted"})
+
+def load_categories():
+    """All categories with box position data"""
+    conn = get_db()
+    try:
+        result = conn.execute('SELECT id, name, display_name, grid_col, grid_row, box_width, box_height FROM categories ORDER BY display_name ASC')
+        categories = [{
+            "id": row[0],
+            "name": row[1],
+            "displayName": row[2],
+            "gridCol": row[3],
+            "gridRow": row[4],
+            "boxWidth": row[5],
+            "boxHeight": row[6]
+        } for row in result.rows]
+        return categories
+    except Exception:
+        # Table doesn't exist yet or missing columns - return default categories for frontend to work
+        return [
+            {"id": "default-clothing", "name": "clothing", "displayName": "Clothing", "gridCol": None, "gridRow": None, "boxWidth": None, "boxHeight": None},
+            {"id": "default-jewelry", "name": "jewelry", "displayName": "Jewelry", "gridCol": None, "gridRow": None, "boxWidth": None, "boxHeight": None},
+            {"id": "default-sentimental", "name": "sentimental", "displayName": "Sentimental", "gridCol": None, "gridRow": None, "boxWidth": None, "boxHeight": None},
+            {"id": "default-bedding", "name": "bedding", "displayName": "Bedding", "gridCol": None, "gridRow": None, "boxWidth": None, "boxHeight": None},
+            {"id": "default-other", "name": "other", "displayName": "Other", "gridCol": None, "gridRow": None, "boxWidth": None, "boxHeight": None}
+        ]
+
+@bp.route('/categories', methods=['GET'])
+@read_only
+def get_categories():
+    """Get all available categories with box position data"""
+    if public_request():
+        return cached_json('categories', load_categories, version='taxonomy')
+    return jsonify(load_categories())
+
+
+@bp.route('/categories', methods=['POST'])
+@token_required
+def add_category():
+    """Add a new category"""
+    data = request.json
+    name = data.get('name', '').strip()
+
+    if not name:
+        return jsonify({"error": "Category name is required"}), 400
+
+    # Create slug (lowercase, no spaces)
+    slug = name.lower().replace(' ', '-')
+    # Display name keeps original formatting
+    display_name = name
+
+    conn = get_db()
+
+    # Check if already exists
+    existing = conn.execute('SELECT id, name, display_name FROM categories WHERE LOWER(name) = LOWER(?)', [slug])
+    if existing.rows:
+        return jsonify({"id": existing.rows[0][0], "name": existing.rows[0][1], "displayName": existing.rows[0][2], "existed": True})
+
+    category_id = str(uuid.uuid4())
+    conn.execute('INSERT INTO categories (id, name, display_name) VALUES (?, ?, ?)', [category_id, slug, display_name])
+    invalidate_cloud_layout()
+
+    return jsonify({"id": category_id, "name": slug, "displayName": display_name}), 201
+
+
+@bp.route('/categories/<category_id>', methods=['DELETE'])
+@admin_required
+def delete_category(category_id):
+    """Delete a category if it's not in use by any items"""
+    conn = get_db()
+
+    # Get the category name first
+    category = conn.execute('SELECT name FROM categories WHERE id = ?', [category_id])
+    if not category.rows:
+        return jsonify({"error": "Category not found"}), 404
+
+    category_name = category.rows[0][0]
+
+    # Check if any items use this category
+    items = conn.execute('SELECT COUNT(*) FROM item WHERE category = ?', [category_name])
+    count = items.rows[0][0] if items.rows else 0
+
+    if count > 0:
+        return jsonify({"error": f"Cannot delete - category is used by {count} item(s)"}), 400
+
+    # Safe to delete
+    conn.execute('DELETE FROM categories WHERE id = ?', [category_id])
+    invalidate_cloud_layout()
+    return jsonify({"message": "Category deleted"})
+
+def load_subcategories(category_filter=None):
+    """All subcategories, or just category_filter's"""
+    conn = get_db()
+    try:
+        if category_filter:
+            result = conn.execute('SELECT id, name, display_name, category FROM subcategories WHERE category = ? ORDER BY display_name ASC', [category_filter])
+        else:
+            result = conn.execute('SELECT id, name, display_name, category FROM subcategories ORDER BY display_name ASC')
+        return [{"id": row[0], "name": row[1], "displayName": row[2], "category": row[3]} for row in result.rows]
+    except Exception:
+        # Table doesn't exist yet - return default subcategories for frontend to work
+        defaults = [
+            {"id": "default-undershirt", "name": "undershirt", "displayName": "Undershirt", "category": "clothing"},
+            {"id": "default-shirt", "name": "shirt", "displayName": "Shirt", "category": "clothing"},
+            {"id": "default-sweater", "name": "sweater", "displayName": "Sweater", "category": "clothing"},
+            {"id": "default-jacket", "name": "jacket", "displayName": "Jacket", "category": "clothing"},
+            {"id": "default-dress", "name": "dress", "displayName": "Dress", "category": "clothing"},
+            {"id": "default-pants", "name": "pants", "displayName": "Pants", "category": "clothing"},
+            {"id": "default-shorts", "name": "shorts", "displayName": "Shorts", "category": "clothing"},
+            {"id": "default-skirt", "name": "skirt", "displayName": "Skirt", "category": "clothing"},
+            {"id": "default-shoes", "name": "shoes", "displayName": "Shoes", "category": "clothing"},
+            {"id": "default-socks", "name": "socks", "displayName": "Socks", "category": "clothing"},
+            {"id": "default-underwear", "name": "underwear", "displayName": "Underwear", "category": "clothing"},
+            {"id": "default-accessories", "name": "accessories", "displayName": "Accessories", "category": "clothing"},
+            {"id": "default-other", "name": "other", "displayName": "Other", "category": "clothing"}
+        ]
+        if category_filter:
+            return [d for d in defaults if d["category"] == category_filter]
+        return defaults
+
+@bp.route('/subcategories', methods=['GET'])
+@read_only
+def get_subcategories():
+    """Get all available subcategories, optionally filtered by category"""
+    category_filter = request.args.get('category')
+    if not category_filter and public_request():
+        return cached_json('subcategories', load_subcategories, version='taxonomy')
+    return jsonify(load_subcategories(category_filter))
+
+
+@bp.route('/subcategories', methods=['POST'])
+@token_required
+def add_subcategory():
+    """Add a new subcategory"""
+    data = request.json
+    name = data.get('name', '').strip()
+    category = data.get('category', 'clothing')
+
+    if not name:
+        return jsonify({"error": "Subcategory name is required"}), 400
+
+    # Create slug (lowercase, no spaces)
+    slug = name.lower().replace(' ', '-')
+    # Display name keeps original formatting
+    display_name = name
+
+    conn = get_db()
+
+    # Check if already exists
+    existing = conn.execute('SELECT id, name, display_name, category FROM subcategories WHERE LOWER(name) = LOWER(?) AND category = ?', [slug, category])
+    if existing.rows:
+        return jsonify({"id": existing.rows[0][0], "name": existing.rows[0][1], "displayName": existing.rows[0][2], "category": existing.rows[0][3], "existed": True})
+
+    subcategory_id = str(uuid.uuid4())
+    conn.execute('INSERT INTO subcategories (id, name, display_name, category) VALUES (?, ?, ?, ?)', [subcategory_id, slug, display_name, category])
+
+    return jsonify({"id": subcategory_id, "name": slug, "displayName": display_name, "category": category}), 201
+
+
+@bp.route('/subcategories/<subcategory_id>', methods=['DELETE'])
+@admin_required
+def delete_subcategory(subcategory_id):
+    """Delete a subcategory if it's not in use by any items"""
+    conn = get_db()
+
+    # Get the subcategory name first
+    subcategory = conn.execute('SELECT name FROM subcategories WHERE id = ?', [subcategory_id])
+    if not subcategory.rows:
+        return jsonify({"error": "Subcategory not found"}), 404
+
+    subcategory_name = subcategory.rows[0][0]
+
+    # Check if any items use this subcategory
+    items = conn.execute('SELECT COUNT(*) FROM item WHERE subcategory = ?', [subcategory_name])
+    count = items.rows[0][0] if items.rows else 0
+
+    if count > 0:
+        return jsonify({"error": f"Cannot delete - subcategory is used by {count} item(s)"}), 400
+
+    # Safe to delete
+    conn.execute('DELETE FROM subcategories WHERE id = ?', [subcategory_id])
+    return jsonify({"message": "Subcategory deleted"})
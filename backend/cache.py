@@ -0,0 +1,89 @@
+"""Per-worker cache of public response bodies, rebuilt once per data version.
+
+Anonymous visitors all get the same bytes from GET /, /materials,
+/categories and /subcategories. Each is serialized once per version of
+the tables behind it and kept ready to send. Compressed copies (see
+compress.py) are made the first time a client asks for that encoding and
+kept with the JSON, so the same version is never compressed twice.
+Responses carry an ETag, so a revisit with If-None-Match gets a 304.
+
+Versions are data_meta counters, bumped by triggers on every write (see
+db.py). A worker reads the current one at most every PUBLIC_CACHE_RECHECK
+seconds (default 2; 0 checks on every request), so in between a hit
+doesn't touch the database at all. Editors are signed in and never use
+the cache, so they always see their own writes. Anonymous visitors see a
+write at most PUBLIC_CACHE_RECHECK seconds late. PUBLIC_CACHE=0 turns the
+cache off.
+
+warmup.py fills it when a worker boots.
+"""
+import os
+import threading
+import time
+
+from flask import current_app, request
+from werkzeug.http import generate_etag
+
+from compress import MIN_BYTES, compress, negotiate
+from db import get_db
+
+PUBLIC_CACHE = os.getenv('PUBLIC_CACHE', '1') != '0'
+PUBLIC_CACHE_RECHECK = float(os.getenv('PUBLIC_CACHE_RECHECK', 2))
+
+_entries = {}
+_lock = threading.Lock()
+
+def public_request():
+    """True when this request may be answered from the cache"""
+    return PUBLIC_CACHE and not request.headers.get('Authorization')
+
+def data_version(name):
+    rows = get_db().execute('SELECT version FROM data_meta WHERE name = ?', [name]).rows
+    return rows[0][0] if rows else None
+
+def build_entry(data, version):
+    body = current_app.json.response(data).get_data()  # Same bytes as jsonify()
+    return {
+        "version": version,
+        "etag": f'{version}-{generate_etag(body)[:16]}',
+        "bodies": {'identity': body},
+        "checked": time.monotonic(),
+    }
+
+def cached_json(key, build, version='items'):
+    """A JSON response for key, from build() when data_meta's version has moved on"""
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(key)
+    if entry is None or now - entry["checked"] > PUBLIC_CACHE_RECHECK:
+        # Read the version before the data: a write in between shows up
+        # as a newer version at the next check
+        current = data_version(version)
+        if entry is None or current is None or entry["version"] != current:
+            # Built outside the lock: a second miss just builds it again
+            entry = build_entry(build(), current)
+        else:
+            entry = dict(entry, checked=now)
+        with _lock:
+            _entries[key] = entry
+    return cached_response(entry)
+
+def cached_response(entry):
+    bodies = entry["bodies"]
+    encoding = negotiate() if len(bodies['identity']) >= MIN_BYTES else 'identity'
+    if encoding not in bodies:
+        # Shared by every copy of this entry; a race just compresses twice
+        bodies[encoding] = compress(bodies['identity'], encoding, precompress=True)
+    response = current_app.response_class(bodies[encoding], mimetype='application/json')
+    if encoding == 'identity':
+        response.set_etag(entry["etag"])
+    else:
+        response.content_encoding = encoding
+        response.set_etag(f'{entry["etag"]}-{encoding}')
+    response.vary.add('Accept-Encoding')
+    response.cache_control.no_cache = True  # Always revalidate; the 304 is the saving
+    return response.make_conditional(request)
+
+def clear():
+    with _lock:
+        _entries.clear()
@@ -0,0 +1,271 @@
+"""Database connections and schema setup.
+
+get_db() hands out one libsql client per app context (or a throwaway one
+outside of a request). It's always the primary, except in routes marked
+@read_only, which read from the replica while it's fresh when one is set up
+(see replica.py). With a replica, every route's writes are tracked and
+sync_replica() tells the replica about them after the request.
+ensure_schema() runs init_db() before the first request a process serves,
+unless the database already records the current SCHEMA_VERSION;
+create_app() registers it, sync_replica() and close_db().
+"""
+import os
+import threading
+from functools import wraps
+
+from flask import g, has_app_context, request
+
+import phash
+import search
+from replica import ReplicaClient, get_replica
+
+def get_db():
+    # Each client owns an event-loop thread, so reuse one per app context
+    # instead of leaking a new thread on every call. libsql_client pulls in
+    # aiohttp, so it's imported here rather than on cold start.
+    from libsql_client import create_client_sync
+    if not has_app_context():
+        return create_client_sync(
+            url=os.getenv('TURSO_DATABASE_URL'),
+            auth_token=os.getenv('TURSO_AUTH_TOKEN')
+        )
+    if 'db' not in g:
+        g.db = create_client_sync(
+            url=os.getenv('TURSO_DATABASE_URL'),
+            auth_token=os.getenv('TURSO_AUTH_TOKEN')
+        )
+    read_only = bool(g.get('read_only'))
+    name = 'read_db' if read_only else 'write_db'
+    if name not in g:
+        # Replica mode: @read_only routes read from the replica, and every
+        # write goes through to the primary and is noted for sync_replica()
+        replica = get_replica()
+        setattr(g, name, ReplicaClient(g.db, replica, reads=read_only) if replica is not None else g.db)
+    return getattr(g, name)
+
+# Signed-in users are the ones who edit, so by default their reads stay on
+# the primary and they always see their own writes
+REPLICA_SIGNED_IN_READS = os.getenv('REPLICA_SIGNED_IN_READS') == '1'
+
+def read_only(f):
+    """Route decorator: the route only reads, so get_db() may serve it from
+    the replica. Requests with a token still go to the primary unless
+    REPLICA_SIGNED_IN_READS=1."""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        g.read_only = REPLICA_SIGNED_IN_READS or not request.headers.get('Authorization')
+        return f(*args, **kwargs)
+    return decorated
+
+def sync_replica(response):
+    """after_request hook: let the replica catch up with this request's writes
+    before the response goes out, so the writer's next read sees them"""
+    for name in ('write_db', 'read_db'):
+        client = g.get(name)
+        if isinstance(client, ReplicaClient):
+            client.finish()
+    return response
+
+def close_db(exception):
+    for name in ('read_db', 'write_db'):
+        client = g.pop(name, None)
+        if isinstance(client, ReplicaClient):
+            client.close()
+    conn = g.pop('db', None)
+    if conn is not None:
+        conn.close()
+
+def init_db():
+    conn = get_db()
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS item (
+            id TEXT PRIMARY KEY,
+            item_name TEXT,
+            description TEXT,
+            category TEXT,
+            origin TEXT,
+            main_photo TEXT,
+            created_at TEXT,
+            subcategory TEXT,
+            secondhand TEXT
+        )
+    ''')
+    # Add pinned position columns for cloud view (DEPRECATED - kept for backwards compatibility)
+    try:
+        conn.execute('ALTER TABLE item ADD COLUMN pinned_x REAL')
+    except:
+        pass  # Column already exists
+    try:
+        conn.execute('ALTER TABLE item ADD COLUMN pinned_y REAL')
+    except:
+        pass  # Column already exists
+
+    # Add local position columns for grid-based CloudView (item position within category box)
+    try:
+        conn.execute('ALTER TABLE item ADD COLUMN local_col INTEGER')
+    except:
+        pass  # Column already exists
+    try:
+        conn.execute('ALTER TABLE item ADD COLUMN local_row INTEGER')
+    except:
+        pass  # Column already exists
+
+    # Bumped by every edit that changes an item's fields, for If-Match / 409 on concurrent edits
+    try:
+        conn.execute('ALTER TABLE item ADD COLUMN version INTEGER NOT NULL DEFAULT 1')
+    except:
+        pass  # Column already exists
+
+    # Single-row counter bumped by every CloudView layout write, for conflict detection
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS layout_meta (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    conn.execute('INSERT OR IGNORE INTO layout_meta (id, version) VALUES (1, 0)')
+
+    # Perceptual hashes of uploaded photos, one indexed column per band (see phash.py)
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS photo_hash (
+            url TEXT PRIMARY KEY,
+            hash INTEGER,
+            {', '.join(f'b{i} INTEGER' for i in range(phash.BANDS))},
+            source TEXT,
+            owner_id TEXT,
+            created_at TEXT
+        )
+    ''')
+    for i in range(phash.BANDS):
+        conn.execute(f'CREATE INDEX IF NOT EXISTS idx_photo_hash_b{i} ON photo_hash (b{i})')
+
+    migrate_community_keys(conn)
+    try:
+        conn.execute(COMMUNITY_PENDING_INDEX)
+    except:
+        pass  # community_item not created yet, the community migrations add it
+
+    # One counter per cached public list (see cache.py), bumped by triggers
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS data_meta (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    conn.execute('INSERT OR IGNORE INTO data_meta (name, version) VALUES ' + ', '.join('(?, 0)' for _ in DATA_VERSION_TABLES),
+                 list(DATA_VERSION_TABLES))
+    create_data_version_triggers(conn)
+
+    # Full-text indexes and their triggers (see search.py)
+    for index in search.INDEXES:
+        try:
+            index.create(conn)
+        except Exception:
+            pass  # Source table not created yet; its migration creates the index
+
+# seq is an INTEGER PRIMARY KEY, i.e. the rowid, so VACUUM can't renumber
+# it: the full-text index (search.py) finds rows by rowid.
+COMMUNITY_ITEM_TABLE = '''
+    CREATE TABLE IF NOT EXISTS community_item (
+        seq INTEGER PRIMARY KEY,
+        id TEXT NOT NULL UNIQUE,
+        item_name TEXT,
+        description TEXT,
+        category TEXT,
+        origin TEXT,
+        main_photo TEXT,
+        created_at TEXT,
+        subcategory TEXT,
+        submitted_by TEXT,
+        approved INTEGER DEFAULT 0
+    )
+'''
+COMMUNITY_ITEM_COLUMNS = ('id', 'item_name', 'description', 'category', 'origin', 'main_photo',
+                          'created_at', 'subcategory', 'submitted_by', 'approved')
+
+def migrate_community_keys(conn):
+    """Give an older community_item (keyed on its TEXT id) the seq column.
+
+    Rows keep their current rowids, so the search index still matches them.
+    Dropping the old table drops its triggers and index; they're recreated.
+    """
+    rows = conn.execute("SELECT name, pk FROM pragma_table_info('community_item')").rows
+    if not rows or any(name == 'seq' and pk for name, pk in rows):
+        return  # No table yet, or already migrated
+    existing = {name for name, _ in rows}  # The oldest tables lack subcategory and submitted_by
+    columns = ', '.join(column for column in COMMUNITY_ITEM_COLUMNS if column in existing)
+    conn.batch([
+        COMMUNITY_ITEM_TABLE.replace('community_item', 'community_item_new'),
+        f'INSERT INTO community_item_new (seq, {columns}) SELECT rowid, {columns} FROM community_item',
+        'DROP TABLE community_item',
+        'ALTER TABLE community_item_new RENAME TO community_item',
+        COMMUNITY_PENDING_INDEX,
+    ])
+    for index in search.INDEXES:
+        if index.table == 'community_item':
+            index.create(conn, rebuild=False)
+
+# Moderation queue pages walk pending items oldest-first
+COMMUNITY_PENDING_INDEX = 'CREATE INDEX IF NOT EXISTS idx_community_pending ON community_item (approved, created_at, id)'
+
+# Tables behind each data_meta counter. Triggers count every write, from
+# any worker or migration, so the caches can't miss one.
+DATA_VERSION_TABLES = {
+    'items': ('item',),
+    'taxonomy': ('materials', 'categories', 'subcategories'),
+}
+
+def create_data_version_triggers(conn):
+    """Create the data_meta triggers; tables that don't exist yet are skipped.
+
+    Migrations that create or rebuild one of these tables call this again.
+    """
+    for name, tables in DATA_VERSION_TABLES.items():
+        for table in tables:
+            try:
+                conn.batch([
+                    f'''CREATE TRIGGER IF NOT EXISTS {table}_{event.lower()}_data_version AFTER {event} ON {table}
+                        BEGIN UPDATE data_meta SET version = version + 1 WHERE name = '{name}'; END'''
+                    for event in ('INSERT', 'UPDATE', 'DELETE')
+                ])
+            except Exception:
+                pass  # Table not created yet
+
+# Bump whenever init_db() changes, so every database runs it once more
+SCHEMA_VERSION = 4
+_schema_ready = set()  # Database URLs this process has checked
+_schema_lock = threading.Lock()
+
+def ensure_schema():
+    """Run init_db() unless the database says it's already at SCHEMA_VERSION.
+
+    init_db() is a dozen-plus round trips to Turso, so instead of running
+    it on import it happens before the first request, and only when the
+    schema_meta marker is missing or older. After that it's one SELECT per
+    process and database.
+    """
+    url = os.getenv('TURSO_DATABASE_URL')
+    if url in _schema_ready:
+        return
+    with _schema_lock:
+        if url in _schema_ready:
+            return
+        conn = get_db()
+        try:
+            rows = conn.execute('SELECT version FROM schema_meta WHERE id = 1').rows
+        except Exception:
+            rows = []  # Table not there yet
+        if not rows or rows[0][0] < SCHEMA_VERSION:
+            init_db()
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS schema_meta (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    version INTEGER NOT NULL
+                )
+            ''')
+            conn.execute(
+                'INSERT INTO schema_meta (id, version) VALUES (1, ?) '
+                'ON CONFLICT (id) DO UPDATE SET version = MAX(version, excluded.version)',
+                [SCHEMA_VERSION]
+            )
+        _schema_ready.add(url)
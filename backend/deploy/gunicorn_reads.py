@@ -0,0 +1,40 @@
+"""gunicorn pool for the read-heavy route groups.
+
+Run from backend/:
+
+    gunicorn -c deploy/gunicorn_reads.py
+
+The list, item detail, taxonomy, layout and community browsing routes
+are short requests that spend most of their time waiting on Turso, so this
+pool runs many threads per worker. Its sibling, deploy/gunicorn_writes.py,
+takes uploads, community submissions and moderation, /extract-item and the
+admin endpoints; the front proxy picks the pool by path, and for / and
+/community by method. Anything these groups don't serve 404s here (or
+405s, e.g. POST /community).
+
+Each worker warms its caches on a background thread once it has booted
+(see warmup.py; WARMUP=0 turns that off).
+
+Env: PORT, READS_WORKERS (default 2 x CPUs + 1), READS_THREADS (default 8),
+TRUSTED_PROXY_COUNT (default 1).
+"""
+import multiprocessing
+import os
+
+wsgi_app = "app:create_app('auth,items,taxonomy,layout,community')"
+
+bind = f"0.0.0.0:{os.getenv('PORT', '10000')}"
+# The front proxy's X-Forwarded-For gives the client IP (see app.py); set
+# before the workers import the app
+os.environ.setdefault('TRUSTED_PROXY_COUNT', '1')
+workers = int(os.getenv('READS_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.getenv('READS_THREADS', 8))
+timeout = 30
+keepalive = 5
+
+def post_worker_init(worker):
+    # Runs in the worker just before it starts accepting; the warm-up
+    # itself happens on its own thread
+    from warmup import log_report, start
+    start(worker.wsgi, on_done=lambda report: log_report(report, worker.log))
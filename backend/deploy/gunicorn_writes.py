@@ -0,0 +1,28 @@
+"""gunicorn pool for the write-heavy route groups.
+
+Run from backend/:
+
+    gunicorn -c deploy/gunicorn_writes.py
+
+Photo uploads (POST /, /item/<id>/photo(s) and community submissions),
+community moderation, /extract-item and the admin jobs hold a worker for seconds at a time, uploading to Cloudinary or
+waiting on Claude, so they get a few workers with a long timeout and don't
+starve the reads pool (deploy/gunicorn_reads.py). items is registered here
+too so the proxy can send POST / to this pool by method.
+
+Env: WRITES_PORT (default 10001), WRITES_WORKERS (default 2),
+WRITES_THREADS (default 2), TRUSTED_PROXY_COUNT (default 1).
+"""
+import os
+
+wsgi_app = "app:create_app('items,photos,submissions,extraction,maintenance')"
+
+bind = f"0.0.0.0:{os.getenv('WRITES_PORT', '10001')}"
+# The front proxy's X-Forwarded-For gives the client IP (see app.py); set
+# before the workers import the app
+os.environ.setdefault('TRUSTED_PROXY_COUNT', '1')
+workers = int(os.getenv('WRITES_WORKERS', 2))
+worker_class = 'gthread'
+threads = int(os.getenv('WRITES_THREADS', 2))
+timeout = 120
+graceful_timeout = 60
@@ -0,0 +1,149 @@
+"""Garbage collection for photos nothing points at any more.
+
+Two kinds of garbage:
+
+  * item_photos rows whose item is gone (nothing cascades on delete)
+  * assets in the image store that no item, item photo or community row
+    references
+
+collect() finds both, deletes the rows, then deletes the assets in batches
+with a pause in between so a big sweep stays under the store's API rate
+limits. Assets younger than min_age are left alone, since their row may
+not be written yet. With dry_run nothing is deleted and the report says
+what would have been.
+
+store is any backend from storage.py; on Cloudinary only CLOUDINARY_FOLDER
+is swept (see storage.py). A storage.LocalStorage directory
+works as a fake store for dry runs, benchmarks and local development.
+
+Run from backend/:
+
+    python -m imagegc --local /tmp/fake-store          # dry run
+    python -m imagegc --delete                         # really delete on the configured storage
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from storage import LocalStorage, get_storage
+
+REFERENCED_URLS_SQL = (
+    'SELECT url FROM item_photos WHERE item_id IN (SELECT id FROM item)',
+    'SELECT main_photo FROM item WHERE main_photo IS NOT NULL',
+    'SELECT main_photo FROM community_item WHERE main_photo IS NOT NULL',
+)
+
+
+def _chunks(seq, size):
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
+
+def orphaned_photo_rows(conn):
+    result = conn.execute('SELECT id, url FROM item_photos WHERE item_id NOT IN (SELECT id FROM item)')
+    return [(row[0], row[1]) for row in result.rows]
+
+
+def referenced_urls(conn):
+    urls = set()
+    for sql in REFERENCED_URLS_SQL:
+        try:
+            urls.update(row[0] for row in conn.execute(sql).rows)
+        except Exception:
+            pass  # community_item not created yet
+    return urls
+
+
+def collect(conn, store, dry_run=True, batch_size=100, pause=1.0, min_age=86400, limit=None):
+    """Find and (unless dry_run) delete orphaned photo rows and assets. Returns a report dict"""
+    started = time.monotonic()
+    report = {
+        "store": store.name,
+        "dryRun": dry_run,
+        "orphanedRows": 0,
+        "orphanedAssets": 0,
+        "deletedAssets": 0,
+        "reclaimedBytes": 0,
+        "failedAssets": [],
+    }
+
+    rows = orphaned_photo_rows(conn)
+    report["orphanedRows"] = len(rows)
+    if rows and not dry_run:
+        conn.batch([
+            (f'DELETE FROM item_photos WHERE id IN ({", ".join("?" * len(chunk))})', [r[0] for r in chunk])
+            for chunk in _chunks(rows, 100)
+        ])
+
+    # Orphaned rows don't count as references, so this is the same in a dry run
+    referenced = {store.asset_id(u) for u in referenced_urls(conn)} - {None}
+
+    cutoff = time.time() - min_age
+    orphans = [a for a in store.list_assets() if a.id not in referenced and a.created_at <= cutoff]
+    if limit is not None:
+        orphans = orphans[:limit]
+    report["orphanedAssets"] = len(orphans)
+
+    if dry_run:
+        report["reclaimedBytes"] = sum(a.bytes for a in orphans)
+    else:
+        sizes = {a.id: a.bytes for a in orphans}
+        deleted = []
+        for i, chunk in enumerate(_chunks([a.id for a in orphans], batch_size)):
+            if i and pause:
+                time.sleep(pause)
+            try:
+                done = store.delete_assets(chunk)
+            except Exception:
+                done = []
+            deleted += done
+            report["failedAssets"] += sorted(set(chunk) - set(done))
+        report["deletedAssets"] = len(deleted)
+        report["reclaimedBytes"] = sum(sizes[pid] for pid in deleted)
+        _forget_hashes(conn, store, set(deleted))
+
+    report["seconds"] = round(time.monotonic() - started, 3)
+    return report
+
+
+def _forget_hashes(conn, store, ids):
+    """Drop photo_hash rows for deleted assets so they can't be linked to again"""
+    if not ids:
+        return
+    try:
+        urls = [row[0] for row in conn.execute('SELECT url FROM photo_hash').rows]
+    except Exception:
+        return
+    gone = [u for u in urls if store.asset_id(u) in ids]
+    for chunk in _chunks(gone, 100):
+        conn.execute(f'DELETE FROM photo_hash WHERE url IN ({", ".join("?" * len(chunk))})', chunk)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Delete orphaned photo rows and image assets')
+    parser.add_argument('--local', metavar='DIR', help='Sweep a LocalStorage directory instead of the configured storage')
+    parser.add_argument('--delete', action='store_true', help='Actually delete (default is a dry run)')
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--pause', type=float, default=1.0, help='Seconds between delete batches')
+    parser.add_argument('--min-age', type=float, default=86400, help='Skip assets newer than this many seconds')
+    parser.add_argument('--limit', type=int, help='Delete at most this many assets')
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+    from libsql_client import create_client_sync
+    load_dotenv()
+    conn = create_client_sync(url=os.getenv('TURSO_DATABASE_URL'), auth_token=os.getenv('TURSO_AUTH_TOKEN'))
+    try:
+        store = LocalStorage(args.local) if args.local else get_storage()
+        report = collect(conn, store, dry_run=not args.delete, batch_size=args.batch_size,
+                         pause=args.pause, min_age=args.min_age, limit=args.limit)
+    finally:
+        conn.close()
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == '__main__':
+    main()
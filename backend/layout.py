@@ -0,0 +1,414 @@
+"""Server-side CloudView layout.
+
+A port of the placement logic in frontend/src/components/CloudView.jsx:
+category boxes are shelf-packed unless they have a saved position,
+subcategory clusters are shelf-packed inside their box unless saved, and
+items fill their cluster cell by cell.
+
+Two differences from the client:
+- Items keep their saved cluster-relative localCol/localRow when the cell
+  is inside the cluster and free. The rest are auto-placed into the
+  remaining cells of a per-cluster occupancy grid.
+- A new subcategory in a category that already has saved clusters goes in
+  the first free spot of the box's occupancy grid, so it doesn't land on
+  top of an existing cluster.
+
+CloudLayout keeps its inputs indexed so the position/box/cluster routes can
+patch just the part of the layout they touched.
+"""
+import math
+
+CELL_WIDTH = 50   # 48px card + 2px gap
+CELL_HEIGHT = 58  # 56px card + 2px gap
+MAX_CANVAS_WIDTH = 24  # Max cells wide for initial packing
+
+# Subcategory ordering for auto-placement
+SUBCATEGORY_ORDER = {
+    'clothing': ['hats', 'tops', 'outerwear', 'bottoms', 'shoes', 'socks', 'underwear', 'accessories', 'other'],
+    'jewelry': ['necklaces', 'earrings', 'bracelets', 'rings', 'other'],
+}
+
+
+def cluster_size(item_count):
+    if item_count == 0:
+        return 2, 2
+    cols = max(1, math.ceil(math.sqrt(item_count)))
+    rows = max(1, math.ceil(item_count / cols))
+    return cols, rows
+
+
+def min_box_size(item_count):
+    if item_count == 0:
+        return 2, 2
+    cols = max(2, math.ceil(math.sqrt(item_count * 1.5)))
+    rows = max(1, math.ceil(item_count / cols))
+    return cols, rows + 1  # +1 for header
+
+
+def _cluster_specs(subcat_items):
+    """(subcategory, count, width, height) for non-empty subcategories, tallest first"""
+    specs = []
+    for subcat, items in subcat_items.items():
+        if items:
+            width, height = cluster_size(len(items))
+            specs.append((subcat, len(items), width, height))
+    specs.sort(key=lambda s: -s[3])
+    return specs
+
+
+def box_size_for_clusters(subcat_items, min_width=4):
+    specs = _cluster_specs(subcat_items)
+    if not specs:
+        return 2, 2
+    total_width = sum(s[2] for s in specs)
+    avg_width = total_width / len(specs)
+    box_width = max(min_width, max(s[2] for s in specs), math.ceil(avg_width * 2))
+    box_width = min(box_width, MAX_CANVAS_WIDTH - 2)
+
+    current_row, current_col, row_height, max_height = 1, 0, 0, 0
+    for _, _, width, height in specs:
+        if current_col + width > box_width:
+            current_row += row_height
+            current_col = 0
+            row_height = 0
+        current_col += width
+        row_height = max(row_height, height)
+        max_height = max(max_height, current_row + row_height)
+    return box_width, max_height + 1  # +1 for box header
+
+
+def shelf_pack_clusters(subcat_items, box_width):
+    clusters = []
+    current_row, current_col, row_height = 1, 0, 0  # Row 0 is the box header
+    for subcat, count, width, height in _cluster_specs(subcat_items):
+        if current_col + width > box_width:
+            current_row += row_height
+            current_col = 0
+            row_height = 0
+        clusters.append({
+            "subcategory": subcat,
+            "localCol": current_col,
+            "localRow": current_row,
+            "width": width,
+            "height": height,
+            "itemCount": count,
+        })
+        current_col += width
+        row_height = max(row_height, height)
+    return clusters
+
+
+def shelf_pack_boxes(categories, item_counts, items_by_subcategory):
+    sized = []
+    for name, display_name in categories:
+        subcat_items = items_by_subcategory.get(name)
+        if subcat_items and any(subcat_items.values()):
+            width, height = box_size_for_clusters(subcat_items)
+        else:
+            width, height = min_box_size(item_counts.get(name, 0))
+        sized.append((name, display_name, width, height))
+    sized.sort(key=lambda c: -c[3])
+
+    boxes = []
+    current_row, current_col, row_height = 0, 0, 0
+    for name, display_name, width, height in sized:
+        if current_col + width > MAX_CANVAS_WIDTH:
+            current_row += row_height
+            current_col = 0
+            row_height = 0
+        boxes.append({
+            "name": name,
+            "displayName": display_name,
+            "gridCol": current_col,
+            "gridRow": current_row,
+            "boxWidth": width,
+            "boxHeight": height,
+        })
+        current_col += width
+        row_height = max(row_height, height)
+    return boxes
+
+
+class OccupancyGrid:
+    """Set of taken cells inside a width x height rectangle, with a
+    row-major cursor for finding the next free cell or w x h region."""
+
+    def __init__(self, width, height, first_row=0):
+        self.width = width
+        self.height = height
+        self.first_row = first_row
+        self.taken = set()
+        self._cursor = (first_row, 0)
+
+    def inside(self, col, row, width=1, height=1):
+        return (col >= 0 and row >= self.first_row and
+                col + width <= self.width and row + height <= self.height)
+
+    def is_free(self, col, row, width=1, height=1):
+        if not self.inside(col, row, width, height):
+            return False
+        for r in range(row, row + height):
+            for c in range(col, col + width):
+                if (c, r) in self.taken:
+                    return False
+        return True
+
+    def occupy(self, col, row, width=1, height=1):
+        for r in range(row, row + height):
+            for c in range(col, col + width):
+                self.taken.add((c, r))
+
+    def next_free(self):
+        """Next free single cell at or after the cursor, growing downward if full"""
+        row, col = self._cursor
+        while True:
+            if col >= self.width:
+                row += 1
+                col = 0
+                continue
+            if (col, row) not in self.taken:
+                self._cursor = (row, col + 1)
+                return col, row
+            col += 1
+
+    def find_region(self, width, height):
+        """First free width x height spot, scanning row-major; below the grid if none fits"""
+        for row in range(self.first_row, self.height - height + 1):
+            for col in range(0, self.width - width + 1):
+                if self.is_free(col, row, width, height):
+                    return col, row
+        return 0, max(self.height, self.first_row)
+
+
+class CloudLayout:
+    """The full CloudView layout, built from items, categories and saved clusters"""
+
+    def __init__(self, items, categories, saved_clusters):
+        # items: [{id, category, subcategory, localCol, localRow}]
+        # categories: [{name, displayName, gridCol, gridRow, boxWidth, boxHeight}]
+        # saved_clusters: {category: {subcategory: {localCol, localRow, width, height}}}
+        self.items = {}
+        self.item_order = []
+        for item in items:
+            self.items[item["id"]] = dict(item)
+            self.item_order.append(item["id"])
+        self.categories = {c["name"]: dict(c) for c in categories}
+        self.category_order = [c["name"] for c in categories]
+        self.saved_clusters = {cat: dict(subs) for cat, subs in saved_clusters.items()}
+        self.version = None
+
+        self.boxes = {}
+        self.clusters = {}
+        self.positions = {}
+        self._group()
+        self.build()
+
+    # ---------- grouping ----------
+
+    @staticmethod
+    def _keys(item):
+        category = item.get("category") or 'other'
+        subcategory = (item.get("subcategory") or '').lower() or 'other'
+        return category, subcategory
+
+    def _group(self):
+        seen = []
+        for item_id in self.item_order:
+            category = self.items[item_id].get("category")
+            if category and category not in seen:
+                seen.append(category)
+        self.item_categories = seen or ['other']
+
+        grouped = {}
+        for cat in self.item_categories:
+            grouped[cat] = {sub: [] for sub in SUBCATEGORY_ORDER.get(cat, ['other'])}
+            grouped[cat]['other'] = []
+        for item_id in self.item_order:
+            cat, sub = self._keys(self.items[item_id])
+            grouped.setdefault(cat, {'other': []}).setdefault(sub, []).append(item_id)
+        self.by_subcategory = grouped
+        self.item_counts = {cat: sum(len(ids) for ids in subs.values()) for cat, subs in grouped.items()}
+
+    # ---------- full build ----------
+
+    def build(self):
+        self._base_boxes = self._place_boxes()
+        self.boxes = {name: dict(box) for name, box in self._base_boxes.items()}
+        self.clusters = {}
+        self.positions = {}
+        for name in self.boxes:
+            self._place_category(name)
+
+    def _place_boxes(self):
+        boxes = {}
+        for name in self.category_order:
+            cat = self.categories[name]
+            if None not in (cat.get("gridCol"), cat.get("gridRow"), cat.get("boxWidth"), cat.get("boxHeight")):
+                boxes[name] = {
+                    "name": name,
+                    "displayName": cat.get("displayName") or name,
+                    "gridCol": cat["gridCol"],
+                    "gridRow": cat["gridRow"],
+                    "boxWidth": cat["boxWidth"],
+                    "boxHeight": cat["boxHeight"],
+                }
+
+        to_pack = [(name, self.categories.get(name, {}).get("displayName") or name)
+                   for name in self.item_categories if name not in boxes]
+        if to_pack:
+            max_row = max((b["gridRow"] + b["boxHeight"] for b in boxes.values()), default=0)
+            for box in shelf_pack_boxes(to_pack, self.item_counts, self.by_subcategory):
+                box["gridRow"] += max_row
+                boxes[box["name"]] = box
+        return boxes
+
+    def _place_category(self, name):
+        """Clusters and item positions for one category box"""
+        box = self.boxes[name]
+        subcat_items = self.by_subcategory.get(name, {})
+
+        # Grow the box if its clusters need more room, like the client does
+        req_width, req_height = box_size_for_clusters(subcat_items)
+        box["boxWidth"] = max(box["boxWidth"], req_width)
+        box["boxHeight"] = max(box["boxHeight"], req_height)
+
+        saved = self.saved_clusters.get(name) or {}
+        clusters = {}
+        if saved:
+            grid = OccupancyGrid(box["boxWidth"], box["boxHeight"], first_row=1)
+            pending = []
+            for subcat, ids in subcat_items.items():
+                if not ids:
+                    continue
+                width, height = cluster_size(len(ids))
+                if subcat in saved:
+                    s = saved[subcat]
+                    cluster = {
+                        "subcategory": subcat,
+                        "localCol": s["localCol"],
+                        "localRow": s["localRow"],
+                        "width": max(s["width"], width),
+                        "height": max(s["height"], height),
+                        "itemCount": len(ids),
+                    }
+                    clusters[subcat] = cluster
+                    grid.occupy(cluster["localCol"], cluster["localRow"], cluster["width"], cluster["height"])
+                else:
+                    pending.append((subcat, len(ids), width, height))
+            for subcat, count, width, height in pending:
+                col, row = grid.find_region(width, height)
+                grid.occupy(col, row, width, height)
+                clusters[subcat] = {
+                    "subcategory": subcat,
+                    "localCol": col,
+                    "localRow": row,
+                    "width": width,
+                    "height": height,
+                    "itemCount": count,
+                }
+        else:
+            for cluster in shelf_pack_clusters(subcat_items, box["boxWidth"]):
+                clusters[cluster["subcategory"]] = cluster
+
+        self.clusters[name] = clusters
+        for subcat in clusters:
+            self._place_cluster_items(name, subcat)
+
+    def _place_cluster_items(self, name, subcat):
+        box = self.boxes[name]
+        cluster = self.clusters[name][subcat]
+        ids = self.by_subcategory[name][subcat]
+        grid = OccupancyGrid(cluster["width"], cluster["height"])
+
+        placed = {}
+        unplaced = []
+        for item_id in ids:
+            item = self.items[item_id]
+            col, row = item.get("localCol"), item.get("localRow")
+            if col is not None and row is not None and grid.is_free(col, row):
+                grid.occupy(col, row)
+                placed[item_id] = (col, row)
+            else:
+                unplaced.append(item_id)
+        for item_id in unplaced:
+            col, row = grid.next_free()
+            grid.occupy(col, row)
+            placed[item_id] = (col, row)
+
+        for item_id in ids:
+            col, row = placed[item_id]
+            abs_col = box["gridCol"] + cluster["localCol"] + col
+            abs_row = box["gridRow"] + cluster["localRow"] + row
+            self.positions[item_id] = {
+                "x": abs_col * CELL_WIDTH + CELL_WIDTH / 2,
+                "y": abs_row * CELL_HEIGHT + CELL_HEIGHT / 2,
+                "boxName": name,
+                "clusterName": subcat,
+                "localCol": col,
+                "localRow": row,
+                "clusterCol": cluster["localCol"],
+                "clusterRow": cluster["localRow"],
+            }
+
+    # ---------- incremental updates ----------
+
+    def move_item(self, item_id, local_col, local_row):
+        """Saved position changed (None, None clears it); re-place its cluster only.
+
+        Returns False if the item isn't in the layout so the caller can rebuild.
+        """
+        item = self.items.get(item_id)
+        if item is None:
+            return False
+        item["localCol"] = local_col
+        item["localRow"] = local_row
+        name, subcat = self._keys(item)
+        if subcat not in self.clusters.get(name, {}):
+            return False
+        self._place_cluster_items(name, subcat)
+        return True
+
+    def set_box(self, name, grid_col, grid_row, box_width, box_height):
+        """Category box moved or resized; re-place only the boxes that changed"""
+        cat = self.categories.setdefault(name, {"name": name, "displayName": name})
+        if name not in self.category_order:
+            self.category_order.append(name)
+        cat.update(gridCol=grid_col, gridRow=grid_row, boxWidth=box_width, boxHeight=box_height)
+
+        old_base = self._base_boxes
+        self._base_boxes = self._place_boxes()
+        for box_name, base in self._base_boxes.items():
+            if box_name == name or old_base.get(box_name) != base:
+                self.boxes[box_name] = dict(base)
+                self._place_category(box_name)
+        for box_name in set(old_base) - set(self._base_boxes):
+            del self.boxes[box_name]
+            self._drop_category(box_name)
+
+    def set_cluster(self, name, subcat, local_col, local_row, width, height):
+        """Cluster saved at a new position; re-place its category"""
+        self.saved_clusters.setdefault(name, {})[subcat] = {
+            "localCol": local_col, "localRow": local_row, "width": width, "height": height,
+        }
+        if name in self.boxes:
+            self._place_category(name)
+
+    def remove_cluster(self, name, subcat):
+        saved = self.saved_clusters.get(name)
+        if saved and subcat in saved:
+            del saved[subcat]
+            if name in self.boxes:
+                self._place_category(name)
+
+    def _drop_category(self, name):
+        self.clusters.pop(name, None)
+        for item_id in [i for i, p in self.positions.items() if p["boxName"] == name]:
+            del self.positions[item_id]
+
+    def to_json(self):
+        return {
+            "cell": {"width": CELL_WIDTH, "height": CELL_HEIGHT},
+            "boxes": self.boxes,
+            "clusters": self.clusters,
+            "items": self.positions,
+        }
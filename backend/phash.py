@@ -0,0 +1,66 @@
+"""Perceptual hashes for spotting re-uploads of the same photo.
+
+dhash() is a 64-bit difference hash: the image is shrunk to 9x8 grayscale
+and each bit says whether a pixel is brighter than its right neighbour.
+Re-encoding, resizing and small edits leave most bits alone, so two copies
+of a photo land within a few bits of each other.
+
+Lookups use multi-index hashing: the hash is cut into BANDS disjoint bit
+ranges, each stored in its own indexed column. Two hashes within
+MAX_DISTANCE bits of each other must agree exactly on at least one band
+(pigeonhole, since BANDS = MAX_DISTANCE + 1), so an indexed OR over the
+bands finds every candidate and hamming() filters them.
+
+Pillow is optional: without it dhash() returns None and uploads skip the
+duplicate check.
+"""
+import io
+
+MAX_DISTANCE = 4
+BANDS = MAX_DISTANCE + 1
+_BAND_BITS = [64 // BANDS + (1 if i < 64 % BANDS else 0) for i in range(BANDS)]
+
+
+def dhash(data):
+    """64-bit dHash of encoded image bytes or a binary file object, or None
+    if they can't be decoded. A file object is left at an arbitrary position."""
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    try:
+        with Image.open(io.BytesIO(data) if isinstance(data, bytes) else data) as img:
+            img.draft('L', (64, 64))  # Let the JPEG decoder downscale for us
+            small = img.convert('L').resize((9, 8), Image.LANCZOS)
+    except Exception:
+        return None
+    px = small.tobytes()
+    h = 0
+    for row in range(8):
+        for col in range(8):
+            i = row * 9 + col
+            h = (h << 1) | (px[i] > px[i + 1])
+    return h
+
+
+def bands(h):
+    """The BANDS disjoint bit ranges of h, high bits first"""
+    out = []
+    shift = 64
+    for bits in _BAND_BITS:
+        shift -= bits
+        out.append((h >> shift) & ((1 << bits) - 1))
+    return out
+
+
+def hamming(a, b):
+    return (a ^ b).bit_count()
+
+
+def to_sql(h):
+    """SQLite integers are signed 64-bit"""
+    return h - (1 << 64) if h >= 1 << 63 else h
+
+
+def from_sql(v):
+    return v + (1 << 64) if v < 0 else v
@@ -0,0 +1,177 @@
+"""Token-bucket rate limiting and concurrency caps for expensive routes.
+
+Buckets live in process memory by default. Set RATE_LIMIT_STORE=sqlite
+(and optionally RATE_LIMIT_SQLITE_PATH) to share them between the gunicorn
+workers on one host through a local SQLite file.
+
+Over the rate limit a route returns 429; over its concurrency cap it
+returns 503. Both responses include Retry-After.
+
+A bucket that has refilled completely is the same as no bucket, so each
+one records when that happens (full_at) and both stores drop those:
+memory once it holds more than MAX_BUCKETS, SQLite every PRUNE_INTERVAL
+seconds.
+"""
+import math
+import os
+import sqlite3
+import threading
+import time
+from functools import wraps
+
+from flask import jsonify, request
+
+MAX_BUCKETS = 10000
+PRUNE_INTERVAL = 60
+
+
+class MemoryBucketStore:
+    """Buckets in a dict; per-process"""
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._prune_above = MAX_BUCKETS
+
+    def take(self, key, rate, burst, cost=1.0):
+        """Try to spend cost tokens. Returns (allowed, seconds until allowed)"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated, _ = self._buckets.get(key, (burst, now, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now, now + (burst - tokens) / rate)
+            if len(self._buckets) > self._prune_above:
+                self._prune(now)
+        return (True, 0.0) if allowed else (False, (cost - tokens) / rate)
+
+    def _prune(self, now):
+        full = [k for k, (_, _, full_at) in self._buckets.items() if full_at <= now]
+        for k in full:
+            del self._buckets[k]
+        # If most buckets are still filling, don't rescan on every request
+        self._prune_above = max(MAX_BUCKETS, 2 * len(self._buckets))
+
+
+class SqliteBucketStore:
+    """Buckets in a local SQLite file, shared by every worker on the host"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        db = self._db()
+        db.execute('''
+            CREATE TABLE IF NOT EXISTS buckets (
+                key TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated REAL NOT NULL,
+                full_at REAL NOT NULL DEFAULT 0
+            )
+        ''')
+        try:
+            db.execute('ALTER TABLE buckets ADD COLUMN full_at REAL NOT NULL DEFAULT 0')
+        except sqlite3.OperationalError:
+            pass  # Already there
+        db.execute('CREATE INDEX IF NOT EXISTS idx_buckets_full_at ON buckets (full_at)')
+        self._pruned = time.time()
+
+    def _db(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            self._local.db = db
+        return db
+
+    def take(self, key, rate, burst, cost=1.0):
+        now = time.time()  # Wall clock: shared between processes
+        db = self._db()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            row = db.execute('SELECT tokens, updated FROM buckets WHERE key = ?', [key]).fetchone()
+            tokens, updated = row if row else (burst, now)
+            tokens = min(burst, tokens + max(0.0, now - updated) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            db.execute('INSERT OR REPLACE INTO buckets (key, tokens, updated, full_at) VALUES (?, ?, ?, ?)',
+                       [key, tokens, now, now + (burst - tokens) / rate])
+            db.execute('COMMIT')
+        except Exception:
+            db.execute('ROLLBACK')
+            raise
+        if now - self._pruned > PRUNE_INTERVAL:
+            self._pruned = now
+            db.execute('DELETE FROM buckets WHERE full_at <= ?', [now])
+        return (True, 0.0) if allowed else (False, (cost - tokens) / rate)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if os.getenv('RATE_LIMIT_STORE', 'memory') == 'sqlite':
+                    _store = SqliteBucketStore(os.getenv('RATE_LIMIT_SQLITE_PATH', '/tmp/inventory-ratelimit.db'))
+                else:
+                    _store = MemoryBucketStore()
+    return _store
+
+
+def client_ip():
+    return request.remote_addr or 'unknown'
+
+
+def _retry_response(status, error, retry_after):
+    response = jsonify({"error": error, "retryAfter": retry_after})
+    response.status_code = status
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+
+def rate_limit(name, per_minute, burst=None, key='ip', user=None, max_concurrent=None):
+    """Decorator: token bucket of per_minute requests (bursting to burst)
+    keyed by client IP ('ip'), by user ('user', falling back to IP when
+    anonymous) or both ('ip+user'). max_concurrent caps in-flight requests
+    to the route in this process; extra ones are shed with 503.
+
+    user is a callable returning the current user name or None.
+    Setting RATE_LIMIT_DISABLED=1 turns every limit off.
+    """
+    rate = per_minute / 60.0
+    burst = burst or per_minute
+    slots = threading.BoundedSemaphore(max_concurrent) if max_concurrent else None
+
+    def bucket_key():
+        ip = client_ip()
+        username = user() if user else None
+        if key == 'user':
+            return f'{name}:user:{username}' if username else f'{name}:ip:{ip}'
+        if key == 'ip+user':
+            return f'{name}:ip:{ip}:user:{username or "-"}'
+        return f'{name}:ip:{ip}'
+
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            if os.getenv('RATE_LIMIT_DISABLED') == '1':
+                return f(*args, **kwargs)
+            allowed, wait = get_store().take(bucket_key(), rate, burst)
+            if not allowed:
+                return _retry_response(429, "Too many requests", max(1, math.ceil(wait)))
+            if slots is None:
+                return f(*args, **kwargs)
+            if not slots.acquire(blocking=False):
+                return _retry_response(503, "Server busy, try again shortly", 1)
+            try:
+                return f(*args, **kwargs)
+            finally:
+                slots.release()
+        return decorated
+    return decorator
@@ -0,0 +1,228 @@
+"""Item and community rows: column lists, privacy projections and the
+row -> JSON mappers shared by the blueprints."""
+import random
+import json
+from functools import lru_cache
+from operator import itemgetter
+
+from flask import request
+
+# Column name -> JSON key for item rows, in the order routes SELECT them
+ITEM_FIELDS = (
+    ('id', 'id'),
+    ('item_name', 'itemName'),
+    ('description', 'description'),
+    ('category', 'category'),
+    ('origin', 'origin'),
+    ('main_photo', 'mainPhoto'),
+    ('created_at', 'createdAt'),
+    ('subcategory', 'subcategory'),
+    ('secondhand', 'secondhand'),
+    ('last_edited', 'lastEdited'),
+    ('gifted', 'gifted'),
+    ('private', 'private'),
+    ('materials', 'materials'),
+    ('private_photos', 'privatePhotos'),
+    ('private_description', 'privateDescription'),
+    ('private_origin', 'privateOrigin'),
+    ('pinned_x', 'pinnedX'),  # DEPRECATED
+    ('pinned_y', 'pinnedY'),  # DEPRECATED
+    ('local_col', 'localCol'),
+    ('local_row', 'localRow'),
+    ('version', 'version'),
+)
+ITEM_COLUMN_NAMES = tuple(column for column, _ in ITEM_FIELDS)
+ITEM_COLUMNS = ', '.join(ITEM_COLUMN_NAMES)
+
+COMMUNITY_FIELDS = (
+    ('id', 'id'),
+    ('item_name', 'itemName'),
+    ('description', 'description'),
+    ('category', 'category'),
+    ('origin', 'origin'),
+    ('main_photo', 'mainPhoto'),
+    ('created_at', 'createdAt'),
+    ('subcategory', 'subcategory'),
+    ('submitted_by', 'submittedBy'),
+    ('approved', 'approved'),
+)
+COMMUNITY_COLUMN_NAMES = tuple(column for column, _ in COMMUNITY_FIELDS)
+COMMUNITY_COLUMNS = ', '.join(COMMUNITY_COLUMN_NAMES)
+
+# What each role may see of an item, decided in SQL. Non-admins get the
+# privacy flags (the UI still shows a locked/blurred card) but the private
+# values themselves come back NULL, and admin-only columns aren't selected.
+# Friends see what the public sees, plus lastEdited; like the frontend,
+# only the admin sees private content.
+ITEM_PRIVATE = "private IN ('true', 1)"
+PRIVACY_FLAGS = {
+    'item_name': (ITEM_PRIVATE,),
+    'description': (ITEM_PRIVATE, "private_description IN ('true', 1)"),
+    'origin': (ITEM_PRIVATE, "private_origin IN ('true', 1)"),
+    'main_photo': (ITEM_PRIVATE, "private_photos IN ('true', 1)"),
+    'secondhand': (ITEM_PRIVATE,),
+    'gifted': (ITEM_PRIVATE,),
+    'materials': (ITEM_PRIVATE,),
+}
+ADMIN_ONLY_COLUMNS = {
+    'public': ('last_edited', 'pinned_x', 'pinned_y'),
+    'friend': ('pinned_x', 'pinned_y'),
+    'admin': (),
+}
+
+@lru_cache(maxsize=None)
+def item_projection(role, table=''):
+    """(fields, select list) for role; table qualifies columns for joins, e.g. 'item.'"""
+    if role == 'admin':
+        return ITEM_FIELDS, ', '.join(f'{table}{c}' for c in ITEM_COLUMN_NAMES)
+    hidden = ADMIN_ONLY_COLUMNS.get(role, ADMIN_ONLY_COLUMNS['public'])
+    fields = tuple((c, key) for c, key in ITEM_FIELDS if c not in hidden)
+    select = []
+    for column, _ in fields:
+        flags = PRIVACY_FLAGS.get(column)
+        if flags:
+            condition = ' OR '.join(f'{table}{flag}' for flag in flags)
+            select.append(f'CASE WHEN {condition} THEN NULL ELSE {table}{column} END AS {column}')
+        else:
+            select.append(f'{table}{column}')
+    return fields, ', '.join(select)
+
+def visible_photos_sql(role):
+    """item_photos rows role may see: photos of private items (or with
+    private photos) are dropped for everyone but the admin"""
+    if role == 'admin':
+        return 'SELECT * FROM item_photos'
+    return (
+        'SELECT item_photos.* FROM item_photos JOIN item ON item.id = item_photos.item_id '
+        f"WHERE NOT (item.{ITEM_PRIVATE} OR item.private_photos IN ('true', 1))"
+    )
+
+@lru_cache(maxsize=4096)
+def decode_materials(raw):
+    """Parse a materials JSON string once per distinct value.
+
+    Most items share a handful of material mixes, so the parsed lists are
+    cached and shared between rows - treat them as read-only.
+    """
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return None
+
+@lru_cache(maxsize=64)
+def compile_row_mapper(columns, fields=ITEM_FIELDS):
+    """Build a row -> dict function for one query shape.
+
+    columns is the cursor's column names. Keys in fields that the query
+    didn't select come back as None so every response has the same shape.
+    """
+    key_for = dict(fields)
+    picked = [(key_for[column], idx) for idx, column in enumerate(columns) if column in key_for]
+    keys = tuple(key for key, _ in picked)
+    indexes = [idx for _, idx in picked]
+    if len(indexes) == 1:
+        only = indexes[0]
+        getter = lambda values: (values[only],)
+    else:
+        getter = itemgetter(*indexes)
+    missing = {key: None for _, key in fields if key not in keys}
+    decode = 'materials' in keys
+
+    def map_row(row):
+        # libsql_client rows wrap a plain tuple; indexing that directly
+        # skips Row.__getitem__'s per-call isinstance check
+        item = dict(zip(keys, getter(getattr(row, '_values', row))))
+        if missing:
+            item.update(missing)
+        if decode:
+            raw = item['materials']
+            item['materials'] = decode_materials(raw) if raw else None
+        return item
+
+    return map_row
+
+def map_rows(result, fields=ITEM_FIELDS):
+    """Convert every row of a result set using its column metadata"""
+    map_row = compile_row_mapper(tuple(result.columns), fields)
+    return [map_row(row) for row in result.rows]
+
+def row_to_dict(row, columns=ITEM_COLUMN_NAMES):
+    """Convert a single item row selected with ITEM_COLUMNS"""
+    return compile_row_mapper(tuple(columns))(row)
+
+def get_item_photos(conn, item_id, role='admin'):
+    """Get all photos for an item that role may see, ordered by position"""
+    result = conn.execute(
+        f'SELECT id, url, position, created_at FROM ({visible_photos_sql(role)}) WHERE item_id = ? ORDER BY position ASC',
+        [item_id]
+    )
+    return [{"id": row[0], "url": row[1], "position": row[2], "createdAt": row[3]} for row in result.rows]
+
+def row_to_dict_with_photos(row, conn):
+    """Convert row to dict and include photos array"""
+    item = row_to_dict(row)
+    item["photos"] = get_item_photos(conn, item["id"])
+    return item
+
+def community_row_to_dict(row, columns=COMMUNITY_COLUMN_NAMES):
+    return compile_row_mapper(tuple(columns), COMMUNITY_FIELDS)(row)
+
+IN_CHUNK = 100  # Bound parameters per IN (...) list
+
+def chunked(seq, size=IN_CHUNK):
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
+MAX_RANDOM_ITEMS = 50
+
+def sample_rows(conn, table, columns, n, where=None, attempts=3):
+    """Pick up to n distinct random rows without sorting the table.
+
+    Probes random rowids between MIN(rowid) and MAX(rowid) (both index
+    lookups) with one IN (...) query per attempt; exact hits are uniform
+    over the rows that exist. If gaps or the where filter leave us short,
+    we step to the nearest row before or after a random rowid instead,
+    which still takes constant time. That favours rows next to big gaps,
+    and gives the first and last rows half the chance of the rest.
+    """
+    condition = f' AND {where}' if where else ''
+    bounds = conn.execute(f'SELECT MIN(rowid), MAX(rowid) FROM {table}')
+    lo, hi = bounds.rows[0] if bounds.rows else (None, None)
+    if lo is None:
+        return []
+
+    found = {}
+    for _ in range(attempts):
+        need = n - len(found)
+        candidates = [r for r in random.sample(range(lo, hi + 1), min(hi - lo + 1, need * 2 + 4)) if r not in found]
+        if not candidates:
+            break
+        placeholders = ', '.join('?' * len(candidates))
+        result = conn.execute(f'SELECT rowid, {columns} FROM {table} WHERE rowid IN ({placeholders}){condition}', candidates)
+        order = {rowid: i for i, rowid in enumerate(candidates)}
+        for row in sorted(result.rows, key=lambda row: order[row[0]]):
+            if len(found) < n:
+                found[row[0]] = row
+        if len(found) >= n:
+            return list(found.values())
+
+    for _ in range(n * 4 + 8):  # Steps can land on rows already found
+        if len(found) >= n:
+            break
+        # Only walking forward, the first row could only be hit exactly
+        op, order, wrap = random.choice((('>=', 'ASC', lo), ('<=', 'DESC', hi)))
+        step = f'SELECT rowid, {columns} FROM {table} WHERE rowid {op} ?{condition} ORDER BY rowid {order} LIMIT 1'
+        result = conn.execute(step, [random.randint(lo, hi)])
+        if not result.rows:
+            result = conn.execute(step, [wrap])
+        if not result.rows:
+            break  # Nothing matches the filter at all
+        found.setdefault(result.rows[0][0], result.rows[0])
+    return list(found.values())
+
+def random_count():
+    """?n= for the random endpoints, or None for the single-item form"""
+    n = request.args.get('n', type=int)
+    if n is None:
+        return None
+    return max(1, min(n, MAX_RANDOM_ITEMS))
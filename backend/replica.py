@@ -0,0 +1,378 @@
+"""Read replicas: serve reads for @read_only routes from a replica,
+send writes to the Turso primary.
+
+Two kinds, both behind ReplicaClient:
+
+  * Embedded (TURSO_REPLICA_PATH): a local libsql replica file that we
+    sync from the primary ourselves. Each worker process gets its own
+    file, TURSO_REPLICA_PATH.0, .1, ... (see claim_replica_file).
+  * Remote (TURSO_READ_REPLICA_URL, optionally TURSO_READ_REPLICA_AUTH_TOKEN):
+    a replica at its own URL, e.g. a Turso read replica closer to us, or a
+    file: URL in tests. Replication isn't ours, so its lag is measured with
+    a heartbeat row (see RemoteReplica).
+
+Other knobs:
+
+    TURSO_REPLICA_SYNC_INTERVAL   seconds between background syncs or
+                                  heartbeat checks (default 30)
+    TURSO_REPLICA_MAX_STALENESS   reads fall back to the primary once the
+                                  replica may be older than this (default 120)
+    TURSO_REPLICA_SYNC_ON_WRITE   "0" to skip the sync after each write (default on)
+
+Every write, from any route, marks the replica dirty so the rest of the
+request reads the primary, and once the request is done it is synced so
+the worker that wrote sees its own change on the next read. If that sync
+fails the replica stays dirty and reads go to the primary until a sync
+succeeds again.
+"""
+import itertools
+import logging
+import os
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+READ_PREFIXES = ('SELECT', 'WITH')
+
+
+def is_read(stmt):
+    return stmt.lstrip().upper().startswith(READ_PREFIXES)
+
+
+class LocalResult:
+    """Enough of libsql_client's ResultSet for the routes: .rows and .columns"""
+    __slots__ = ('columns', 'rows')
+
+    def __init__(self, columns, rows):
+        self.columns = columns
+        self.rows = rows
+
+
+class Replica:
+    """One local replica connection per worker process, shared by all requests"""
+
+    def __init__(self, path, sync_url, auth_token, sync_interval=30, max_staleness=120, sync_on_write=True):
+        self.path = path
+        self.sync_url = sync_url
+        self.auth_token = auth_token
+        self.sync_interval = sync_interval
+        self.max_staleness = max_staleness
+        self.sync_on_write = sync_on_write
+        self._conn = None
+        self._lock = threading.Lock()
+        self._last_sync = None
+        # Writes are numbered; a sync only covers those made before it began
+        self._written = 0
+        self._written_lock = threading.Lock()
+        self._synced = 0
+        self._thread = None
+
+    def _connect(self):
+        try:
+            import libsql
+        except ImportError:
+            import libsql_experimental as libsql
+        return libsql.connect(self.path, sync_url=self.sync_url, auth_token=self.auth_token)
+
+    def start(self):
+        """Open the replica, do a first sync and start the background sync thread"""
+        try:
+            self._conn = self._connect()
+        except Exception as e:
+            log.warning('Replica disabled, serving reads from the primary: %s', e)
+            return False
+        self.sync()
+        self._thread = threading.Thread(target=self._sync_loop, name='replica-sync', daemon=True)
+        self._thread.start()
+        return True
+
+    def _sync_loop(self):
+        while True:
+            time.sleep(self.sync_interval)
+            self.sync()
+
+    def sync(self):
+        if self._conn is None:
+            return False
+        written = self._written
+        try:
+            with self._lock:
+                self._conn.sync()
+            self._last_sync = time.monotonic()
+            self._synced = max(self._synced, written)
+            return True
+        except Exception as e:
+            log.warning('Replica sync failed: %s', e)
+            return False
+
+    @property
+    def enabled(self):
+        return self._conn is not None
+
+    @property
+    def dirty(self):
+        return self._written > self._synced
+
+    def fresh(self):
+        if self._conn is None or self.dirty or self._last_sync is None:
+            return False
+        return time.monotonic() - self._last_sync <= self.max_staleness
+
+    def mark_written(self):
+        with self._written_lock:
+            self._written += 1
+
+    def after_write(self):
+        self.mark_written()
+        if self.sync_on_write:
+            self.sync()
+
+    def read(self, stmt, args=None):
+        with self._lock:
+            cursor = self._conn.execute(stmt, tuple(args or ()))
+            rows = cursor.fetchall()
+            columns = tuple(d[0] for d in cursor.description or ())
+        return LocalResult(columns, rows)
+
+    def status(self):
+        return {
+            "enabled": self._conn is not None,
+            "fresh": self.fresh(),
+            "dirty": self.dirty,
+            "secondsSinceSync": round(time.monotonic() - self._last_sync, 3) if self._last_sync else None,
+        }
+
+
+class RemoteReplica:
+    """A read replica at its own URL, with its lag measured by heartbeat.
+
+    Every sync_interval seconds the primary's replica_heartbeat row is
+    stamped with the current time (unless another worker did so recently)
+    and read back from the replica. The replica holds everything written
+    before the stamp it shows, so it's fresh while that stamp is younger
+    than max_staleness. Stamps are wall-clock times, so this assumes the
+    workers' clocks roughly agree.
+    """
+
+    def __init__(self, url, primary_url, auth_token, primary_auth_token=None, sync_interval=30, max_staleness=120):
+        self.url = url
+        self.primary_url = primary_url
+        self.auth_token = auth_token
+        self.primary_auth_token = primary_auth_token
+        self.sync_interval = sync_interval
+        self.max_staleness = max_staleness
+        self.enabled = False
+        self._beat = None
+        self._written_at = None
+        self._thread = None
+
+    def connect(self, primary=False):
+        """A new client for the replica (or the primary); the caller closes it"""
+        from libsql_client import create_client_sync
+        if primary:
+            return create_client_sync(url=self.primary_url, auth_token=self.primary_auth_token)
+        return create_client_sync(url=self.url, auth_token=self.auth_token)
+
+    def start(self):
+        """Set up the heartbeat row, take a first reading and start checking in the background"""
+        try:
+            primary = self.connect(primary=True)
+            try:
+                primary.batch([
+                    'CREATE TABLE IF NOT EXISTS replica_heartbeat (id INTEGER PRIMARY KEY CHECK (id = 1), beat REAL NOT NULL)',
+                    'INSERT OR IGNORE INTO replica_heartbeat (id, beat) VALUES (1, 0)',
+                ])
+            finally:
+                primary.close()
+        except Exception as e:
+            log.warning('Read replica disabled, serving reads from the primary: %s', e)
+            return False
+        self.enabled = True
+        self.sync()
+        self._thread = threading.Thread(target=self._sync_loop, name='replica-heartbeat', daemon=True)
+        self._thread.start()
+        return True
+
+    def _sync_loop(self):
+        while True:
+            time.sleep(self.sync_interval)
+            self.sync()
+
+    def sync(self):
+        """Stamp the heartbeat on the primary and read what the replica has"""
+        if not self.enabled:
+            return False
+        now = time.time()
+        # Don't rewrite the stamp when another worker has just done it, unless
+        # we're waiting to see our own write come through
+        stale_after = now if self._written_at else now - self.sync_interval / 2
+        try:
+            primary = self.connect(primary=True)
+            try:
+                primary.execute('UPDATE replica_heartbeat SET beat = ? WHERE id = 1 AND beat < ?', [now, stale_after])
+            finally:
+                primary.close()
+            replica = self.connect()
+            try:
+                rows = replica.execute('SELECT beat FROM replica_heartbeat WHERE id = 1').rows
+            finally:
+                replica.close()
+        except Exception as e:
+            log.warning('Replica heartbeat failed: %s', e)
+            return False
+        self._beat = rows[0][0] if rows else None
+        if self._written_at and self._beat is not None and self._beat >= self._written_at:
+            self._written_at = None
+        return True
+
+    def fresh(self):
+        if not self.enabled or self._written_at or self._beat is None:
+            return False
+        return time.time() - self._beat <= self.max_staleness
+
+    def after_write(self):
+        """Send reads to the primary until the replica shows a stamp from after this write"""
+        self._written_at = time.time()
+
+    mark_written = after_write
+
+    def status(self):
+        return {
+            "enabled": self.enabled,
+            "url": self.url,
+            "fresh": self.fresh(),
+            "dirty": self._written_at is not None,
+            "secondsBehind": round(time.time() - self._beat, 3) if self._beat else None,
+        }
+
+
+class ReplicaClient:
+    """Drop-in for the libsql_client connection that get_db() hands out
+    while a replica is set up.
+
+    With reads=True (@read_only routes) reads go to the replica while it
+    is fresh; everything else (writes, batches, transactions) goes to the
+    primary. Writes mark the replica dirty straight away, and finish()
+    tells it about them once the request is done.
+    """
+
+    def __init__(self, primary, replica, reads=True):
+        self._primary = primary
+        self._replica = replica
+        self._reads = reads
+        self._reader = None
+        self.wrote = False
+
+    def _read(self, stmt, args):
+        # The embedded replica shares one local connection; a remote one gets
+        # a client per request, like get_db()'s primary
+        if not isinstance(self._replica, RemoteReplica):
+            return self._replica.read(stmt, args)
+        if self._reader is None:
+            self._reader = self._replica.connect()
+        return self._reader.execute(stmt, args)
+
+    def _wrote(self):
+        self.wrote = True
+        self._replica.mark_written()
+
+    def execute(self, stmt, args=None):
+        read = isinstance(stmt, str) and is_read(stmt)
+        if read and self._reads and self._replica.fresh():
+            try:
+                return self._read(stmt, args)
+            except Exception as e:
+                log.warning('Replica read failed, retrying on primary: %s', e)
+        if not read:
+            self._wrote()
+        return self._primary.execute(stmt, args)
+
+    def batch(self, stmts):
+        self._wrote()
+        return self._primary.batch(stmts)
+
+    def finish(self):
+        """After the request: sync (or re-stamp) the replica if anything was written"""
+        if self.wrote:
+            self.wrote = False
+            self._replica.after_write()
+
+    @property
+    def primary(self):
+        """The primary's client, for reads that must not be stale"""
+        return self._primary
+
+    def close(self):
+        """Close the replica client; the primary belongs to get_db()"""
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+
+    def __getattr__(self, name):
+        if name in ('transaction', 'sequence'):
+            self._wrote()
+        return getattr(self._primary, name)
+
+
+_replica = None
+_replica_pid = None
+_replica_lock = threading.Lock()
+_claimed = []  # Lock files this process holds, open until it exits
+
+
+def claim_replica_file(path):
+    """path.N for the lowest N no other live process is using.
+
+    An embedded replica file can't be shared: every gunicorn worker syncing
+    into the same one would corrupt it. Each process holds a lock on the
+    file it claims, and a restarted worker picks up a file its predecessor
+    left, so its first sync only fetches what changed since.
+    """
+    import fcntl
+    for n in itertools.count():
+        candidate = f'{path}.{n}'
+        lock = open(f'{candidate}.lock', 'w')
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock.close()
+            continue  # Another worker's
+        _claimed.append(lock)
+        return candidate
+
+
+def get_replica():
+    """The process-wide Replica or RemoteReplica, or None when replica mode is off or unavailable"""
+    global _replica, _replica_pid
+    path = os.getenv('TURSO_REPLICA_PATH')
+    url = os.getenv('TURSO_READ_REPLICA_URL')
+    if not path and not url:
+        return None
+    # A forked worker can't use its parent's: the sync thread didn't come along
+    if _replica is None or _replica_pid != os.getpid():
+        with _replica_lock:
+            if _replica is None or _replica_pid != os.getpid():
+                options = dict(
+                    sync_interval=float(os.getenv('TURSO_REPLICA_SYNC_INTERVAL', 30)),
+                    max_staleness=float(os.getenv('TURSO_REPLICA_MAX_STALENESS', 120)),
+                )
+                if path:
+                    replica = Replica(
+                        claim_replica_file(path),
+                        os.getenv('TURSO_DATABASE_URL'),
+                        os.getenv('TURSO_AUTH_TOKEN'),
+                        sync_on_write=os.getenv('TURSO_REPLICA_SYNC_ON_WRITE', '1') != '0',
+                        **options,
+                    )
+                else:
+                    replica = RemoteReplica(
+                        url,
+                        os.getenv('TURSO_DATABASE_URL'),
+                        os.getenv('TURSO_READ_REPLICA_AUTH_TOKEN', os.getenv('TURSO_AUTH_TOKEN')),
+                        primary_auth_token=os.getenv('TURSO_AUTH_TOKEN'),
+                        **options,
+                    )
+                replica.start()
+                _replica, _replica_pid = replica, os.getpid()
+    return _replica if _replica.enabled else None
@@ -0,0 +1,94 @@
+"""Full-text search indexes (SQLite FTS5) kept in step by triggers.
+
+A FullTextIndex names a table, the text columns to index and, optionally,
+which rows belong in it, e.g. only approved community items. create()
+makes an external-content FTS5 table, so the text isn't stored twice, plus
+insert/update/delete triggers on the source table. Every write keeps the
+index current in the same transaction, whichever route or migration
+made it. rebuild() repopulates it from scratch.
+
+Rows are matched on rowid, which the index keeps its own copy of, so the
+table needs an INTEGER PRIMARY KEY: otherwise VACUUM may renumber its
+rowids and leave the index pointing at the wrong rows. community_item's
+is seq (see db.migrate_community_keys).
+
+Search with match_query(what the visitor typed) against the index name,
+and rank with rank_sql(). bm25 is lower-is-better, so order ascending.
+"""
+import re
+
+MAX_TERMS = 8
+
+class FullTextIndex:
+    def __init__(self, name, table, columns, where=None, weights=None,
+                 tokenize='porter unicode61 remove_diacritics 2'):
+        self.name = name
+        self.table = table
+        self.columns = tuple(columns)
+        self.where = where  # SQL over {row}, e.g. '{row}.approved = 1'
+        self.weights = tuple(weights or (1.0,) * len(self.columns))
+        self.tokenize = tokenize
+
+    def _belongs(self, row):
+        return self.where.format(row=row) if self.where else '1'
+
+    def _values(self, row):
+        return ', '.join(f'{row}.{column}' for column in self.columns)
+
+    def create_sql(self):
+        columns = ', '.join(self.columns)
+        name = self.name
+        return [
+            f'''CREATE VIRTUAL TABLE IF NOT EXISTS {name} USING fts5(
+                {columns}, content='{self.table}', content_rowid='rowid', tokenize='{self.tokenize}')''',
+            f'''CREATE TRIGGER IF NOT EXISTS {name}_insert AFTER INSERT ON {self.table}
+                WHEN {self._belongs('new')} BEGIN
+                    INSERT INTO {name} (rowid, {columns}) VALUES (new.rowid, {self._values('new')});
+                END''',
+            f'''CREATE TRIGGER IF NOT EXISTS {name}_delete AFTER DELETE ON {self.table}
+                WHEN {self._belongs('old')} BEGIN
+                    INSERT INTO {name} ({name}, rowid, {columns}) VALUES ('delete', old.rowid, {self._values('old')});
+                END''',
+            f'''CREATE TRIGGER IF NOT EXISTS {name}_update AFTER UPDATE ON {self.table} BEGIN
+                    INSERT INTO {name} ({name}, rowid, {columns})
+                        SELECT 'delete', old.rowid, {self._values('old')} WHERE {self._belongs('old')};
+                    INSERT INTO {name} (rowid, {columns})
+                        SELECT new.rowid, {self._values('new')} WHERE {self._belongs('new')};
+                END''',
+        ]
+
+    def rebuild_sql(self):
+        columns = ', '.join(self.columns)
+        return [
+            f"INSERT INTO {self.name} ({self.name}) VALUES ('delete-all')",
+            f'''INSERT INTO {self.name} (rowid, {columns})
+                SELECT rowid, {self._values(self.table)} FROM {self.table} WHERE {self._belongs(self.table)}''',
+        ]
+
+    def create(self, conn, rebuild=True):
+        """Create the index and its triggers (in one transaction), then fill it"""
+        conn.batch(self.create_sql())
+        if rebuild:
+            self.rebuild(conn)
+
+    def rebuild(self, conn):
+        conn.batch(self.rebuild_sql())
+
+    def rank_sql(self):
+        return f'bm25({self.name}, {", ".join(str(w) for w in self.weights)})'
+
+def match_query(text):
+    """What a visitor typed as an FTS5 query: every word must appear, as a
+    prefix so results show up while typing. None if there are no words."""
+    words = re.findall(r'\w+', text or '')[:MAX_TERMS]
+    return ' '.join(f'"{word}"*' for word in words) or None
+
+# Approved submissions only: pending ones aren't public
+COMMUNITY_SEARCH = FullTextIndex(
+    'community_fts', 'community_item',
+    ('item_name', 'description', 'origin', 'subcategory', 'submitted_by'),
+    where='{row}.approved = 1',
+    weights=(10.0, 2.0, 3.0, 3.0, 1.0),
+)
+
+INDEXES = (COMMUNITY_SEARCH,)
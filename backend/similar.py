@@ -0,0 +1,167 @@
+"""Items like this one: cosine similarity over precomputed item vectors.
+
+Every item is one row of a float32 NumPy matrix, made of four blocks:
+
+  * TF-IDF over the words of its name (counted twice), description and
+    origin, limited to the MAX_TERMS words found in the most items (and in
+    at least MIN_ITEMS_PER_TERM)
+  * its category, one-hot
+  * its subcategory, one-hot
+  * its materials, weighted by percentage
+
+Each block is L2-normalized and scaled by BLOCK_WEIGHTS, then the whole row
+is normalized. One matrix-vector product then gives every item's cosine
+similarity to a given item.
+
+The vocabulary, IDF and categorical columns are fixed when the index is
+built. upsert() and remove() change single rows against them; words or
+categories the build didn't see count for nothing until the next build.
+stale() says when enough has changed that a fresh build is due.
+
+Pure NumPy, no database access: blueprints/items.py loads the items and
+keeps one index per worker.
+"""
+import re
+from collections import Counter
+
+import numpy as np
+
+MAX_TERMS = 512  # With the categorical columns, ~2 KB per item
+MIN_ITEMS_PER_TERM = 2
+BLOCK_WEIGHTS = {'text': 1.0, 'category': 0.5, 'subcategory': 0.7, 'materials': 0.5}
+REBUILD_FRACTION = 0.2  # Rebuild once this share of rows changed since the last build
+STOPWORDS = frozenset('''
+    a an and are as at be but by for from had has have her his i in is it its
+    me my of on or our she that the their them they this to was we were with you your
+'''.split())
+
+def words(text):
+    return [word for word in re.findall(r'[a-z0-9]+', (text or '').lower())
+            if len(word) > 1 and word not in STOPWORDS]
+
+def item_terms(item):
+    """Word counts for an item dict, the name counting twice"""
+    return Counter(words(item.get('itemName')) * 2 + words(item.get('description')) + words(item.get('origin')))
+
+def item_materials(item):
+    """[(name, weight)] from an item's decoded materials list"""
+    materials = []
+    for entry in item.get('materials') or []:
+        if not isinstance(entry, dict) or not entry.get('material'):
+            continue
+        try:
+            weight = float(entry.get('percentage')) / 100
+        except (TypeError, ValueError):
+            weight = 1.0
+        materials.append((entry['material'], weight if weight > 0 else 1.0))
+    return materials
+
+def _columns(values):
+    return {value: i for i, value in enumerate(sorted(values))}
+
+class SimilarityIndex:
+    def __init__(self, items):
+        self.build(items)
+
+    def build(self, items):
+        """Fix the vocabulary and columns from items and vectorize them all"""
+        terms = [item_terms(item) for item in items]
+        document_frequency = Counter(term for counts in terms for term in counts)
+        common = sorted((term for term, n in document_frequency.items() if n >= MIN_ITEMS_PER_TERM),
+                        key=lambda term: (-document_frequency[term], term))[:MAX_TERMS]
+        self.vocabulary = {term: i for i, term in enumerate(common)}
+        # Smoothed IDF, as in scikit-learn
+        self.idf = (np.log((1 + len(items)) / (1 + np.array([document_frequency[t] for t in common], dtype=np.float32)))
+                    + 1).astype(np.float32)
+        self.categories = _columns({item['category'] for item in items if item.get('category')})
+        self.subcategories = _columns({(item.get('category'), item['subcategory'])
+                                       for item in items if item.get('subcategory')})
+        self.materials = _columns({name for item in items for name, _ in item_materials(item)})
+
+        sizes = [len(self.vocabulary), len(self.categories), len(self.subcategories), len(self.materials)]
+        self.blocks = dict(zip(BLOCK_WEIGHTS, np.cumsum([0] + sizes[:-1])))
+        self.width = sum(sizes)
+
+        self.ids = [item['id'] for item in items]
+        self.rows = {item_id: row for row, item_id in enumerate(self.ids)}
+        self.versions = {item['id']: item.get('version') for item in items}
+        self.matrix = np.zeros((len(items), self.width), dtype=np.float32)
+        for row, (item, counts) in enumerate(zip(items, terms)):
+            self.matrix[row] = self.vector(item, counts)
+        self.changes = 0
+
+    def vector(self, item, counts=None):
+        vector = np.zeros(self.width, dtype=np.float32)
+        start = self.blocks['text']
+        for term, count in (counts if counts is not None else item_terms(item)).items():
+            column = self.vocabulary.get(term)
+            if column is not None:
+                vector[start + column] = count * self.idf[column]
+        category = self.categories.get(item.get('category'))
+        if category is not None:
+            vector[self.blocks['category'] + category] = 1
+        subcategory = self.subcategories.get((item.get('category'), item.get('subcategory')))
+        if subcategory is not None:
+            vector[self.blocks['subcategory'] + subcategory] = 1
+        start = self.blocks['materials']
+        for name, weight in item_materials(item):
+            column = self.materials.get(name)
+            if column is not None:
+                vector[start + column] += weight
+
+        bounds = list(self.blocks.values()) + [self.width]
+        for (block, weight), lo, hi in zip(BLOCK_WEIGHTS.items(), bounds, bounds[1:]):
+            norm = np.linalg.norm(vector[lo:hi])
+            if norm:
+                vector[lo:hi] *= weight / norm
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def upsert(self, items):
+        """Re-vectorize changed items and append new ones"""
+        added = []
+        for item in items:
+            row = self.rows.get(item['id'])
+            if row is None:
+                self.rows[item['id']] = len(self.ids) + len(added)
+                added.append(self.vector(item))
+                self.ids.append(item['id'])
+            else:
+                self.matrix[row] = self.vector(item)
+            self.versions[item['id']] = item.get('version')
+        if added:
+            self.matrix = np.vstack([self.matrix, np.array(added, dtype=np.float32)])
+        self.changes += len(items)
+
+    def remove(self, item_ids):
+        rows = [self.rows[item_id] for item_id in item_ids if item_id in self.rows]
+        if not rows:
+            return
+        self.matrix = np.delete(self.matrix, rows, axis=0)
+        dropped = set(rows)
+        self.ids = [item_id for row, item_id in enumerate(self.ids) if row not in dropped]
+        self.rows = {item_id: row for row, item_id in enumerate(self.ids)}
+        for item_id in item_ids:
+            self.versions.pop(item_id, None)
+        self.changes += len(rows)
+
+    def stale(self):
+        return self.changes > REBUILD_FRACTION * max(len(self.ids), 10)
+
+    def neighbours(self, item_id, k):
+        """Up to k (id, similarity) pairs most like item_id, best first; None if it isn't indexed"""
+        row = self.rows.get(item_id)
+        if row is None:
+            return None
+        scores = self.matrix @ self.matrix[row]
+        scores[row] = -np.inf
+        k = min(k, len(scores) - 1)
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(self.ids[j], float(scores[j])) for j in top if scores[j] > 0]
+
+    def status(self):
+        return {"items": len(self.ids), "terms": len(self.vocabulary), "width": self.width,
+                "bytes": self.matrix.nbytes, "changesSinceBuild": self.changes}
@@ -0,0 +1,236 @@
+"""Where uploaded photos live.
+
+Two backends share one interface:
+
+    save(stream, filename)   store the upload, return its public URL
+    delete(url)              remove the asset behind a URL we issued
+    asset_id(url)            the backend's id for a URL, None if it isn't ours
+    list_assets()            every stored asset, as Asset tuples (for GC)
+    delete_assets(ids)       bulk delete, returns the ids actually deleted
+
+CloudinaryStorage is the original behaviour. LocalStorage keeps files on
+disk, content-addressed: each file is named by the SHA-256 of its bytes, so
+uploading the same photo twice stores it once. Uploads are hashed while
+they are copied to a temp file in CHUNK_SIZE pieces and then renamed into
+place, so a large upload never sits in memory.
+
+Pick the backend with PHOTO_STORAGE=cloudinary (default) or
+PHOTO_STORAGE=local, plus PHOTO_STORAGE_DIR and PHOTO_BASE_URL, which
+LocalStorage requires: the URLs it issues are stored and shown to every
+visitor, so they can't come from the uploading request's Host header.
+Local files are served by GET /photos/<shard>/<sha256>.<ext>.
+
+The Cloudinary SDK is imported and configured (CLOUDINARY_CLOUD_NAME,
+CLOUDINARY_API_KEY, CLOUDINARY_API_SECRET) the first time it is needed,
+not on startup. Uploads go to the CLOUDINARY_FOLDER folder (default
+inventory), and list_assets() only lists that folder, so image GC never
+touches anything else in the account.
+"""
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from collections import namedtuple
+from datetime import datetime, timezone
+
+CHUNK_SIZE = 1 << 16
+Asset = namedtuple('Asset', 'id bytes created_at')  # created_at: epoch seconds
+
+_VERSION = re.compile(r'v\d+')
+_EXTENSION = re.compile(r'[a-z0-9]{1,5}')
+_LOCAL_NAME = re.compile(r'([0-9a-f]{2})/([0-9a-f]{64})(?:\.([a-z0-9]{1,5}))?')
+
+
+def cloudinary_public_id(url):
+    """Public id of a res.cloudinary.com delivery URL, or None for anything else.
+
+    https://res.cloudinary.com/<cloud>/image/upload/v1712/folder/abc.jpg -> folder/abc
+    """
+    if not url or 'res.cloudinary.com/' not in url or '/upload/' not in url:
+        return None
+    path = url.split('/upload/', 1)[1].split('?', 1)[0]
+    parts = path.split('/')
+    # Skip transformation segments up to and including the version, if any
+    for i, part in enumerate(parts):
+        if _VERSION.fullmatch(part):
+            parts = parts[i + 1:]
+            break
+    if not parts or not parts[-1]:
+        return None
+    parts[-1] = parts[-1].rsplit('.', 1)[0]
+    return '/'.join(parts)
+
+
+_cloudinary_configured = False
+
+
+def cloudinary_sdk():
+    """The cloudinary package, configured from the environment on first use"""
+    global _cloudinary_configured
+    import cloudinary
+    import cloudinary.api
+    import cloudinary.uploader
+    if not _cloudinary_configured:
+        cloudinary.config(
+            cloud_name=os.getenv('CLOUDINARY_CLOUD_NAME'),
+            api_key=os.getenv('CLOUDINARY_API_KEY'),
+            api_secret=os.getenv('CLOUDINARY_API_SECRET')
+        )
+        _cloudinary_configured = True
+    return cloudinary
+
+
+class CloudinaryStorage:
+    name = 'cloudinary'
+
+    @property
+    def folder(self):
+        # Read on use: app.py loads .env after importing this module
+        return os.getenv('CLOUDINARY_FOLDER', 'inventory').strip('/')
+
+    def save(self, stream, filename=None):
+        options = {'folder': self.folder} if self.folder else {}
+        return cloudinary_sdk().uploader.upload(stream, **options)['secure_url']
+
+    def asset_id(self, url):
+        return cloudinary_public_id(url)
+
+    def delete(self, url):
+        public_id = self.asset_id(url)
+        if public_id:
+            cloudinary_sdk().uploader.destroy(public_id)
+
+    def list_assets(self):
+        """Assets in our folder; photos uploaded before there was one aren't listed"""
+        if not self.folder:
+            raise RuntimeError('Set CLOUDINARY_FOLDER: without one, GC would list the whole Cloudinary account')
+        cloudinary = cloudinary_sdk()
+        cursor = None
+        while True:
+            options = {'next_cursor': cursor} if cursor else {}
+            page = cloudinary.api.resources(type='upload', resource_type='image', prefix=f'{self.folder}/',
+                                            max_results=500, **options)
+            for r in page.get('resources', []):
+                created = datetime.strptime(r['created_at'], '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc)
+                yield Asset(r['public_id'], r.get('bytes', 0), created.timestamp())
+            cursor = page.get('next_cursor')
+            if not cursor:
+                return
+
+    def delete_assets(self, ids):
+        """Delete up to 100 assets in one Admin API call"""
+        result = cloudinary_sdk().api.delete_resources(list(ids))
+        return [pid for pid, status in result.get('deleted', {}).items() if status == 'deleted']
+
+
+class LocalStorage:
+    """Files at <root>/<first two hex digits>/<sha256>; the URL's extension is cosmetic"""
+    name = 'local'
+
+    def __init__(self, root, base_url=None):
+        self.root = root
+        self.base_url = base_url.rstrip('/') if base_url else None
+        os.makedirs(os.path.join(root, '.tmp'), exist_ok=True)
+
+    def _url_prefix(self):
+        if not self.base_url:
+            raise RuntimeError('LocalStorage needs a base_url (PHOTO_BASE_URL) to issue photo URLs')
+        return self.base_url + '/photos/'
+
+    def path(self, digest):
+        return os.path.join(self.root, digest[:2], digest)
+
+    def save(self, stream, filename=None):
+        ext = (filename or '').rsplit('.', 1)[-1].lower() if '.' in (filename or '') else ''
+        ext = ext if _EXTENSION.fullmatch(ext) else 'jpg'
+        hasher = hashlib.sha256()
+        with tempfile.NamedTemporaryFile(dir=os.path.join(self.root, '.tmp'), delete=False) as tmp:
+            try:
+                while True:
+                    chunk = stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    hasher.update(chunk)
+                    tmp.write(chunk)
+            except BaseException:
+                os.unlink(tmp.name)
+                raise
+        digest = hasher.hexdigest()
+        path = self.path(digest)
+        if os.path.exists(path):
+            os.unlink(tmp.name)  # Same bytes already stored
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp.name, path)
+        return f'{self._url_prefix()}{digest[:2]}/{digest}.{ext}'
+
+    def resolve(self, name):
+        """(path, extension) for a /photos/ name like 'ab/ab12...ef.jpg', or None"""
+        m = _LOCAL_NAME.fullmatch(name)
+        if not m or not m.group(2).startswith(m.group(1)):
+            return None
+        path = self.path(m.group(2))
+        return (path, m.group(3)) if os.path.isfile(path) else None
+
+    def asset_id(self, url):
+        if not url or '/photos/' not in url:
+            return None
+        m = _LOCAL_NAME.fullmatch(url.rsplit('/photos/', 1)[1])
+        return m.group(2) if m else None
+
+    def delete(self, url):
+        digest = self.asset_id(url)
+        if digest:
+            try:
+                os.unlink(self.path(digest))
+            except FileNotFoundError:
+                pass
+
+    def list_assets(self):
+        for entry in os.scandir(self.root):
+            if entry.is_dir() and entry.name != '.tmp':
+                for f in os.scandir(entry.path):
+                    st = f.stat()
+                    yield Asset(f.name, st.st_size, st.st_mtime)
+
+    def delete_assets(self, ids):
+        deleted = []
+        for digest in ids:
+            try:
+                os.unlink(self.path(digest))
+                deleted.append(digest)
+            except FileNotFoundError:
+                pass
+        return deleted
+
+
+_storage = None
+_cloudinary = CloudinaryStorage()
+_storage_lock = threading.Lock()
+
+
+def get_storage():
+    """The configured backend for new uploads; raises RuntimeError if it's misconfigured"""
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                if os.getenv('PHOTO_STORAGE', 'cloudinary') == 'local':
+                    if not os.getenv('PHOTO_BASE_URL'):
+                        raise RuntimeError('PHOTO_STORAGE=local needs PHOTO_BASE_URL, e.g. https://api.example.com')
+                    _storage = LocalStorage(os.getenv('PHOTO_STORAGE_DIR', 'photos'), os.getenv('PHOTO_BASE_URL'))
+                else:
+                    _storage = _cloudinary
+    return _storage
+
+
+def storage_for_url(url):
+    """The backend that issued url. Photos uploaded before a switch of
+    PHOTO_STORAGE still belong to the old backend."""
+    storage = get_storage()
+    if storage.asset_id(url):
+        return storage
+    if _cloudinary.asset_id(url):
+        return _cloudinary
+    return None
@@ -0,0 +1,54 @@
+"""The public cache follows data_meta, whichever connection wrote"""
+import sqlite3
+
+import pytest
+
+import cache
+
+def write(path, sql, args=()):
+    """Outside the app, as another worker or a migration would"""
+    db = sqlite3.connect(path)
+    db.execute(sql, args)
+    db.commit()
+    db.close()
+
+def names(client, path='/'):
+    return {item.get('itemName') or item.get('displayName') for item in client.get(path).get_json()}
+
+@pytest.fixture
+def recheck(monkeypatch):
+    monkeypatch.setattr(cache, 'PUBLIC_CACHE_RECHECK', 0)
+
+def test_item_writes_invalidate_the_list(client, catalog, recheck):
+    item_id = catalog['item_ids'][0]
+    assert 'Renamed elsewhere' not in names(client)
+    write(catalog['path'], "UPDATE item SET item_name = 'Renamed elsewhere' WHERE id = ?", [item_id])
+    assert 'Renamed elsewhere' in names(client)
+    write(catalog['path'], 'DELETE FROM item WHERE id = ?', [item_id])
+    assert item_id not in {item['id'] for item in client.get('/').get_json()}
+
+def test_taxonomy_writes_invalidate_categories_only(client, catalog, recheck):
+    client.get('/')
+    client.get('/categories')
+    items_entry = cache._entries['items']
+    write(catalog['path'], "INSERT INTO categories (id, name, display_name) VALUES ('c-new', 'tools', 'Tools')")
+    assert 'Tools' in names(client, '/categories')
+    client.get('/')
+    assert cache._entries['items']['version'] == items_entry['version']
+    assert cache._entries['items']['bodies'] is items_entry['bodies']  # Not rebuilt
+
+def test_etag_changes_with_the_data(client, catalog, recheck):
+    etag = client.get('/').headers['ETag']
+    assert client.get('/', headers={'If-None-Match': etag}).status_code == 304
+    write(catalog['path'], "UPDATE item SET description = 'Changed' WHERE id = ?", [catalog['item_ids'][0]])
+    response = client.get('/', headers={'If-None-Match': etag})
+    assert response.status_code == 200 and response.headers['ETag'] != etag
+
+def test_writes_wait_for_the_recheck_interval(client, catalog, monkeypatch):
+    monkeypatch.setattr(cache, 'PUBLIC_CACHE_RECHECK', 3600)
+    item_id = catalog['item_ids'][0]
+    names(client)
+    write(catalog['path'], "UPDATE item SET item_name = 'Not yet' WHERE id = ?", [item_id])
+    assert 'Not yet' not in names(client)  # Served without touching the database
+    monkeypatch.setattr(cache, 'PUBLIC_CACHE_RECHECK', 0)
+    assert 'Not yet' in names(client)
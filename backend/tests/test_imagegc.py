@@ -0,0 +1,34 @@
+import io
+
+import cloudinary.api
+import pytest
+
+import imagegc
+from db import get_db
+from storage import CloudinaryStorage
+from tests.test_photos import grid_photo
+
+def test_cloudinary_sweep_stays_in_our_folder(app, client, catalog, admin, monkeypatch):
+    item_id = catalog['item_ids'][0]
+    response = client.post(f'/item/{item_id}/photo', data={'photo': (io.BytesIO(grid_photo(1)), 'p.png')},
+                           content_type='multipart/form-data', headers=admin)
+    kept = response.get_json()['url']
+    assert '/upload/inventory/' in kept
+
+    listed = []
+    def resources(**options):
+        listed.append(options)
+        return {'resources': [
+            {'public_id': 'inventory/orphan', 'bytes': 10, 'created_at': '2020-01-01T00:00:00Z'},
+            {'public_id': CloudinaryStorage().asset_id(kept), 'bytes': 10, 'created_at': '2020-01-01T00:00:00Z'},
+        ]}
+    monkeypatch.setattr(cloudinary.api, 'resources', resources)
+    with app.app_context():
+        report = imagegc.collect(get_db(), CloudinaryStorage())
+    assert [options['prefix'] for options in listed] == ['inventory/']
+    assert report['orphanedAssets'] == 1
+
+def test_cloudinary_sweep_needs_a_folder(monkeypatch):
+    monkeypatch.setenv('CLOUDINARY_FOLDER', '')
+    with pytest.raises(RuntimeError):
+        list(CloudinaryStorage().list_assets())
@@ -0,0 +1,45 @@
+def get_item(client, admin, item_id):
+    response = client.get(f'/item/{item_id}', headers=admin)
+    return response.get_json(), response.headers['ETag'].strip('"')
+
+def test_if_match_saves_once_then_conflicts(client, admin, catalog):
+    item_id = catalog['item_ids'][0]
+    item, etag = get_item(client, admin, item_id)
+
+    first = client.patch(f'/item/{item_id}', json={'itemName': 'First editor'},
+                         headers=dict(admin, **{'If-Match': f'"{etag}"'}))
+    assert first.status_code == 200
+    assert first.get_json()['version'] == item['version'] + 1
+
+    # The second editor started from the same ETag
+    second = client.patch(f'/item/{item_id}', json={'itemName': 'Second editor'},
+                          headers=dict(admin, **{'If-Match': f'"{etag}"'}))
+    assert second.status_code == 409
+    assert second.get_json()['currentVersion'] == item['version'] + 1
+    assert get_item(client, admin, item_id)[0]['itemName'] == 'First editor'
+
+def test_version_in_the_body_works_like_if_match(client, admin, catalog):
+    item_id = catalog['item_ids'][1]
+    item, _ = get_item(client, admin, item_id)
+    stale = dict(item, itemName='Stale', version=item['version'] - 1)
+    assert client.put(f'/item/{item_id}', json=stale, headers=admin).status_code == 409
+    fresh = dict(item, itemName='Fresh')
+    response = client.put(f'/item/{item_id}', json=fresh, headers=admin)
+    assert response.status_code == 200
+    assert response.headers['ETag'].strip('"') == str(item['version'] + 1)
+
+def test_unconditional_and_no_op_writes(client, admin, catalog):
+    item_id = catalog['item_ids'][2]
+    item, _ = get_item(client, admin, item_id)
+    # No If-Match: last write wins
+    assert client.patch(f'/item/{item_id}', json={'origin': 'Somewhere'}, headers=admin).status_code == 200
+    # Writing the same value again leaves the version alone
+    again = client.patch(f'/item/{item_id}', json={'origin': 'Somewhere'}, headers=admin).get_json()
+    assert again['version'] == item['version'] + 1
+
+def test_bad_if_match_and_missing_item(client, admin, catalog):
+    item_id = catalog['item_ids'][0]
+    bad = client.patch(f'/item/{item_id}', json={'itemName': 'x'}, headers=dict(admin, **{'If-Match': '"abc"'}))
+    assert bad.status_code == 400
+    gone = client.patch('/item/no-such-item', json={'itemName': 'x'}, headers=dict(admin, **{'If-Match': '"1"'}))
+    assert gone.status_code == 404
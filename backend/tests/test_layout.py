@@ -0,0 +1,47 @@
+import sqlite3
+
+def layout_version(client):
+    return client.get('/cloud-layout').get_json()['version']
+
+def position(path, item_id):
+    db = sqlite3.connect(path)
+    row = db.execute('SELECT local_col, local_row FROM item WHERE id = ?', [item_id]).fetchone()
+    db.close()
+    return row
+
+def test_batch_applies_then_stale_version_is_409(client, admin, catalog):
+    a, b = catalog['item_ids'][:2]
+    version = layout_version(client)
+    response = client.patch('/cloud-layout', headers=admin, json={
+        'version': version, 'items': [{'id': a, 'localCol': 3, 'localRow': 4}, {'id': 'gone', 'localCol': 0, 'localRow': 0}]})
+    assert response.status_code == 200
+    assert response.get_json()['version'] == version + 1
+    assert response.get_json()['missingItems'] == ['gone']
+    assert position(catalog['path'], a) == (3, 4)
+
+    # A second editor still holding the old version writes nothing at all
+    response = client.patch('/cloud-layout', headers=admin, json={
+        'version': version,
+        'items': [{'id': a, 'localCol': 9, 'localRow': 9}, {'id': b, 'localCol': 9, 'localRow': 9}],
+        'boxes': [{'name': 'clothing', 'gridCol': 40, 'gridRow': 40, 'boxWidth': 8, 'boxHeight': 8}],
+        'clusters': [{'category': 'clothing', 'subcategory': 'brand-new', 'localCol': 1, 'localRow': 1}],
+    })
+    assert response.status_code == 409
+    assert response.get_json()['version'] == version + 1
+    assert position(catalog['path'], a) == (3, 4)
+    assert position(catalog['path'], b) != (9, 9)
+    layout = client.get('/cloud-layout').get_json()
+    assert layout['version'] == version + 1
+    db = sqlite3.connect(catalog['path'])
+    assert db.execute("SELECT grid_col FROM categories WHERE name = 'clothing'").fetchone() != (40,)
+    assert db.execute("SELECT 1 FROM subcategory_clusters WHERE subcategory = 'brand-new'").fetchone() is None
+    db.close()
+
+def test_single_move_makes_a_loaded_batch_stale(client, admin, catalog):
+    a = catalog['item_ids'][0]
+    version = layout_version(client)
+    assert client.put(f'/item/{a}/position', json={'localCol': 1, 'localRow': 1}, headers=admin).status_code == 200
+    response = client.patch('/cloud-layout', headers=admin, json={
+        'version': version, 'items': [{'id': a, 'localCol': 5, 'localRow': 5}]})
+    assert response.status_code == 409
+    assert position(catalog['path'], a) == (1, 1)
@@ -0,0 +1,61 @@
+import sqlite3
+
+def add_pending(path, n, created_at='2024-06-01T00:00:00'):
+    """n pending submissions, all created at the same moment so pages split ties"""
+    db = sqlite3.connect(path)
+    ids = [f'pending-{i:03d}' for i in range(n)]
+    db.executemany(
+        'INSERT INTO community_item (id, item_name, created_at, main_photo, approved) VALUES (?, ?, ?, ?, 0)',
+        [(item_id, item_id, created_at, f'https://res.cloudinary.com/bench/image/upload/{item_id}.jpg') for item_id in ids])
+    db.commit()
+    db.close()
+    return ids
+
+def pending_pages(client, admin, limit):
+    """Every page's ids, and the total from the first page (later ones don't count)"""
+    pages, cursor, total = [], None, None
+    while True:
+        query = {'limit': limit, **({'cursor': cursor} if cursor else {})}
+        data = client.get('/community/pending', query_string=query, headers=admin).get_json()
+        pages.append([item['id'] for item in data['items']])
+        assert ('total' in data) == (cursor is None)
+        total = data.get('total', total)
+        cursor = data['nextCursor']
+        if not cursor:
+            return pages, total
+
+def test_pending_cursor_round_trip(client, admin, catalog):
+    add_pending(catalog['path'], 11)
+    everything = client.get('/community/pending?limit=200', headers=admin).get_json()
+    pages, total = pending_pages(client, admin, limit=4)
+    assert all(len(page) <= 4 for page in pages)
+    assert sum(pages, []) == [item['id'] for item in everything['items']]
+    assert total == len(everything['items'])
+
+def test_pages_stay_put_while_moderating(client, admin, catalog):
+    ids = add_pending(catalog['path'], 9)
+    first = client.get('/community/pending?limit=3', headers=admin).get_json()
+    # Approve one already seen and reject one still to come
+    seen = [item['id'] for item in first['items']]
+    assert client.post('/community/approve', json={'ids': [seen[0]]}, headers=admin).get_json()['approved'] == 1
+    assert client.post('/community/reject', json={'ids': [ids[-1]]}, headers=admin).get_json()['rejected'] == 1
+    after = client.get('/community/pending', query_string={'cursor': first['nextCursor'], 'limit': 200},
+                       headers=admin).get_json()
+    remaining = [item['id'] for item in after['items']]
+    assert not set(seen) & set(remaining)
+    assert ids[-1] not in remaining
+    assert set(ids[3:-1]) <= set(remaining)
+
+def test_bad_cursor_and_ids(client, admin):
+    assert client.get('/community/pending?cursor=not-a-cursor', headers=admin).status_code == 400
+    assert client.post('/community/approve', json={'ids': []}, headers=admin).status_code == 400
+    assert client.post('/community/reject', json={'ids': 'one'}, headers=admin).status_code == 400
+
+def test_reads_pool_leaves_submissions_to_the_writes_pool(catalog, admin):
+    from app import create_app
+    reads = create_app('auth,items,taxonomy,layout,community').test_client()
+    assert reads.get('/community').status_code == 200
+    assert reads.get('/community/pending', headers=admin).status_code == 200
+    response = reads.post('/community', data={'id': 'x', 'itemName': 'x'}, content_type='multipart/form-data')
+    assert response.status_code == 405
+    assert reads.post('/community/approve', json={'ids': ['x']}, headers=admin).status_code == 404
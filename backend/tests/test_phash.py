@@ -0,0 +1,49 @@
+import io
+import random
+import sqlite3
+
+import pytest
+
+import phash
+
+@pytest.mark.parametrize('h', [0, 1, (1 << 63) - 1, 1 << 63, (1 << 64) - 1, 0xdeadbeefcafebabe])
+def test_sql_round_trip_through_signed_integers(h):
+    stored = phash.to_sql(h)
+    assert -(1 << 63) <= stored < 1 << 63
+    db = sqlite3.connect(':memory:')
+    db.execute('CREATE TABLE t (hash INTEGER)')
+    db.execute('INSERT INTO t VALUES (?)', [stored])
+    assert phash.from_sql(db.execute('SELECT hash FROM t').fetchone()[0]) == h
+
+def test_close_hashes_share_a_band():
+    rng = random.Random(0)
+    for _ in range(500):
+        h = rng.getrandbits(64)
+        other = h
+        for bit in rng.sample(range(64), rng.randint(0, phash.MAX_DISTANCE)):
+            other ^= 1 << bit
+        assert phash.hamming(h, other) <= phash.MAX_DISTANCE
+        assert any(a == b for a, b in zip(phash.bands(h), phash.bands(other)))
+
+def test_bands_cover_every_bit():
+    assert sum(phash._BAND_BITS) == 64
+    assert phash.bands((1 << 64) - 1) == [(1 << bits) - 1 for bits in phash._BAND_BITS]
+
+def gradient(size, fmt, quality=None):
+    from PIL import Image
+    img = Image.new('RGB', (size, size))
+    img.putdata([((x * 255) // size, (y * 255) // size, ((x + y) * 127) // size)
+                 for y in range(size) for x in range(size)])
+    out = io.BytesIO()
+    img.save(out, fmt, **({'quality': quality} if quality else {}))
+    return out.getvalue()
+
+def test_reencoded_copy_is_a_near_duplicate():
+    pytest.importorskip('PIL')
+    original = phash.dhash(gradient(256, 'PNG'))
+    copy = phash.dhash(gradient(128, 'JPEG', quality=60))
+    assert original is not None and copy is not None
+    assert phash.hamming(original, copy) <= phash.MAX_DISTANCE
+
+def test_undecodable_bytes_have_no_hash():
+    assert phash.dhash(b'not an image') is None
@@ -0,0 +1,89 @@
+import io
+import random
+import sqlite3
+
+import pytest
+
+import phash
+
+pytest.importorskip('PIL')
+
+def grid_photo(seed, nudge=None):
+    """A PNG whose dHash is set by a 9x8 grid of grey levels; nudge=(row, col)
+    swaps one cell with its right neighbour, flipping a bit or two"""
+    from PIL import Image
+    rng = random.Random(seed)
+    cells = [[rng.randrange(20, 236) for _ in range(9)] for _ in range(8)]
+    if nudge:
+        row, col = nudge
+        cells[row][col], cells[row][col + 1] = cells[row][col + 1], cells[row][col]
+    img = Image.new('L', (9, 8))
+    img.putdata([value for row in cells for value in row])
+    out = io.BytesIO()
+    img.resize((90, 80), Image.NEAREST).save(out, 'PNG')
+    return out.getvalue()
+
+def upload(client, headers, item_id, data, name='photo.png'):
+    return client.post(f'/item/{item_id}/photos', data={'photos': (io.BytesIO(data), name)},
+                       headers=headers, content_type='multipart/form-data').get_json()
+
+def bare_items(catalog, n=2):
+    """The first n seeded items, with their photos removed (an item holds at most 5)"""
+    ids = catalog['item_ids'][:n]
+    db = sqlite3.connect(catalog['path'])
+    db.execute(f'DELETE FROM item_photos WHERE item_id IN ({", ".join("?" * n)})', ids)
+    db.commit()
+    db.close()
+    return ids
+
+def community_photo(path, item_id):
+    return sqlite3.connect(path).execute('SELECT main_photo FROM community_item WHERE id = ?', [item_id]).fetchone()[0]
+
+@pytest.fixture
+def friend():
+    from bench.api import _make_token
+    return {'Authorization': f'Bearer {_make_token("friend")}'}
+
+def test_exact_duplicate_links_to_the_stored_photo(client, admin, catalog):
+    first, second = bare_items(catalog)
+    stored = upload(client, admin, first, grid_photo(1))['photos'][0]['url']
+    linked = upload(client, admin, second, grid_photo(1))['photos'][0]['url']
+    assert linked == stored
+
+def test_near_duplicate_is_stored_separately(client, admin, catalog):
+    first, second = bare_items(catalog)
+    original, nudged = grid_photo(2), grid_photo(2, nudge=(3, 4))
+    assert 0 < phash.hamming(phash.dhash(original), phash.dhash(nudged)) <= phash.MAX_DISTANCE
+    stored = upload(client, admin, first, original)['photos'][0]['url']
+    assert upload(client, admin, second, nudged)['photos'][0]['url'] != stored
+
+def test_near_duplicate_on_the_same_item_is_skipped(client, admin, catalog):
+    item_id, = bare_items(catalog, 1)
+    stored = upload(client, admin, item_id, grid_photo(3))['photos'][0]['url']
+    result = upload(client, admin, item_id, grid_photo(3, nudge=(5, 1)))
+    assert result['photos'] == []
+    assert result['skippedDuplicates'][0]['duplicateOf'] == stored
+
+def test_private_item_photos_are_never_matched(client, admin, friend, catalog):
+    private, other = bare_items(catalog)
+    db = sqlite3.connect(catalog['path'])
+    db.execute("UPDATE item SET private = 'true' WHERE id = ?", [private])
+    db.commit()
+    stored = upload(client, admin, private, grid_photo(4))['photos'][0]['url']
+    assert upload(client, friend, other, grid_photo(4))['photos'][0]['url'] != stored
+
+    client.post('/community', data={'id': 'from-a-visitor', 'itemName': 'Mine', 'photo': (io.BytesIO(grid_photo(4)), 'p.png')},
+                content_type='multipart/form-data')
+    assert community_photo(catalog['path'], 'from-a-visitor') != stored
+
+def test_community_uploads_only_match_approved_submissions(client, admin, catalog):
+    def submit(item_id, data):
+        response = client.post('/community', data={'id': item_id, 'itemName': 'Mine', 'photo': (io.BytesIO(data), 'p.png')},
+                               content_type='multipart/form-data')
+        assert response.status_code == 201
+        return community_photo(catalog['path'], item_id)
+
+    pending = submit('first', grid_photo(5))
+    assert submit('second', grid_photo(5)) != pending  # Pending photos aren't public
+    client.put('/community/first/approve', headers=admin)
+    assert submit('third', grid_photo(5)) == pending
@@ -0,0 +1,45 @@
+import sqlite3
+
+import pytest
+
+from bench.api import _make_token
+
+def make_private(path, item_id, **flags):
+    db = sqlite3.connect(path)
+    assignments = ', '.join(f'{column} = ?' for column in flags)
+    db.execute(f'UPDATE item SET {assignments} WHERE id = ?', list(flags.values()) + [item_id])
+    db.commit()
+    db.close()
+
+def viewer(role):
+    return {'Authorization': f'Bearer {_make_token(role)}'} if role else {}
+
+@pytest.mark.parametrize('role', [None, 'friend'])
+def test_private_item_is_projected_away(client, catalog, role):
+    item_id = catalog['item_ids'][0]
+    make_private(catalog['path'], item_id, private='true', item_name='Secret', description='Hidden',
+                 origin='Nowhere', materials='[{"material": "Gold"}]')
+    item = client.get(f'/item/{item_id}', headers=viewer(role)).get_json()
+    assert item['private'] == 'true'  # The card still shows as private
+    for key in ('itemName', 'description', 'origin', 'mainPhoto', 'materials', 'secondhand', 'gifted'):
+        assert item[key] in (None, []), key
+    assert item['photos'] == []
+    listed = next(i for i in client.get('/', headers=viewer(role)).get_json() if i['id'] == item_id)
+    assert listed['itemName'] is None and listed['description'] is None
+    assert ('lastEdited' in listed) == (role == 'friend')
+
+def test_admin_sees_private_items(client, catalog):
+    item_id = catalog['item_ids'][0]
+    make_private(catalog['path'], item_id, private='true', item_name='Secret', description='Hidden')
+    item = client.get(f'/item/{item_id}', headers=viewer('admin')).get_json()
+    assert (item['itemName'], item['description']) == ('Secret', 'Hidden')
+    assert item['photos']
+    listed = next(i for i in client.get('/', headers=viewer('admin')).get_json() if i['id'] == item_id)
+    assert listed['itemName'] == 'Secret'
+
+def test_private_fields_of_a_public_item(client, catalog):
+    item_id = catalog['item_ids'][1]
+    make_private(catalog['path'], item_id, private='false', item_name='Open', description='Diary',
+                 private_description='true', origin='Home', private_origin='false')
+    item = client.get(f'/item/{item_id}').get_json()
+    assert (item['itemName'], item['description'], item['origin']) == ('Open', None, 'Home')
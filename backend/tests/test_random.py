@@ -0,0 +1,59 @@
+import sqlite3
+
+import pytest
+from libsql_client import create_client_sync
+
+from records import MAX_RANDOM_ITEMS, sample_rows
+
+@pytest.fixture
+def sparse(tmp_path):
+    """Ten rows with rowids 1000 apart, the even ones flagged"""
+    path = str(tmp_path / 'sparse.db')
+    db = sqlite3.connect(path)
+    db.execute('CREATE TABLE t (name TEXT, even INTEGER)')
+    db.executemany('INSERT INTO t (rowid, name, even) VALUES (?, ?, ?)',
+                   [(1 + i * 1000, f'row-{i}', i % 2 == 0) for i in range(10)])
+    db.commit()
+    db.close()
+    conn = create_client_sync(url=f'file:{path}')
+    yield conn
+    conn.close()
+
+def names(rows):
+    return [row[1] for row in rows]
+
+def test_gaps_still_give_n_distinct_rows(sparse):
+    seen = set()
+    for _ in range(30):
+        picked = names(sample_rows(sparse, 't', 'name', 4))
+        assert len(picked) == len(set(picked)) == 4
+        seen.update(picked)
+    assert seen == {f'row-{i}' for i in range(10)}  # Walking forward reaches every row
+
+def test_filter_with_gaps(sparse):
+    evens = {f'row-{i}' for i in range(0, 10, 2)}
+    for _ in range(30):
+        picked = names(sample_rows(sparse, 't', 'name', 3, where='even = 1'))
+        assert len(set(picked)) == 3 and set(picked) <= evens
+    # Asking for more than match is a best effort, never a repeat
+    picked = names(sample_rows(sparse, 't', 'name', 8, where='even = 1'))
+    assert picked and len(set(picked)) == len(picked) and set(picked) <= evens
+
+def test_empty_table(sparse):
+    sparse.execute('DELETE FROM t')
+    assert sample_rows(sparse, 't', 'name', 3) == []
+
+def test_random_item_and_n(client, catalog):
+    item = client.get('/random').get_json()
+    assert item['id'] in catalog['item_ids']
+    listed = client.get('/random?n=7').get_json()
+    assert len({i['id'] for i in listed}) == 7
+    assert len(client.get('/random?n=0').get_json()) == 1
+    assert len(client.get('/random?n=1000').get_json()) == MAX_RANDOM_ITEMS
+
+def test_random_community_items_are_approved(client, catalog):
+    db = sqlite3.connect(catalog['path'])
+    approved = {row[0] for row in db.execute('SELECT id FROM community_item WHERE approved = 1')}
+    db.close()
+    listed = client.get(f'/community/random?n={len(approved) + 5}').get_json()
+    assert {i['id'] for i in listed} == approved
@@ -0,0 +1,53 @@
+import sqlite3
+
+import ratelimit
+
+def test_bucket_refills_and_denies():
+    store = ratelimit.MemoryBucketStore()
+    assert store.take('k', rate=1 / 60, burst=2) == (True, 0.0)
+    assert store.take('k', rate=1 / 60, burst=2) == (True, 0.0)
+    allowed, wait = store.take('k', rate=1 / 60, burst=2)
+    assert not allowed and 59 < wait <= 60
+
+def test_memory_store_prunes_allowed_buckets(monkeypatch):
+    monkeypatch.setattr(ratelimit, 'MAX_BUCKETS', 100)
+    store = ratelimit.MemoryBucketStore()
+    clock = [1000.0]
+    monkeypatch.setattr(ratelimit.time, 'monotonic', lambda: clock[0])
+    for i in range(1000):
+        clock[0] += 1  # Each bucket refills 0.1s after its request
+        assert store.take(f'client-{i}', rate=10, burst=1)[0]
+    assert len(store._buckets) <= 100
+
+def test_sqlite_store_deletes_refilled_buckets(tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(ratelimit.time, 'time', lambda: clock[0])
+    path = str(tmp_path / 'buckets.db')
+    store = ratelimit.SqliteBucketStore(path)
+    for i in range(50):
+        store.take(f'client-{i}', rate=10, burst=1)
+    clock[0] += ratelimit.PRUNE_INTERVAL + 1
+    store.take('late', rate=10, burst=1)
+    keys = [row[0] for row in sqlite3.connect(path).execute('SELECT key FROM buckets')]
+    assert keys == ['late']
+
+def test_random_routes_have_their_own_buckets(client, monkeypatch):
+    monkeypatch.delenv('RATE_LIMIT_DISABLED')
+    monkeypatch.setattr(ratelimit, '_store', ratelimit.MemoryBucketStore())
+    statuses = [client.get('/random').status_code for _ in range(31)]
+    assert statuses[:30] == [200] * 30 and statuses[30] == 429
+    assert client.get('/community/random').status_code == 200
+
+def test_single_photo_upload_shares_the_upload_budget(client, catalog, admin, monkeypatch):
+    monkeypatch.delenv('RATE_LIMIT_DISABLED')
+    store = ratelimit.MemoryBucketStore()
+    monkeypatch.setattr(ratelimit, '_store', store)
+    client.post(f'/item/{catalog["item_ids"][0]}/photo', headers=admin)  # 400, no photo, but counted
+    assert [key for key in store._buckets if key.startswith('upload-photos:')]
+
+def test_forwarded_for_is_ignored_without_a_trusted_proxy(client, monkeypatch):
+    monkeypatch.delenv('RATE_LIMIT_DISABLED')
+    monkeypatch.setattr(ratelimit, '_store', ratelimit.MemoryBucketStore())
+    statuses = [client.get('/random', headers={'X-Forwarded-For': f'203.0.113.{i}'}).status_code
+                for i in range(31)]
+    assert statuses[30] == 429  # A forged header doesn't buy a fresh bucket
@@ -0,0 +1,93 @@
+"""Read/write splitting against two SQLite files: the primary and a
+replica this test copies over by hand (see bench/replica.py)."""
+import sqlite3
+
+import pytest
+
+import replica
+
+@pytest.fixture
+def replicate(catalog, tmp_path, monkeypatch):
+    """Turn on a remote replica; the fixture's value copies the primary over it"""
+    replica_path = str(tmp_path / 'replica.db')
+    monkeypatch.setenv('TURSO_READ_REPLICA_URL', f'file:{replica_path}')
+    monkeypatch.setenv('TURSO_REPLICA_SYNC_INTERVAL', '3600')  # Only sync when told to
+    monkeypatch.setenv('TURSO_REPLICA_MAX_STALENESS', '3600')
+    monkeypatch.setattr(replica, '_replica', None)
+
+    def copy(mark=None):
+        """Replicate, then rename mark's item in the replica only, so reads show which file served them"""
+        current = replica.get_replica()
+        current.sync()  # Stamp the heartbeat on the primary
+        src, dst = sqlite3.connect(catalog['path']), sqlite3.connect(replica_path)
+        src.backup(dst)
+        if mark:
+            dst.execute("UPDATE item SET item_name = 'From the replica' WHERE id = ?", [mark])
+            dst.commit()
+        src.close()
+        dst.close()
+        current.sync()  # Read the stamp back
+    return copy
+
+def name(client, item_id, headers=None):
+    return client.get(f'/item/{item_id}', headers=headers or {}).get_json()['itemName']
+
+def test_anonymous_reads_come_from_a_fresh_replica(client, catalog, replicate, admin):
+    item_id = catalog['item_ids'][0]
+    client.get('/')  # Starts the replica
+    replicate(mark=item_id)
+    assert name(client, item_id) == 'From the replica'
+    assert name(client, item_id, admin) != 'From the replica'  # Signed in: primary
+
+def test_write_then_read_sees_the_write(client, catalog, replicate, admin):
+    item_id = catalog['item_ids'][0]
+    client.get('/')
+    replicate(mark=item_id)
+    assert client.patch(f'/item/{item_id}', json={'itemName': 'Just edited'}, headers=admin).status_code == 200
+    # The replica hasn't shown a heartbeat from after the write: this worker reads the primary
+    assert name(client, item_id) == 'Just edited'
+    assert replica.get_replica().status()['dirty']
+
+    replicate(mark=item_id)
+    assert name(client, item_id) == 'From the replica'
+
+def test_anonymous_writes_count_too(client, catalog, replicate):
+    item_id = catalog['item_ids'][0]
+    client.get('/')
+    replicate(mark=item_id)
+    response = client.post('/community', data={'id': 'new-submission', 'itemName': 'Mine'},
+                           content_type='multipart/form-data')
+    assert response.status_code == 201
+    assert name(client, item_id) != 'From the replica'
+
+def test_stale_replica_falls_back_to_the_primary(client, catalog, replicate):
+    item_id = catalog['item_ids'][0]
+    client.get('/')
+    replicate(mark=item_id)
+    replica.get_replica().max_staleness = -1
+    assert name(client, item_id) != 'From the replica'
+
+def test_each_process_claims_its_own_replica_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(replica, '_claimed', [])
+    path = str(tmp_path / 'replica.db')
+    assert replica.claim_replica_file(path) == f'{path}.0'
+    assert replica.claim_replica_file(path) == f'{path}.1'  # As if from a second worker
+    replica._claimed.pop(0).close()  # The first worker exits
+    assert replica.claim_replica_file(path) == f'{path}.0'
+
+def test_a_write_during_a_sync_keeps_the_replica_dirty():
+    embedded = replica.Replica('unused.db', 'file:unused.db', None)
+    writes_during_sync = [1]
+
+    class Connection:
+        def sync(self):
+            # Lands on the primary after the sync took its snapshot
+            for _ in range(writes_during_sync.pop() if writes_during_sync else 0):
+                embedded.mark_written()
+
+    embedded._conn = Connection()
+    embedded.mark_written()
+    assert embedded.sync()
+    assert embedded.dirty and not embedded.fresh()
+    assert embedded.sync()
+    assert not embedded.dirty and embedded.fresh()
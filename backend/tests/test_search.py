@@ -0,0 +1,110 @@
+import sqlite3
+
+from search import COMMUNITY_SEARCH
+
+def submit(client, item_id, name):
+    response = client.post('/community', data={'id': item_id, 'itemName': name, 'description': 'Found it'},
+                           content_type='multipart/form-data')
+    assert response.status_code == 201
+
+def found(client, q):
+    return [item['id'] for item in client.get('/community/search', query_string={'q': q}).get_json()['items']]
+
+def check_index(path):
+    """FTS5's own check that the index matches community_item"""
+    db = sqlite3.connect(path)
+    db.execute(f"INSERT INTO {COMMUNITY_SEARCH.name} ({COMMUNITY_SEARCH.name}) VALUES ('integrity-check')")
+    db.close()
+
+def test_only_approved_items_are_searchable(client, admin, catalog):
+    submit(client, 'zebra-1', 'Zebrawood box')
+    submit(client, 'zebra-2', 'Zebrawood spoon')
+    assert found(client, 'zebrawood') == []
+
+    client.put('/community/zebra-1/approve', headers=admin)
+    assert found(client, 'zebrawood') == ['zebra-1']
+    assert found(client, 'zebra') == ['zebra-1']  # Prefix match while typing
+
+    client.post('/community/approve', json={'ids': ['zebra-2']}, headers=admin)
+    assert sorted(found(client, 'zebrawood')) == ['zebra-1', 'zebra-2']
+    check_index(catalog['path'])
+
+def test_rejected_and_deleted_items_leave_the_index(client, admin, catalog):
+    submit(client, 'maple-1', 'Maple bowl')
+    submit(client, 'maple-2', 'Maple board')
+    client.post('/community/reject', json={'ids': ['maple-2']}, headers=admin)
+    client.put('/community/maple-1/approve', headers=admin)
+    assert found(client, 'maple') == ['maple-1']
+
+    client.delete('/community/maple-1', headers=admin)
+    assert found(client, 'maple') == []
+    check_index(catalog['path'])
+
+def test_edits_reindex_approved_items(client, admin, catalog):
+    submit(client, 'oak-1', 'Oak stool')
+    client.put('/community/oak-1/approve', headers=admin)
+    db = sqlite3.connect(catalog['path'])
+    db.execute("UPDATE community_item SET item_name = 'Walnut stool' WHERE id = 'oak-1'")
+    db.commit()
+    db.close()
+    assert found(client, 'oak') == []
+    assert found(client, 'walnut') == ['oak-1']
+    check_index(catalog['path'])
+
+def pages(client, **query):
+    ids, cursor, total = [], None, None
+    while True:
+        data = client.get('/community/search', query_string=dict(query, limit=2, **({'cursor': cursor} if cursor else {}))).get_json()
+        ids += [item['id'] for item in data['items']]
+        assert ('total' in data) == (cursor is None)  # Only the first page counts
+        total = data.get('total', total)
+        cursor = data['nextCursor']
+        if not cursor:
+            return ids, total
+
+def test_cursor_round_trip(client, admin, catalog):
+    for i in range(7):
+        submit(client, f'cedar-{i}', f'Cedar chest {i}' + ' cedar' * i)
+    client.post('/community/approve', json={'ids': [f'cedar-{i}' for i in range(7)]}, headers=admin)
+
+    for query in ({'q': 'cedar'}, {}):
+        everything = client.get('/community/search', query_string=dict(query, limit=100)).get_json()
+        ids, total = pages(client, **query)
+        assert ids == [item['id'] for item in everything['items']]
+        assert total == everything['total'] == len(ids)
+    assert client.get('/community/search?q=cedar&cursor=nonsense').status_code == 400
+
+def test_vacuum_keeps_the_index_on_the_right_rows(client, admin, catalog):
+    for i in range(6):
+        submit(client, f'ash-{i}', f'Ash ladle {i}')
+    client.post('/community/approve', json={'ids': [f'ash-{i}' for i in range(6)]}, headers=admin)
+    for i in (0, 2, 4):
+        client.delete(f'/community/ash-{i}', headers=admin)
+    db = sqlite3.connect(catalog['path'])
+    db.execute('VACUUM')
+    db.close()
+    assert sorted(found(client, 'ash')) == ['ash-1', 'ash-3', 'ash-5']
+    assert found(client, 'ladle 3') == ['ash-3']
+    check_index(catalog['path'])
+
+def test_text_keyed_table_is_migrated(tmp_path, monkeypatch):
+    """A database from before seq: rows keep their rowids and stay searchable"""
+    import db as database
+    path = str(tmp_path / 'old.db')
+    old = sqlite3.connect(path)
+    old.execute('CREATE TABLE community_item (id TEXT PRIMARY KEY, item_name TEXT, description TEXT, category TEXT, '
+                'origin TEXT, main_photo TEXT, created_at TEXT, approved INTEGER DEFAULT 0)')
+    old.executemany('INSERT INTO community_item (id, item_name, approved) VALUES (?, ?, 1)',
+                    [('elm-1', 'Elm bench'), ('elm-2', 'Elm crate')])
+    old.commit()
+    old.close()
+    monkeypatch.setenv('TURSO_DATABASE_URL', f'file:{path}')
+    from app import app
+    client = app.test_client()
+    assert sorted(found(client, 'elm')) == ['elm-1', 'elm-2']
+
+    db = sqlite3.connect(path)
+    assert db.execute("SELECT name FROM pragma_table_info('community_item') WHERE pk = 1").fetchall() == [('seq',)]
+    assert db.execute('SELECT version FROM schema_meta').fetchone() == (database.SCHEMA_VERSION,)
+    db.close()
+    check_index(path)
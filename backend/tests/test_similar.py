@@ -0,0 +1,52 @@
+import pytest
+
+from blueprints import items
+
+COPIED = ('itemName', 'description', 'category', 'subcategory', 'origin', 'materials')
+
+@pytest.fixture
+def similar(client, monkeypatch):
+    """GET /item/<id>/similar as ids and scores, rechecking data_meta on every call"""
+    monkeypatch.setattr(items, 'SIMILAR_RECHECK', 0)
+    monkeypatch.setattr(items, '_similar', {"index": None, "version": None, "checked": 0.0})
+
+    def get(item_id):
+        response = client.get(f'/item/{item_id}/similar', query_string={'k': 50})
+        if response.status_code == 404:
+            return None
+        return {item['id']: item['similarity'] for item in response.get_json()}
+    return get
+
+def copy_item(client, admin, source, target):
+    item = client.get(f'/item/{source}', headers=admin).get_json()
+    response = client.patch(f'/item/{target}', json={key: item[key] for key in COPIED}, headers=admin)
+    assert response.status_code == 200
+
+def changes_since_build():
+    return items._similar["index"].status()["changesSinceBuild"]
+
+def test_edit_moves_an_item_next_to_its_twin(client, admin, catalog, similar):
+    a, b = catalog['item_ids'][:2]
+    assert similar(a).get(b, 0) < 0.99
+    copy_item(client, admin, a, b)
+    neighbours = similar(a)
+    assert max(neighbours, key=neighbours.get) == b and neighbours[b] > 0.99
+    assert changes_since_build() == 1  # Re-vectorized in place, not rebuilt
+
+def test_deleted_item_leaves_the_index(client, admin, catalog, similar):
+    a, b = catalog['item_ids'][:2]
+    copy_item(client, admin, a, b)
+    assert b in similar(a)
+    assert client.delete(f'/item/{b}', headers=admin).status_code == 200
+    assert b not in similar(a)
+    assert similar(b) is None
+    assert changes_since_build() == 1
+
+def test_privatized_item_only_counts_what_the_public_sees(client, admin, catalog, similar):
+    a, c = catalog['item_ids'][:2]
+    copy_item(client, admin, a, c)
+    assert similar(a)[c] > 0.99
+    assert client.patch(f'/item/{c}', json={'private': True}, headers=admin).status_code == 200
+    # Its name, description, origin and materials are hidden now; only the category matches
+    assert similar(a).get(c, 0) < 0.9
+    assert changes_since_build() == 1
@@ -0,0 +1,41 @@
+import io
+import sqlite3
+
+import pytest
+from werkzeug.exceptions import RequestEntityTooLarge
+
+import uploads
+
+def too_big():
+    return io.BytesIO(b'\0' * (uploads.MAX_FILE_BYTES + 1))
+
+def test_spool_moves_to_disk_then_refuses(monkeypatch):
+    monkeypatch.setattr(uploads, 'SPOOL_BYTES', 100)
+    spool = uploads.LimitedSpool(limit=250)
+    spool.write(b'x' * 100)
+    assert not spool._rolled
+    spool.write(b'x' * 100)
+    assert spool._rolled  # Past SPOOL_BYTES: a temp file now
+    with pytest.raises(RequestEntityTooLarge):
+        spool.write(b'x' * 51)
+
+@pytest.mark.parametrize('route, field', [('photos', 'photos'), ('photo', 'photo')])
+def test_oversized_file_is_413(client, admin, catalog, route, field):
+    response = client.post(f'/item/{catalog["item_ids"][0]}/{route}', data={field: (too_big(), 'big.png')},
+                           content_type='multipart/form-data', headers=admin)
+    assert response.status_code == 413
+    assert 'MB' in response.get_json()['error']
+
+def test_oversized_request_is_413_before_parsing(app, client, admin, catalog, monkeypatch):
+    monkeypatch.setattr(uploads, 'MAX_REQUEST_BYTES', 1000)
+    monkeypatch.setitem(app.config, 'MAX_CONTENT_LENGTH', 1000)
+    data = {'photos': (io.BytesIO(b'\0' * 2000), 'a.png')}
+    response = client.post(f'/item/{catalog["item_ids"][0]}/photos', data=data,
+                           content_type='multipart/form-data', headers=admin)
+    assert response.status_code == 413
+    response = client.post('/community', data={'id': 'big', 'photo': (io.BytesIO(b'\0' * 2000), 'a.png')},
+                           content_type='multipart/form-data')
+    assert response.status_code == 413
+    db = sqlite3.connect(catalog['path'])
+    assert db.execute("SELECT COUNT(*) FROM community_item WHERE id = 'big'").fetchone() == (0,)
+    db.close()
@@ -0,0 +1,124 @@
+"""Streaming multipart parsing for the photo upload routes.
+
+request.files only exists once Werkzeug has parsed the whole body, so a
+five-photo item used to sit fully received before the first Cloudinary
+upload started. stream_multipart() reads request.stream in CHUNK_SIZE
+pieces through Werkzeug's sans-IO MultipartDecoder and hands each file to a
+callback the moment its last byte arrives; with an UploadPipeline the first
+photo is uploading while the rest are still on the wire.
+
+Limits, in bytes (env overridable):
+
+    MAX_UPLOAD_REQUEST_BYTES  whole request; also Flask's MAX_CONTENT_LENGTH (default 60 MB)
+    MAX_UPLOAD_FILE_BYTES     any single file (default 15 MB)
+    UPLOAD_SPOOL_BYTES        files stay in memory up to this size, then
+                              spill to a temp file (default 1 MB)
+
+Going over a limit raises RequestEntityTooLarge (413) as soon as it is
+seen, before the rest of the body is read. UploadRequest applies the same
+per-file limit and spooling to routes that still use request.files.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+
+from flask import Request, copy_current_request_context
+from werkzeug.datastructures import FileStorage, MultiDict
+from werkzeug.exceptions import BadRequest, RequestEntityTooLarge
+from werkzeug.http import parse_options_header
+from werkzeug.sansio.multipart import Data, Epilogue, Field, File, MultipartDecoder, NeedData
+
+MAX_REQUEST_BYTES = int(os.getenv('MAX_UPLOAD_REQUEST_BYTES', 60 << 20))
+MAX_FILE_BYTES = int(os.getenv('MAX_UPLOAD_FILE_BYTES', 15 << 20))
+SPOOL_BYTES = int(os.getenv('UPLOAD_SPOOL_BYTES', 1 << 20))
+MAX_FIELD_BYTES = 500 * 1024  # Werkzeug's default max_form_memory_size
+CHUNK_SIZE = 1 << 16
+
+
+class LimitedSpool(SpooledTemporaryFile):
+    """In memory up to SPOOL_BYTES, then a temp file; refuses to grow past limit"""
+
+    def __init__(self, limit=MAX_FILE_BYTES):
+        super().__init__(max_size=SPOOL_BYTES)
+        self._limit = limit
+        self._written = 0
+
+    def write(self, data):
+        self._written += len(data)
+        if self._written > self._limit:
+            raise RequestEntityTooLarge(f'Each file must be under {self._limit // (1 << 20)} MB')
+        return super().write(data)
+
+
+class UploadRequest(Request):
+    """Flask request whose regular form parsing spools files through LimitedSpool"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return LimitedSpool()
+
+
+def stream_multipart(request, on_file):
+    """Parse request's multipart/form-data body as it arrives.
+
+    Text fields are collected into a MultiDict, which is returned. Each
+    file part is written to a LimitedSpool, rewound and passed to
+    on_file(name, FileStorage, fields_so_far) as soon as it is complete.
+    Don't touch request.form or request.files afterwards: the body is gone.
+    """
+    if request.content_length and request.content_length > MAX_REQUEST_BYTES:
+        raise RequestEntityTooLarge()
+    mimetype, options = parse_options_header(request.headers.get('Content-Type', ''))
+    boundary = options.get('boundary', '').encode('latin-1')
+    if mimetype != 'multipart/form-data' or not boundary:
+        raise BadRequest('Expected multipart/form-data')
+
+    decoder = MultipartDecoder(boundary, MAX_FIELD_BYTES)
+    form = MultiDict()
+    stream = request.stream  # Flask caps this at MAX_CONTENT_LENGTH
+    part = None
+    buffer = None
+    done = False
+    while not done:
+        chunk = stream.read(CHUNK_SIZE)
+        decoder.receive_data(chunk or None)
+        event = decoder.next_event()
+        while not isinstance(event, (NeedData, Epilogue)):
+            if isinstance(event, Field):
+                part, buffer = event, bytearray()
+            elif isinstance(event, File):
+                part, buffer = event, LimitedSpool()
+            elif isinstance(event, Data):
+                if isinstance(part, Field):
+                    buffer += event.data
+                else:
+                    buffer.write(event.data)
+                if not event.more_data:
+                    if isinstance(part, Field):
+                        form.add(part.name, buffer.decode('utf-8', 'replace'))
+                    else:
+                        buffer.seek(0)
+                        on_file(part.name, FileStorage(buffer, part.filename, part.name, headers=part.headers), form)
+                    part = buffer = None
+            event = decoder.next_event()
+        if isinstance(event, Epilogue):
+            done = True
+        elif not chunk:
+            raise BadRequest('Multipart body ended early')
+    return form
+
+
+class UploadPipeline:
+    """Runs upload work on one background thread, in arrival order, while
+    the request body is still being parsed. Use as a context manager."""
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='upload')
+
+    def submit(self, fn, *args):
+        return self._executor.submit(copy_current_request_context(fn), *args)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._executor.shutdown(wait=True, cancel_futures=exc[0] is not None)
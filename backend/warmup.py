@@ -0,0 +1,81 @@
+"""Warm a new worker's caches in the background.
+
+After a deploy every worker starts cold, and the first visitors pay for
+the schema check, the replica start-up and the Turso round trips behind
+the item list, taxonomy and layout. start() fetches WARMUP_PATHS as an
+anonymous visitor on a daemon thread, through the app itself, once per
+encoding compress.py offers. Each path then fills the cache its route
+keeps: cache.py's public bodies and their compressed copies, and the
+CloudView layout. The worker accepts requests as usual while this runs,
+so readiness probes aren't held up. A visitor who arrives first simply
+builds their own copy.
+
+Env:
+
+    WARMUP          0 to skip warm-up (default 1)
+    WARMUP_PATHS    comma-separated GET paths
+                    (default /,/materials,/categories,/subcategories,/cloud-layout)
+
+Paths this app doesn't serve (e.g. in the writes pool) are skipped. The
+timings are logged and kept in last_report.
+"""
+import logging
+import os
+import threading
+import time
+
+from werkzeug.exceptions import HTTPException
+
+from compress import encodings
+
+log = logging.getLogger(__name__)
+
+WARMUP = os.getenv('WARMUP', '1') != '0'
+WARMUP_PATHS = [path.strip() for path in os.getenv(
+    'WARMUP_PATHS', '/,/materials,/categories,/subcategories,/cloud-layout').split(',') if path.strip()]
+
+last_report = None
+
+def served(app, path):
+    try:
+        app.url_map.bind('localhost').match(path, method='GET')
+    except HTTPException:
+        return False
+    return True
+
+def warm(app, paths=None):
+    """GET each path anonymously; returns the status and milliseconds for each, and the total"""
+    global last_report
+    started = time.perf_counter()
+    client = app.test_client()
+    report = {"paths": {}}
+    for path in paths or WARMUP_PATHS:
+        if not served(app, path):
+            continue
+        path_started = time.perf_counter()
+        try:
+            for encoding in ('identity',) + encodings():
+                status = client.get(path, headers={'Accept-Encoding': encoding}).status_code
+        except Exception as e:
+            log.warning('Warm-up of %s failed: %s', path, e)
+            status = None
+        report["paths"][path] = {"status": status, "ms": round((time.perf_counter() - path_started) * 1000, 1)}
+    report["totalMs"] = round((time.perf_counter() - started) * 1000, 1)
+    last_report = report
+    return report
+
+def start(app, on_done=None):
+    """Warm app on a daemon thread unless WARMUP=0; on_done(report) gets the timings"""
+    if not WARMUP:
+        return None
+
+    def run():
+        report = warm(app)
+        (on_done or log_report)(report)
+    thread = threading.Thread(target=run, name='warmup', daemon=True)
+    thread.start()
+    return thread
+
+def log_report(report, logger=log):
+    paths = ', '.join(f'{path} {timing["ms"]}ms' for path, timing in report["paths"].items())
+    logger.info('Warm-up done in %sms (%s)', report["totalMs"], paths)
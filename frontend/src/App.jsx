@@ -16,12 +16,15 @@ function App() {
   const [userRole, setUserRole] = useState(localStorage.getItem('userRole'))
   const [showLogin, setShowLogin] = useState(false)
 
-  // Fetch your personal inventory
+  // Fetch your personal inventory; private fields only come back with a token,
+  // so fetch again on login and logout
   useEffect(() => {
-    fetch(`${API_URL}/`)
+    fetch(`${API_URL}/`, {
+      headers: token ? { 'Authorization': `Bearer ${token}` } : {}
+    })
       .then(res => res.json())
       .then(data => setList(data))
-  }, [])
+  }, [token])
 
   // Fetch community items
   useEffect(() => {
@@ -18,7 +18,12 @@ function CommunityPage({ token, setShowLogin, handleLogout }) {
   const [isUploading, setIsUploading] = useState(false)
   const [communityList, setCommunityList] = useState([])
   const [displayList, setDisplayList] = useState([]) // Shuffled version for display
+  const [archiveQuery, setArchiveQuery] = useState('')
+  const [archiveCursor, setArchiveCursor] = useState(null)
+  const [archiveTotal, setArchiveTotal] = useState(0)
   const [pendingItems, setPendingItems] = useState([])
+  const [pendingCursor, setPendingCursor] = useState(null)
+  const [pendingTotal, setPendingTotal] = useState(0)
   const photoRef = useRef(null)
 
   // Refs for Enter key navigation
@@ -49,12 +54,29 @@ function CommunityPage({ token, setShowLogin, handleLogout }) {
     photo: false
   })
 
-  const fetchPublicItems = async () => {
+  // The archive is searched and paged on the server; pass the last nextCursor to load more
+  const fetchPublicItems = async (cursor = null, query = archiveQuery) => {
     try {
-      const res = await fetch(`${API_URL}/community`)
+      const params = new URLSearchParams()
+      if (query.trim()) params.set('q', query.trim())
+      if (cursor) params.set('cursor', cursor)
+      const res = await fetch(`${API_URL}/community/search?${params}`)
       const data = await res.json()
-      setCommunityList(data)
-      setDisplayList(shuffleArray(data)) // Shuffle on initial load
+      if (cursor) {
+        // Ranked pages go by offset, so an approval between pages can repeat an item
+        const append = prev => {
+          const seen = new Set(prev.map(item => item.id))
+          return [...prev, ...data.items.filter(item => !seen.has(item.id))]
+        }
+        setCommunityList(append)
+        setDisplayList(append)
+      } else {
+        setCommunityList(data.items)
+        // Search results keep their ranking; the plain archive is shuffled on load
+        setDisplayList(query.trim() ? data.items : shuffleArray(data.items))
+        setArchiveTotal(data.total)  // Only the first page counts
+      }
+      setArchiveCursor(data.nextCursor)
     } catch (err) { console.error(err) }
   }
 
@@ -62,22 +84,31 @@ function CommunityPage({ token, setShowLogin, handleLogout }) {
     setDisplayList(shuffleArray(communityList))
   }
 
-  const fetchPendingItems = async () => {
+  // The queue is paginated oldest-first; pass the last nextCursor to load more
+  const fetchPendingItems = async (cursor = null) => {
     if (!token) return
     try {
-      const res = await fetch(`${API_URL}/community/pending`, {
+      const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : ''
+      const res = await fetch(`${API_URL}/community/pending${query}`, {
         headers: { 'Authorization': `Bearer ${token}` }
       })
       const data = await res.json()
-      setPendingItems(data)
+      setPendingItems(prev => cursor ? [...prev, ...data.items] : data.items)
+      setPendingCursor(data.nextCursor)
+      if (!cursor) setPendingTotal(data.total)  // Only the first page counts
     } catch (err) { console.error(err) }
   }
 
   useEffect(() => {
-    fetchPublicItems()
     fetchPendingItems()
   }, [token])
 
+  // Search as you type, once typing pauses
+  useEffect(() => {
+    const timer = setTimeout(() => fetchPublicItems(null, archiveQuery), archiveQuery ? 250 : 0)
+    return () => clearTimeout(timer)
+  }, [archiveQuery])
+
   const handleApprove = async (id) => {
     await fetch(`${API_URL}/community/${id}/approve`, {
       method: 'PUT',
@@ -97,6 +128,18 @@ function CommunityPage({ token, setShowLogin, handleLogout }) {
     fetchPendingItems()
   }
 
+  // Approve or reject every loaded pending item in one request
+  const handleBulk = async (action) => {
+    if (!window.confirm(`${action === 'approve' ? 'Approve' : 'Reject'} all ${pendingItems.length} loaded items?`)) return
+    await fetch(`${API_URL}/community/${action}`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json', 'Authorization': `Bearer ${token}` },
+      body: JSON.stringify({ ids: pendingItems.map(item => item.id) })
+    })
+    fetchPublicItems()
+    fetchPendingItems()
+  }
+
   const handleSubmit = async (e) => {
     e.preventDefault()
     
@@ -299,7 +342,23 @@ function CommunityPage({ token, setShowLogin, handleLogout }) {
       {/* Admin: Pending Review */}
       {token && pendingItems.length > 0 && (
         <section className="border-2 border-green-500 rounded-xl p-6 mb-10 bg-green-50 dark:bg-green-900/20">
-          <h2 className="text-xl font-medium text-green-700 dark:text-green-400 mb-4">Admin: Pending Review</h2>
+          <div className="flex flex-wrap items-center justify-between gap-2 mb-4">
+            <h2 className="text-xl font-medium text-green-700 dark:text-green-400">Admin: Pending Review ({pendingTotal})</h2>
+            <div className="flex gap-2">
+              <button
+                onClick={() => handleBulk('approve')}
+                className="px-3 py-1.5 bg-green-600 text-white rounded-lg hover:bg-green-700 transition-all text-sm"
+              >
+                Approve all
+              </button>
+              <button
+                onClick={() => handleBulk('reject')}
+                className="px-3 py-1.5 bg-red-500 text-white rounded-lg hover:bg-red-600 transition-all text-sm"
+              >
+                Reject all
+              </button>
+            </div>
+          </div>
           <div className="grid grid-cols-1 sm:grid-cols-2 lg:grid-cols-3 gap-4">
             {pendingItems.map(item => (
               <div key={item.id} className="bg-white dark:bg-neutral-800 border border-neutral-200 dark:border-neutral-700 rounded-lg p-4">
@@ -327,6 +386,14 @@ function CommunityPage({ token, setShowLogin, handleLogout }) {
               </div>
             ))}
           </div>
+          {pendingCursor && (
+            <button
+              onClick={() => fetchPendingItems(pendingCursor)}
+              className="mt-4 w-full py-2 border border-green-500 text-green-700 dark:text-green-400 rounded-lg hover:bg-green-100 dark:hover:bg-green-900/40 transition-all text-sm"
+            >
+              Load more
+            </button>
+          )}
         </section>
       )}
 
@@ -334,7 +401,14 @@ function CommunityPage({ token, setShowLogin, handleLogout }) {
       <section>
         <h2 className="text-2xl font-light text-center mb-4">The Archive</h2>
 
-        <div className="flex justify-center mb-6">
+        <div className="flex justify-center gap-2 mb-6">
+          <input
+            type="search"
+            value={archiveQuery}
+            onChange={(e) => setArchiveQuery(e.target.value)}
+            placeholder="Search the archive"
+            className="w-full max-w-xs px-3 py-2 text-sm border border-neutral-300 dark:border-neutral-600 rounded-lg bg-white dark:bg-neutral-800"
+          />
           <button
             onClick={randomizeArchive}
             className="px-4 py-2 text-sm border border-neutral-300 dark:border-neutral-600 rounded-lg hover:bg-neutral-100 dark:hover:bg-neutral-800 transition-all flex items-center gap-2"
@@ -344,7 +418,7 @@ function CommunityPage({ token, setShowLogin, handleLogout }) {
         </div>
 
         {displayList.length === 0 ? (
-          <p className="text-center text-neutral-500 dark:text-neutral-400">Loading...</p>
+          <p className="text-center text-neutral-500 dark:text-neutral-400">{archiveQuery.trim() ? 'No matches' : 'Loading...'}</p>
         ) : (
           <div className="columns-1 sm:columns-2 lg:columns-3 gap-6">
             {displayList.map(item => (
@@ -384,6 +458,14 @@ function CommunityPage({ token, setShowLogin, handleLogout }) {
             ))}
           </div>
         )}
+        {archiveCursor && (
+          <button
+            onClick={() => fetchPublicItems(archiveCursor)}
+            className="mt-2 w-full py-2 text-sm border border-neutral-300 dark:border-neutral-600 rounded-lg hover:bg-neutral-100 dark:hover:bg-neutral-800 transition-all"
+          >
+            Load more ({displayList.length} of {archiveTotal})
+          </button>
+        )}
       </section>
     </div>
   )
@@ -65,6 +65,16 @@ export function useInventoryData() {
   }
 }
 
+// 32-bit FNV-1a of `${seed}:${id}`, same as shuffle_key in backend/blueprints/items.py,
+// so a seeded shuffle is stable and matches GET /?order=random&seed=N
+function shuffleKey(seed, id) {
+  let h = 0x811c9dc5
+  for (const byte of new TextEncoder().encode(`${seed}:${id}`)) {
+    h = Math.imul(h ^ byte, 0x01000193) >>> 0
+  }
+  return h
+}
+
 export function useItemFilters(visibleList, filters) {
   const {
     searchQuery,
@@ -83,7 +93,7 @@ export function useItemFilters(visibleList, filters) {
       if (searchQuery) {
         const query = searchQuery.toLowerCase()
         const matchesSearch =
-          item.itemName.toLowerCase().includes(query) ||
+          item.itemName?.toLowerCase().includes(query) ||
           item.description?.toLowerCase().includes(query) ||
           item.origin?.toLowerCase().includes(query) ||
           item.category?.toLowerCase().includes(query) ||
@@ -131,7 +141,7 @@ export function useItemFilters(visibleList, filters) {
       if (searchQuery) {
         const query = searchQuery.toLowerCase()
         const matchesSearch =
-          item.itemName.toLowerCase().includes(query) ||
+          item.itemName?.toLowerCase().includes(query) ||
           item.description?.toLowerCase().includes(query) ||
           item.origin?.toLowerCase().includes(query) ||
           item.category?.toLowerCase().includes(query) ||
@@ -178,9 +188,9 @@ export function useItemFilters(visibleList, filters) {
       } else if (sortOrder === 'oldest') {
         return new Date(a.createdAt) - new Date(b.createdAt)
       } else if (sortOrder === 'alphabetical') {
-        return a.itemName.localeCompare(b.itemName)
+        return (a.itemName ?? '').localeCompare(b.itemName ?? '')
       } else if (sortOrder === 'random') {
-        return Math.random() - 0.5
+        return shuffleKey(randomSeed, a.id) - shuffleKey(randomSeed, b.id)
       }
       return 0
     })
@@ -39,31 +39,74 @@ function ItemDetail({ list, setList, token, userRole }) {
   const [availableCategories, setAvailableCategories] = useState([])
   const [availableSubcategories, setAvailableSubcategories] = useState([])
 
-  // Fetch photos for this item
+  // The list entry is projected for whoever loaded the list; the edit form
+  // starts from GET /item/<id>, fetched with this viewer's token
+  const seedEditForm = (source) => {
+    setEditName(source.itemName || '')
+    setEditDescription(source.description || '')
+    setEditCategory(source.category || '')
+    setEditSubcategory(source.subcategory || '')
+    setEditOrigin(source.origin || '')
+    setEditSecondhand(source.secondhand || '')
+    setEditGifted(source.gifted === 'true' || source.gifted === true)
+    setEditPrivate(source.private === 'true' || source.private === true)
+    setEditPrivatePhotos(source.privatePhotos === 'true' || source.privatePhotos === true)
+    setEditPrivateDescription(source.privateDescription === 'true' || source.privateDescription === true)
+    setEditPrivateOrigin(source.privateOrigin === 'true' || source.privateOrigin === true)
+    setEditMaterials(source.materials || [])
+  }
+
+  // Fetch photos and category/subcategory display data in one request
+  const [detail, setDetail] = useState(null)
   useEffect(() => {
-    const fetchPhotos = async () => {
+    const fetchDetail = async () => {
       try {
-        const response = await fetch(`${API_URL}/item/${id}/photos`)
+        // Private photos and fields are only sent to signed-in viewers
+        const response = await fetch(`${API_URL}/item/${id}`, {
+          headers: token ? { 'Authorization': `Bearer ${token}` } : {}
+        })
         if (response.ok) {
           const data = await response.json()
           setPhotos(data.photos || [])
+          setDetail(data)
+          seedEditForm(data)
         }
       } catch (error) {
-        console.error('Failed to fetch photos:', error)
+        console.error('Failed to fetch item:', error)
       }
       setLoadingPhotos(false)
     }
 
     if (id) {
-      fetchPhotos()
+      fetchDetail()
     }
-  }, [id])
+  }, [id, token])
+
+  // Items like this one, for the strip under the details
+  const [similar, setSimilar] = useState([])
+  useEffect(() => {
+    const fetchSimilar = async () => {
+      try {
+        const response = await fetch(`${API_URL}/item/${id}/similar`, {
+          headers: token ? { 'Authorization': `Bearer ${token}` } : {}
+        })
+        if (response.ok) {
+          setSimilar(await response.json())
+        }
+      } catch (err) {
+        console.error('Failed to fetch similar items:', err)
+      }
+    }
+    setSimilar([])
+    if (id) fetchSimilar()
+  }, [id, token])
 
   // Scroll to top on mount
   useEffect(() => {
     window.scrollTo(0, 0)
   }, [id])
 
+  // The full lookup lists are only needed for the edit form
   // Fetch available materials
   useEffect(() => {
     const fetchMaterials = async () => {
@@ -77,8 +120,8 @@ function ItemDetail({ list, setList, token, userRole }) {
         console.error('Failed to fetch materials:', err)
       }
     }
-    fetchMaterials()
-  }, [])
+    if (isEditing) fetchMaterials()
+  }, [isEditing])
 
   // Fetch available categories
   useEffect(() => {
@@ -93,8 +136,8 @@ function ItemDetail({ list, setList, token, userRole }) {
         console.error('Failed to fetch categories:', err)
       }
     }
-    fetchCategories()
-  }, [])
+    if (isEditing) fetchCategories()
+  }, [isEditing])
 
   // Fetch available subcategories
   useEffect(() => {
@@ -109,8 +152,8 @@ function ItemDetail({ list, setList, token, userRole }) {
         console.error('Failed to fetch subcategories:', err)
       }
     }
-    fetchSubcategories()
-  }, [])
+    if (isEditing) fetchSubcategories()
+  }, [isEditing])
 
   if (!item) {
     return (
@@ -176,7 +219,9 @@ function ItemDetail({ list, setList, token, userRole }) {
       const result = await response.json()
 
       // Refresh photos from server to get full data including createdAt
-      const photosResponse = await fetch(`${API_URL}/item/${id}/photos`)
+      const photosResponse = await fetch(`${API_URL}/item/${id}/photos`, {
+        headers: { 'Authorization': `Bearer ${token}` }
+      })
       if (photosResponse.ok) {
         const photosData = await photosResponse.json()
         setPhotos(photosData.photos || [])
@@ -399,26 +444,41 @@ function ItemDetail({ list, setList, token, userRole }) {
       return
     }
 
+    const fields = {
+      itemName: editName,
+      description: editDescription,
+      category: editCategory,
+      subcategory: editSubcategory,
+      origin: editOrigin,
+      secondhand: editSecondhand,
+      gifted: editGifted ? 'true' : 'false',
+      private: editPrivate ? 'true' : 'false',
+      privatePhotos: editPrivatePhotos ? 'true' : 'false',
+      privateDescription: editPrivateDescription ? 'true' : 'false',
+      privateOrigin: editPrivateOrigin ? 'true' : 'false',
+      materials: editMaterials.length > 0 ? editMaterials : null,
+    }
+    // Only send what was edited
+    const saved = detail || item
+    const changes = Object.fromEntries(
+      Object.entries(fields).filter(([key, value]) => JSON.stringify(value) !== JSON.stringify(saved[key] ?? null))
+    )
+    if (Object.keys(changes).length === 0) {
+      setIsEditing(false)
+      setDeletedPhotos([])
+      return
+    }
+
+    // Only save if nobody else has edited the item since we loaded it
+    const version = detail?.version ?? item.version
     const response = await fetch(`${API_URL}/item/${id}`, {
-      method: 'PUT',
+      method: 'PATCH',
       headers: {
         'Content-Type': 'application/json',
-        'Authorization': `Bearer ${token}`
+        'Authorization': `Bearer ${token}`,
+        ...(version != null && { 'If-Match': `"${version}"` })
       },
-      body: JSON.stringify({
-        itemName: editName,
-        description: editDescription,
-        category: editCategory,
-        subcategory: editSubcategory,
-        origin: editOrigin,
-        secondhand: editSecondhand,
-        gifted: editGifted ? 'true' : 'false',
-        private: editPrivate ? 'true' : 'false',
-        privatePhotos: editPrivatePhotos ? 'true' : 'false',
-        privateDescription: editPrivateDescription ? 'true' : 'false',
-        privateOrigin: editPrivateOrigin ? 'true' : 'false',
-        materials: editMaterials.length > 0 ? editMaterials : null,
-      })
+      body: JSON.stringify(changes)
     })
 
     if (response.ok) {
@@ -427,8 +487,11 @@ function ItemDetail({ list, setList, token, userRole }) {
         i.id === id ? updatedItem : i
       )
       setList(updatedList)
+      setDetail(prev => prev && { ...prev, ...updatedItem })
       setIsEditing(false)
       setDeletedPhotos([]) // Clear undo history on save
+    } else if (response.status === 409) {
+      alert('This item was changed somewhere else since you opened it. Reload the page to see the latest version, then make your edits again.')
     } else {
       console.error("Failed to save.", await response.text())
     }
@@ -767,7 +830,7 @@ function ItemDetail({ list, setList, token, userRole }) {
                 ))}
               </select>
             ) : (
-              <p className="capitalize">{availableCategories.find(c => c.name === item.category)?.displayName || item.category}</p>
+              <p className="capitalize">{detail?.categoryInfo?.displayName || item.category}</p>
             )}
           </div>
 
@@ -789,7 +852,7 @@ function ItemDetail({ list, setList, token, userRole }) {
                     ))}
                 </select>
               ) : (
-                <p className="capitalize">{item.subcategory}</p>
+                <p className="capitalize">{detail?.subcategoryInfo?.displayName || item.subcategory}</p>
               )}
             </div>
           )}
@@ -1053,6 +1116,34 @@ function ItemDetail({ list, setList, token, userRole }) {
         </div>
       </div>
 
+      {/* Items like this */}
+      {!isEditing && similar.length > 0 && (
+        <div className="mt-12">
+          <h2 className="text-xl font-light font-serif mb-4">More like this</h2>
+          <div className="grid grid-cols-2 sm:grid-cols-4 gap-4">
+            {similar.map(other => (
+              <button
+                key={other.id}
+                onClick={() => navigate(`/item/${other.id}`)}
+                className="text-left group"
+              >
+                <div className="aspect-square bg-neutral-100 dark:bg-neutral-800 rounded-xl overflow-hidden mb-2">
+                  {other.mainPhoto && (
+                    <img
+                      src={other.mainPhoto}
+                      alt={other.itemName}
+                      loading="lazy"
+                      className="w-full h-full object-cover group-hover:opacity-90 transition-opacity"
+                    />
+                  )}
+                </div>
+                <p className="text-sm truncate">{other.itemName}</p>
+              </button>
+            ))}
+          </div>
+        </div>
+      )}
+
       {/* Floating save button for mobile */}
       {isEditing && (
         <button